@@ -0,0 +1,207 @@
+"""
+Módulo de asignación de sangre en lote.
+Planifica en memoria la asignación de muchas solicitudes de transfusión a la vez
+y la aplica en una única transacción, bloqueando las reservas usadas y
+volviendo a planificar si otro puesto las tomó antes.
+"""
+
+import mysql.connector
+from typing import Dict, List, Tuple
+from versiones_datos import registrar_escritura
+from vencimientos import condicion_vigente
+
+# Tolerancia para comparar volúmenes en ml
+EPSILON = 1e-6
+
+# Veces que se vuelve a planificar si otro puesto cambió el stock en el medio
+REINTENTOS_ASIGNACION = 3
+
+
+class ConflictoAsignacion(Exception):
+    """El stock o las solicitudes cambiaron entre la planificación y la aplicación."""
+
+
+def planificar_fifo(solicitudes, reservas, compatibilidades) -> dict:
+    """
+    Planifica la asignación de varias solicitudes en una sola pasada.
+
+    Reglas:
+    1. Las reservas de cada tipo se consumen por orden de vencimiento (FIFO).
+    2. Se prefiere el tipo exacto y luego los compatibles en orden de preferencia.
+    3. Los pacientes O- se atienden primero, para que sus unidades O- no
+       se gasten en receptores que podían usar otros tipos.
+    4. Una solicitud solo se acepta si se cubre completa; si no, queda pendiente
+       y no consume stock.
+
+    Args:
+        solicitudes: Lista de tuplas (id_solicitud, tipo_sangre, volumen)
+        reservas: Dict tipo -> lista de [id_reserva, volumen_disp, vencimiento] ordenada por vencimiento
+        compatibilidades: Dict receptor -> lista de tipos donables en orden de preferencia
+
+    Returns:
+        Dict con "asignaciones" (lista de (id_solicitud, id_reserva, volumen, tipo)),
+        "aceptadas" y "pendientes" (listas de ids de solicitud)
+    """
+    restante = {}
+    for filas in reservas.values():
+        for fila in filas:
+            restante[fila[0]] = float(fila[1]) if fila[1] is not None else 0.0
+    # Primer índice no agotado de cada tipo, para no recorrer filas ya consumidas
+    inicio = {tipo: 0 for tipo in reservas}
+
+    ordenadas = [s for s in solicitudes if s[1] == "O-"] + [s for s in solicitudes if s[1] != "O-"]
+
+    plan = {"asignaciones": [], "aceptadas": [], "pendientes": []}
+    for id_sol, tipo_sol, volumen in ordenadas:
+        faltante = float(volumen)
+        tentativas = []
+        for tipo in compatibilidades.get(tipo_sol, [tipo_sol]):
+            if faltante <= EPSILON:
+                break
+            filas = reservas.get(tipo, [])
+            i = inicio.get(tipo, 0)
+            while i < len(filas) and restante[filas[i][0]] <= EPSILON:
+                i += 1
+            inicio[tipo] = i
+            for fila in filas[i:]:
+                id_res = fila[0]
+                if faltante <= EPSILON:
+                    break
+                disp = restante[id_res]
+                if disp <= EPSILON:
+                    continue
+                tomado = min(disp, faltante)
+                tentativas.append((id_sol, id_res, tomado, tipo))
+                restante[id_res] = disp - tomado
+                faltante -= tomado
+
+        if faltante <= EPSILON:
+            plan["asignaciones"].extend(tentativas)
+            plan["aceptadas"].append(id_sol)
+        else:
+            # Devolver lo reservado tentativamente
+            for _, id_res, tomado, _ in tentativas:
+                restante[id_res] += tomado
+            plan["pendientes"].append(id_sol)
+    return plan
+
+
+class AsignadorLotes:
+    """Acepta muchas solicitudes pendientes con una planificación y una transacción."""
+
+    def __init__(self, gestor):
+        """
+        Inicializa el asignador.
+
+        Args:
+            gestor: GestorCompatibilidadSangre (aporta conexiones, compatibilidades e inventario)
+        """
+        self.gestor = gestor
+        self.db = gestor.db
+
+    def cargar_reservas(self) -> Dict[str, List[list]]:
+        """
+        Carga todas las reservas con volumen en una sola consulta.
+
+        Returns:
+            Dict tipo -> lista de [id_reserva, volumen_disp, vencimiento] ordenada por vencimiento
+        """
+        reservas = {}
+        with self.db.cursor() as cursor:
+            cursor.execute(f'''
+                SELECT ID, VolumenDisp, Vencimiento, TipodeSangre FROM reserva
+                WHERE VolumenDisp > 0 AND {condicion_vigente()}
+                ORDER BY Vencimiento ASC, ID ASC
+            ''')
+            for id_res, vol, vencimiento, tipo in cursor.fetchall():
+                reservas.setdefault(tipo, []).append([id_res, float(vol), vencimiento])
+        return reservas
+
+    def aplicar(self, plan: dict, reservas: Dict[str, List[list]] = None):
+        """
+        Aplica un plan con executemany en una única transacción.
+
+        Las reservas del plan se bloquean con SELECT ... FOR UPDATE y se descuenta
+        sobre el valor actual (VolumenDisp = VolumenDisp - x); las consumidas quedan
+        en 0 en lugar de borrarse. Si entre la planificación y la aplicación otro
+        puesto tomó parte de esas reservas o cambió alguna solicitud, se revierte
+        todo y se lanza ConflictoAsignacion para volver a planificar. Lo tomado por
+        cada solicitud queda registrado en la tabla asignacion (ver solicitudes.py).
+
+        Args:
+            plan: Resultado de planificar_fifo
+            reservas: Las reservas usadas para planificar (no hace falta: se releen bloqueadas)
+
+        Raises:
+            ConflictoAsignacion: si el stock o las solicitudes cambiaron desde la planificación
+        """
+        if not plan["aceptadas"]:
+            return
+
+        consumido = {}
+        consumido_tipo = {}
+        for _, id_res, volumen, tipo in plan["asignaciones"]:
+            consumido[id_res] = consumido.get(id_res, 0.0) + volumen
+            consumido_tipo[tipo] = consumido_tipo.get(tipo, 0.0) + volumen
+
+        # Una única transacción: si algo falla, transaccion() revierte todo
+        with self.db.transaccion() as cursor:
+            ids = sorted(consumido)  # mismo orden de bloqueo en todos los puestos
+            marcas = ", ".join(["%s"] * len(ids))
+            cursor.execute(f'''
+                SELECT ID, VolumenDisp FROM reserva
+                WHERE ID IN ({marcas}) AND {condicion_vigente()}
+                ORDER BY ID
+                FOR UPDATE
+            ''', tuple(ids))
+            actual = {id_res: float(vol) for id_res, vol in cursor.fetchall()}
+            cambiadas = [id_res for id_res in ids if actual.get(id_res, 0.0) + EPSILON < consumido[id_res]]
+            if cambiadas:
+                raise ConflictoAsignacion(f"cambió el stock de {len(cambiadas)} reserva(s)")
+
+            cursor.executemany('UPDATE reserva SET VolumenDisp = VolumenDisp - %s WHERE ID = %s',
+                               [(consumido[id_res], id_res) for id_res in ids])
+            cursor.executemany("UPDATE solicitud SET Estado = 'Aceptada' WHERE id = %s AND Estado = 'Pendiente'",
+                               [(id_sol,) for id_sol in plan["aceptadas"]])
+            if cursor.rowcount != len(plan["aceptadas"]):
+                raise ConflictoAsignacion("otra operación cambió alguna de las solicitudes")
+            cursor.executemany('INSERT INTO asignacion (id_Solicitud, id_Reserva, Volumen) VALUES (%s, %s, %s)',
+                               [(id_sol, id_res, volumen) for id_sol, id_res, volumen, _ in plan["asignaciones"]])
+
+        for tipo, volumen in consumido_tipo.items():
+            self.gestor.inventario.restar(tipo, volumen)
+        registrar_escritura("reserva", "solicitud")
+
+    def asignar(self, solicitudes, planificador=planificar_fifo) -> Tuple[List, List, str]:
+        """
+        Planifica y aplica la asignación de un lote de solicitudes.
+
+        Args:
+            solicitudes: Lista de tuplas (id_solicitud, tipo_sangre, volumen)
+            planificador: Función (solicitudes, reservas, compatibilidades) -> plan.
+                Por defecto planificar_fifo; ver optimizador_asignacion.planificar_optimo.
+
+        Returns:
+            Tupla (ids_aceptadas, ids_pendientes, mensaje)
+        """
+        try:
+            for _ in range(REINTENTOS_ASIGNACION):
+                reservas = self.cargar_reservas()
+                plan = planificador(solicitudes, reservas, self.gestor.compatibilidades)
+                try:
+                    self.aplicar(plan, reservas)
+                    break
+                except ConflictoAsignacion as e:
+                    # Otro puesto asignó en el medio: se vuelve a planificar con el stock nuevo
+                    conflicto = e
+            else:
+                ids = [s[0] for s in solicitudes]
+                return ([], ids, f"No se pudo asignar el lote: {conflicto}. Intente nuevamente.")
+        except mysql.connector.Error as e:
+            ids = [s[0] for s in solicitudes]
+            return ([], ids, f"Error al asignar el lote: {str(e)}")
+
+        total = sum(a[2] for a in plan["asignaciones"])
+        msg = (f"Solicitudes aceptadas: {len(plan['aceptadas'])} ({total:.0f} ml).\n"
+               f"Sin stock suficiente: {len(plan['pendientes'])}.")
+        return (plan["aceptadas"], plan["pendientes"], msg)
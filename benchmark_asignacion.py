@@ -0,0 +1,72 @@
+"""
+Benchmark del planificador de asignación óptima.
+Genera datos sintéticos (sin BD) y mide el tiempo de resolución.
+
+Uso:
+    python benchmark_asignacion.py [unidades] [solicitudes]
+"""
+
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from compatibilidad_sangre import COMPATIBILIDADES_ESTANDAR
+from asignacion_lotes import planificar_fifo
+from optimizador_asignacion import planificar_optimo
+
+# Distribución aproximada de tipos ABO/Rh en la población
+DISTRIBUCION_TIPOS = {
+    "O+": 0.38, "A+": 0.34, "B+": 0.09, "O-": 0.07,
+    "A-": 0.06, "AB+": 0.03, "B-": 0.02, "AB-": 0.01,
+}
+
+
+def generar_datos(unidades, solicitudes, semilla=42, hoy=None):
+    """Genera reservas (dict tipo -> [[id, vol, venc]]) y solicitudes [(id, tipo, vol)]."""
+    rnd = random.Random(semilla)
+    hoy = hoy or date.today()
+    tipos = list(DISTRIBUCION_TIPOS)
+    pesos = list(DISTRIBUCION_TIPOS.values())
+
+    filas = []
+    for id_res in range(1, unidades + 1):
+        tipo = rnd.choices(tipos, pesos)[0]
+        vencimiento = hoy + timedelta(days=rnd.randint(1, 42))
+        filas.append((vencimiento, id_res, tipo, rnd.choice((250.0, 450.0, 500.0))))
+    filas.sort()
+    reservas = {}
+    for vencimiento, id_res, tipo, vol in filas:
+        reservas.setdefault(tipo, []).append([id_res, vol, vencimiento])
+
+    pedidos = [(id_sol, rnd.choices(tipos, pesos)[0], float(rnd.choice((450, 900, 1350, 2250))))
+               for id_sol in range(1, solicitudes + 1)]
+    return reservas, pedidos
+
+
+def copiar_reservas(reservas):
+    return {tipo: [list(f) for f in filas] for tipo, filas in reservas.items()}
+
+
+def medir(nombre, planificador, reservas, solicitudes):
+    inicio = time.perf_counter()
+    plan = planificador(solicitudes, copiar_reservas(reservas), COMPATIBILIDADES_ESTANDAR)
+    duracion = time.perf_counter() - inicio
+    volumen = sum(a[2] for a in plan["asignaciones"])
+    usado_o_neg = sum(a[2] for a in plan["asignaciones"] if a[3] == "O-")
+    print(f"{nombre:10} {duracion * 1000:9.1f} ms | aceptadas: {len(plan['aceptadas']):5} | "
+          f"volumen: {volumen:11.0f} ml | O- usado: {usado_o_neg:9.0f} ml")
+    return duracion
+
+
+if __name__ == "__main__":
+    unidades = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    cantidad = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    reservas, solicitudes = generar_datos(unidades, cantidad)
+
+    print("=" * 60)
+    print(f"BENCHMARK DE ASIGNACIÓN: {unidades} unidades x {cantidad} solicitudes")
+    print("=" * 60)
+    medir("FIFO", planificar_fifo, reservas, solicitudes)
+    duracion = medir("Óptimo", planificar_optimo, reservas, solicitudes)
+    print(f"\n{'✅' if duracion < 1.0 else '❌'} Objetivo: resolver en menos de 1 s")
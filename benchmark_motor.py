@@ -0,0 +1,341 @@
+"""
+Benchmark del motor de compatibilidad y asignación sobre datos sintéticos.
+
+Carga una BD con reservas y solicitudes generadas (distribución ABO/Rh real,
+vencimientos repartidos y algunas unidades ya vencidas) y corre los caminos
+reales del motor contra ella contando las consultas. Por defecto la BD es
+SQLite en memoria (ProveedorSQLite, el mismo motor de los puestos sin red, con
+el esquema de migraciones.py); con --backend configurado se usa la de
+crear_proveedor() (BANCO_BACKEND), que debe ser una BD dedicada y sin reservas
+ni solicitudes: el benchmark la llena y la vacía entre tamaños.
+
+    - inventario:  InventarioSangre.recargar()
+    - busqueda:    buscar_sangre_disponible_recursivo() (en memoria)
+    - descontar:   descontar_stock_con_compatibilidad() de a un pedido
+    - aceptar:     GestorSolicitudes.aceptar() (estado + stock + asignaciones)
+    - lote:        AsignadorLotes.asignar() con planificar_fifo
+
+Para cada tamaño informa latencia (media, p50, p95), consultas por operación y
+si el volumen asignado coincide con lo que bajó la reserva. El resultado se
+guarda en JSON (con la revisión de git) para comparar antes y después de
+cambiar el motor.
+
+Uso:
+    python benchmark_motor.py [--tamanos 1000,10000,100000,1000000] [--salida archivo.json]
+                              [--comparar anterior.json] [--backend memoria|configurado]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import mysql.connector
+
+from asignacion_lotes import AsignadorLotes, planificar_fifo
+from benchmark_asignacion import DISTRIBUCION_TIPOS
+from compatibilidad_sangre import GestorCompatibilidadSangre
+from conexion import crear_proveedor
+from conexion_sqlite import ProveedorSQLite
+from migraciones import migrar
+from solicitudes import GestorSolicitudes
+from vencimientos import condicion_vigente
+
+TAMANOS = (1000, 10000, 100000)
+PEDIDOS = 200       # pedidos medidos de a uno en descontar / aceptar
+BUSQUEDAS = 2000    # búsquedas en memoria
+LOTE = 500          # solicitudes del lote
+TOLERANCIA_ML = 0.01
+
+VOLUMENES_BOLSA = (250.0, 450.0, 500.0)
+VOLUMENES_PEDIDO = (450.0, 900.0, 1350.0)
+
+class CursorContado:
+    """Cursor del proveedor que cuenta las consultas."""
+
+    def __init__(self, cursor, proveedor):
+        self._cursor = cursor
+        self._proveedor = proveedor
+
+    def execute(self, sql, params=()):
+        self._proveedor.consultas += 1
+        return self._cursor.execute(sql, params)
+
+    def executemany(self, sql, filas):
+        self._proveedor.consultas += 1
+        return self._cursor.executemany(sql, filas)
+
+    def __getattr__(self, nombre):
+        # fetchone, fetchall, fetchmany, rowcount, lastrowid...
+        return getattr(self._cursor, nombre)
+
+
+# --backend: BD sobre la que se mide
+BACKENDS = ("memoria", "configurado")
+
+# Tablas que llena generar(), en orden de borrado (claves foráneas)
+TABLAS_GENERADAS = ("asignacion", "solicitud", "reserva")
+
+
+class ProveedorBenchmark:
+    """Envuelve un proveedor de conexiones y cuenta las consultas de los caminos medidos."""
+
+    def __init__(self, proveedor):
+        self.proveedor = proveedor
+        self.consultas = 0
+
+    def __getattr__(self, nombre):
+        # dialecto, fulltext, tamano, conexion(), cortar()...
+        return getattr(self.proveedor, nombre)
+
+    @contextmanager
+    def cursor(self, commit: bool = False, **opciones):
+        with self.proveedor.cursor(commit, **opciones) as cursor:
+            yield CursorContado(cursor, self)
+
+    def transaccion(self, **opciones):
+        return self.cursor(commit=True, **opciones)
+
+
+def abrir_proveedor(backend: str) -> ProveedorBenchmark:
+    """
+    Proveedor del backend elegido, con el esquema al día.
+
+    Raises:
+        RuntimeError: si la BD configurada ya tiene reservas o solicitudes
+    """
+    if backend == "memoria":
+        return ProveedorBenchmark(ProveedorSQLite(":memory:"))
+    proveedor = crear_proveedor()
+    migrar(proveedor, informar=lambda texto: None)
+    with proveedor.cursor() as cursor:
+        for tabla in TABLAS_GENERADAS:
+            cursor.execute(f"SELECT COUNT(*) FROM {tabla}")
+            if cursor.fetchone()[0]:
+                raise RuntimeError(f"La tabla {tabla} no está vacía: el benchmark necesita una BD dedicada.")
+    return ProveedorBenchmark(proveedor)
+
+
+def vaciar(db):
+    """Borra lo que cargó generar() (para medir el tamaño siguiente sobre la misma BD)."""
+    with db.transaccion() as cursor:
+        for tabla in TABLAS_GENERADAS:
+            cursor.execute(f"DELETE FROM {tabla}")
+        cursor.execute("DELETE FROM hospital WHERE Nombre = 'Benchmark'")
+
+
+def generar(db, unidades: int, semilla: int = 42):
+    """Carga tipos, `unidades` reservas (≈2 % vencidas) y solicitudes pendientes."""
+    rnd = random.Random(semilla)
+    hoy = date.today()
+    tipos = list(DISTRIBUCION_TIPOS)
+    pesos = list(DISTRIBUCION_TIPOS.values())
+    with db.cursor() as cursor:
+        # tipodesangre y compatibilidad los carga la migración inicial
+        cursor.execute("SELECT TipodeSangre, id FROM tipodesangre")
+        ids_tipo = dict(cursor.fetchall())
+
+    def reservas():
+        for _ in range(unidades):
+            # Vida útil de 42 días: la fecha de extracción define el vencimiento
+            extraccion = hoy - timedelta(days=rnd.randint(0, 43))
+            vencimiento = extraccion + timedelta(days=42)
+            estado = "Vencida" if vencimiento < hoy else "No vencida"
+            yield (rnd.choice(VOLUMENES_BOLSA), extraccion, vencimiento, rnd.choices(tipos, pesos)[0], estado)
+
+    with db.transaccion() as cursor:
+        cursor.executemany('''
+            INSERT INTO reserva (VolumenDisp, FechaExtraccion, Vencimiento, TipodeSangre, Estado)
+            VALUES (%s, %s, %s, %s, %s)
+        ''', reservas())
+        cursor.execute("INSERT INTO hospital (Nombre, direccion, telefono) VALUES ('Benchmark', '-', '-')")
+        id_hospital = cursor.lastrowid
+        cursor.executemany("INSERT INTO solicitud (VolumenSolic, id_Hospital, id_TipodeSangre) VALUES (%s, %s, %s)",
+                           [(rnd.choice(VOLUMENES_PEDIDO), id_hospital, ids_tipo[rnd.choices(tipos, pesos)[0]])
+                            for _ in range(PEDIDOS + LOTE)])
+
+
+def stock_vigente(db) -> float:
+    with db.cursor() as cursor:
+        cursor.execute(f"SELECT COALESCE(SUM(VolumenDisp), 0) FROM reserva WHERE {condicion_vigente()}")
+        return float(cursor.fetchone()[0])
+
+
+def pendientes(db, cantidad: int) -> list:
+    with db.cursor() as cursor:
+        cursor.execute('''
+            SELECT s.id, ts.TipodeSangre, s.VolumenSolic
+            FROM solicitud s JOIN tipodesangre ts ON ts.id = s.id_TipodeSangre
+            WHERE s.Estado = 'Pendiente' ORDER BY s.id LIMIT %s
+        ''', (cantidad,))
+        return [(id_sol, tipo, float(vol)) for id_sol, tipo, vol in cursor.fetchall()]
+
+
+def medir(db, operacion, argumentos) -> tuple:
+    """Corre operacion(*args) para cada args; devuelve (resultados, estadísticas)."""
+    tiempos = []
+    resultados = []
+    consultas = db.consultas
+    for args in argumentos:
+        inicio = time.perf_counter()
+        resultados.append(operacion(*args))
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    cantidad = max(len(tiempos), 1)
+    ordenados = sorted(tiempos) or [0.0]
+    return resultados, {
+        "operaciones": len(tiempos),
+        "media_ms": round(statistics.fmean(ordenados), 4),
+        "p50_ms": round(ordenados[len(ordenados) // 2], 4),
+        "p95_ms": round(ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))], 4),
+        "consultas_por_operacion": round((db.consultas - consultas) / cantidad, 2),
+    }
+
+
+def correr(db, unidades: int) -> dict:
+    generar(db, unidades)
+    rnd = random.Random(unidades)
+    tipos = list(DISTRIBUCION_TIPOS)
+    pesos = list(DISTRIBUCION_TIPOS.values())
+    gestor = GestorCompatibilidadSangre(db)
+    resultado = {}
+
+    _, resultado["inventario"] = medir(db, gestor.inventario.recargar, [()] * 20)
+
+    busquedas = [(rnd.choices(tipos, pesos)[0], rnd.choice(VOLUMENES_PEDIDO)) for _ in range(BUSQUEDAS)]
+    obtenidos, resultado["busqueda"] = medir(db, gestor.buscar_sangre_disponible_recursivo, busquedas)
+    # Lo obtenible nunca puede superar el stock compatible del inventario
+    resultado["busqueda"]["correcto"] = all(
+        obtenido <= sum(gestor.inventario.volumen(t) for t in gestor.obtener_compatibles(tipo)) + TOLERANCIA_ML
+        for (tipo, _), (_, obtenido) in zip(busquedas, obtenidos))
+
+    pedidos = [(rnd.choices(tipos, pesos)[0], rnd.choice(VOLUMENES_PEDIDO)) for _ in range(PEDIDOS)]
+    antes = stock_vigente(db)
+    salidas, resultado["descontar"] = medir(db, gestor.descontar_stock_con_compatibilidad, pedidos)
+    asignado = sum(vol for (_, vol), (exito, _) in zip(pedidos, salidas) if exito)
+    resultado["descontar"].update(_balance(antes, stock_vigente(db), asignado))
+
+    solicitudes = GestorSolicitudes(gestor)
+    a_aceptar = pendientes(db, PEDIDOS)
+    antes = stock_vigente(db)
+    salidas, resultado["aceptar"] = medir(db, solicitudes.aceptar, [(s[0],) for s in a_aceptar])
+    asignado = sum(s[2] for s, (exito, _) in zip(a_aceptar, salidas) if exito)
+    resultado["aceptar"].update(_balance(antes, stock_vigente(db), asignado))
+
+    lote = pendientes(db, LOTE)
+    asignador = AsignadorLotes(gestor)
+    antes = stock_vigente(db)
+    salidas, resultado["lote"] = medir(db, asignador.asignar, [(lote, planificar_fifo)])
+    aceptadas = set(salidas[0][0])
+    asignado = sum(s[2] for s in lote if s[0] in aceptadas)
+    resultado["lote"].update(_balance(antes, stock_vigente(db), asignado))
+    resultado["lote"]["aceptadas"] = len(aceptadas)
+
+    # Lo registrado en asignacion debe coincidir con lo pedido por cada solicitud aceptada
+    with db.cursor() as cursor:
+        cursor.execute('''
+            SELECT COUNT(*) FROM solicitud s
+            WHERE s.Estado = 'Aceptada' AND ABS(s.VolumenSolic - (
+                SELECT COALESCE(SUM(a.Volumen), 0) FROM asignacion a WHERE a.id_Solicitud = s.id)) > %s
+        ''', (TOLERANCIA_ML,))
+        resultado["asignaciones_descuadradas"] = cursor.fetchone()[0]
+    return resultado
+
+
+def _balance(antes: float, despues: float, asignado: float) -> dict:
+    return {
+        "ml_asignados": round(asignado, 2),
+        "ml_descontados": round(antes - despues, 2),
+        "correcto": abs((antes - despues) - asignado) <= TOLERANCIA_ML,
+    }
+
+
+def revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocida"
+
+
+def comparar(actual: dict, anterior: dict):
+    """Imprime la relación de latencias y consultas contra una corrida anterior."""
+    print(f"\nComparación con {anterior.get('revision')} ({anterior.get('fecha')}):")
+    for tamano, caminos in actual["resultados"].items():
+        previos = anterior.get("resultados", {}).get(tamano, {})
+        for camino, datos in caminos.items():
+            previo = previos.get(camino)
+            if not isinstance(datos, dict) or not previo or not previo.get("media_ms"):
+                continue
+            relacion = datos["media_ms"] / previo["media_ms"]
+            print(f"  {tamano:>8} {camino:10} {relacion:6.2f}x tiempo | consultas "
+                  f"{previo['consultas_por_operacion']} -> {datos['consultas_por_operacion']}")
+
+
+def imprimir(tamano: int, resultado: dict):
+    print(f"\n{tamano} unidades")
+    for camino, datos in resultado.items():
+        if not isinstance(datos, dict):
+            continue
+        correcto = datos.get("correcto")
+        marca = "" if correcto is None else ("✅" if correcto else "❌")
+        print(f"  {camino:10} media {datos['media_ms']:9.3f} ms | p95 {datos['p95_ms']:9.3f} ms | "
+              f"{datos['consultas_por_operacion']:6} consultas/op {marca}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del motor de compatibilidad y asignación")
+    parser.add_argument("--tamanos", default=",".join(str(t) for t in TAMANOS),
+                        help="Cantidades de unidades separadas por coma (ej: 1000,10000,1000000)")
+    parser.add_argument("--salida", default="benchmark_motor.json", help="Archivo JSON de resultados")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--backend", choices=BACKENDS, default="memoria",
+                        help="memoria: SQLite en memoria (por defecto); configurado: la BD de BANCO_BACKEND, "
+                             "dedicada y sin reservas ni solicitudes")
+    args = parser.parse_args()
+
+    informe = {
+        "revision": revision(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "backend": args.backend,
+        "resultados": {},
+    }
+    print("=" * 60)
+    print(f"BENCHMARK DEL MOTOR (revisión {informe['revision']}, backend {args.backend})")
+    print("=" * 60)
+    for tamano in (int(t) for t in args.tamanos.split(",")):
+        # En memoria cada tamaño arranca de una BD nueva; la configurada se vacía al terminar
+        try:
+            db = abrir_proveedor(args.backend)
+        except (RuntimeError, ValueError, mysql.connector.Error) as e:
+            print(f"❌ No se pudo abrir la BD: {e}")
+            sys.exit(1)
+        try:
+            resultado = correr(db, tamano)
+        finally:
+            if args.backend != "memoria":
+                vaciar(db)
+        informe["resultados"][str(tamano)] = resultado
+        imprimir(tamano, resultado)
+
+    with open(args.salida, "w", encoding="utf-8") as archivo:
+        json.dump(informe, archivo, indent=2, ensure_ascii=False)
+    print(f"\nResultados guardados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            comparar(informe, json.load(archivo))
+
+    correctos = all(datos.get("correcto", True) for caminos in informe["resultados"].values()
+                    for datos in caminos.values() if isinstance(datos, dict))
+    descuadres = sum(caminos["asignaciones_descuadradas"] for caminos in informe["resultados"].values())
+    sys.exit(0 if correctos and descuadres == 0 else 1)
@@ -0,0 +1,282 @@
+"""
+Módulo de búsqueda incremental de donantes.
+Combina tres piezas:
+1. Debounce de la entrada, para no buscar en cada tecla.
+2. Un índice de trigramas en memoria sobre DNI y nombre, construido una vez y
+   actualizado al registrar/editar/borrar donantes; cada tecla que extiende la
+   búsqueda anterior solo filtra el resultado previo. Al volver a la pantalla se
+   compara con la BD (cantidad e id máximo) por si otro puesto cargó o borró donantes.
+3. Una consulta en el servidor que usa índices (prefijo de DNI y FULLTEXT de nombre)
+   para las búsquedas "en frío", mientras el índice en memoria todavía no está listo.
+"""
+
+import threading
+import unicodedata
+from typing import Dict, Iterable, Optional, Set
+
+import mysql.connector
+
+# Milisegundos sin teclear antes de lanzar la búsqueda
+RETARDO_DEBOUNCE_MS = 250
+
+# Error de MySQL "Can't find FULLTEXT index matching the column list"
+ERROR_SIN_FULLTEXT = 1191
+
+# Índices de servidor que usa la búsqueda en frío (ver migraciones)
+DDL_INDICES_BUSQUEDA = [
+    "CREATE INDEX idx_donante_dni ON donante (dni)",
+    "CREATE FULLTEXT INDEX ft_donante_nombre ON donante (nombre, apellido)",
+]
+
+
+def normalizar(texto) -> str:
+    """Minúsculas y sin acentos, para comparar 'Pérez' con 'perez'."""
+    texto = unicodedata.normalize("NFKD", str(texto or "").lower())
+    return "".join(c for c in texto if not unicodedata.combining(c)).strip()
+
+
+def trigramas(texto: str) -> Set[str]:
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class Debouncer:
+    """Posterga una función hasta que pasen retardo_ms sin nuevas llamadas."""
+
+    def __init__(self, widget, funcion, retardo_ms: int = RETARDO_DEBOUNCE_MS):
+        self.widget = widget
+        self.funcion = funcion
+        self.retardo_ms = retardo_ms
+        self._pendiente = None
+
+    def llamar(self, *args):
+        if self._pendiente is not None:
+            self.widget.after_cancel(self._pendiente)
+        self._pendiente = self.widget.after(self.retardo_ms, self._disparar, *args)
+
+    def _disparar(self, *args):
+        self._pendiente = None
+        self.funcion(*args)
+
+
+class IndiceDonantes:
+    """Índice de trigramas sobre DNI y 'nombre apellido' de los donantes."""
+
+    def __init__(self):
+        self.version = 0
+        self.cargado = False
+        self._textos: Dict[int, tuple] = {}          # id -> (dni, nombre completo) normalizados
+        self._trigramas: Dict[str, Set[int]] = {}
+        self._max_id = None
+        self._lock = threading.RLock()
+
+    def cargar(self, db):
+        """Construye el índice con una sola consulta (fuera del hilo de Tk)."""
+        with db.cursor() as cursor:
+            cursor.execute("SELECT id, dni, nombre, apellido FROM donante")
+            filas = cursor.fetchall()
+        with self._lock:
+            self._textos.clear()
+            self._trigramas.clear()
+            for id_donante, dni, nombre, apellido in filas:
+                self._agregar(id_donante, dni, nombre, apellido)
+            self._max_id = max(self._textos, default=None)
+            self.cargado = True
+            self.version += 1
+
+    def firma(self) -> tuple:
+        """(cantidad de donantes, id máximo) según el índice; se compara con firma_servidor()."""
+        with self._lock:
+            return (len(self._textos), self._max_id)
+
+    def _agregar(self, id_donante, dni, nombre, apellido):
+        textos = (normalizar(dni), normalizar(f"{nombre} {apellido}"))
+        self._textos[id_donante] = textos
+        for texto in textos:
+            for tri in trigramas(texto):
+                self._trigramas.setdefault(tri, set()).add(id_donante)
+
+    def agregar(self, id_donante, dni, nombre, apellido):
+        """Agrega o reemplaza un donante (al registrarlo o editarlo)."""
+        with self._lock:
+            self._quitar(id_donante)
+            self._agregar(id_donante, dni, nombre, apellido)
+            if self._max_id is None or id_donante > self._max_id:
+                self._max_id = id_donante
+            self.version += 1
+
+    def _quitar(self, id_donante):
+        textos = self._textos.pop(id_donante, None)
+        if textos is None:
+            return
+        for texto in textos:
+            for tri in trigramas(texto):
+                ids = self._trigramas.get(tri)
+                if ids is not None:
+                    ids.discard(id_donante)
+                    if not ids:
+                        del self._trigramas[tri]
+
+    def quitar(self, id_donante):
+        """Quita un donante (al borrarlo)."""
+        with self._lock:
+            self._quitar(id_donante)
+            self.version += 1
+
+    def quitar_por_dni(self, dni):
+        """Quita los donantes con ese DNI (la pantalla de donantes borra por DNI)."""
+        dni = normalizar(dni)
+        with self._lock:
+            for id_donante in [i for i, t in self._textos.items() if t[0] == dni]:
+                self._quitar(id_donante)
+            self.version += 1
+
+    def buscar(self, consulta: str, candidatos: Optional[Iterable[int]] = None) -> Set[int]:
+        """
+        Ids de donantes cuyo DNI o nombre completo contiene la consulta.
+
+        Args:
+            consulta: Texto buscado (se normaliza)
+            candidatos: Si se pasa, solo se verifica dentro de estos ids
+
+        Returns:
+            Set de ids de donante
+        """
+        q = normalizar(consulta)
+        with self._lock:
+            if candidatos is None:
+                if len(q) >= 3:
+                    # Intersección de las listas de trigramas, empezando por la más corta
+                    listas = sorted((self._trigramas.get(t, set()) for t in trigramas(q)), key=len)
+                    candidatos = set(listas[0]).intersection(*listas[1:]) if listas else set()
+                else:
+                    candidatos = self._textos.keys()
+            return {i for i in candidatos
+                    if i in self._textos and (q in self._textos[i][0] or q in self._textos[i][1])}
+
+
+class BuscadorIncremental:
+    """Búsqueda por pantalla sobre el índice compartido, estrechando el resultado anterior."""
+
+    def __init__(self, indice: IndiceDonantes):
+        self.indice = indice
+        self._ultima = None
+        self._resultado = None
+        self._version = None
+
+    def buscar(self, consulta: str) -> Set[int]:
+        q = normalizar(consulta)
+        candidatos = None
+        if (self._ultima is not None and self._version == self.indice.version
+                and self._ultima in q):
+            # La nueva búsqueda contiene a la anterior: sus resultados son un subconjunto
+            candidatos = self._resultado
+        resultado = self.indice.buscar(q, candidatos)
+        self._ultima, self._resultado, self._version = q, resultado, self.indice.version
+        return resultado
+
+
+class CacheResultados:
+    """
+    Último resultado traído de la BD para una búsqueda por ids. Si la búsqueda
+    siguiente encuentra un subconjunto de esos ids, las filas se filtran en memoria.
+    """
+
+    def __init__(self, id_de_fila):
+        """
+        Args:
+            id_de_fila: Función fila -> id de donante
+        """
+        self.id_de_fila = id_de_fila
+        self.invalidar()
+
+    def invalidar(self):
+        """Descarta el resultado (después de editar o borrar filas)."""
+        self.ids = None
+        self.filas = None
+
+    def guardar(self, ids: Set[int], filas: list, completo: bool):
+        """Guarda un resultado; si no trajo todas las filas de esos ids, no sirve para filtrar."""
+        if completo:
+            self.ids, self.filas = set(ids), filas
+        else:
+            self.invalidar()
+
+    def filtrar(self, ids: Set[int]) -> Optional[list]:
+        """Filas de esos ids sin ir a la BD, o None si el resultado guardado no las cubre."""
+        if self.ids is None or not ids <= self.ids:
+            return None
+        return [f for f in self.filas if self.id_de_fila(f) in ids]
+
+
+def condicion_servidor(consulta: str, fulltext: bool = True):
+    """
+    Condición SQL (sobre el alias d de donante) para la búsqueda en frío en el servidor.
+    Usa el índice de dni (prefijo) o el FULLTEXT de nombre y apellido, en lugar de
+    LIKE '%x%' sobre CONCAT que obliga a recorrer la tabla completa.
+
+    Args:
+        consulta: Texto buscado
+        fulltext: Si es False, usa la condición LIKE original (base sin índice FULLTEXT)
+
+    Returns:
+        Tupla (fragmento SQL, parámetros)
+    """
+    consulta = consulta.strip()
+    if consulta.isdigit():
+        return "d.dni LIKE %s", (f"{consulta}%",)
+    if not fulltext:
+        param = f"%{consulta}%"
+        return "(d.dni LIKE %s OR CONCAT(d.nombre, ' ', d.apellido) LIKE %s)", (param, param)
+    palabras = " ".join(f"+{p}*" for p in consulta.split() if p)
+    return "MATCH(d.nombre, d.apellido) AGAINST (%s IN BOOLEAN MODE)", (palabras,)
+
+
+def buscar_en_servidor(db, query: str, consulta: str):
+    """
+    Ejecuta una consulta con el marcador {condicion} reemplazado por condicion_servidor().
+    Si la tabla todavía no tiene el índice FULLTEXT (o el motor no lo soporta), usa LIKE.
+
+    Returns:
+        Lista de filas
+    """
+    for fulltext in ((True, False) if getattr(db, "fulltext", True) else (False,)):
+        condicion, params = condicion_servidor(consulta, fulltext)
+        try:
+            with db.cursor() as cursor:
+                cursor.execute(query.format(condicion=condicion), params)
+                return cursor.fetchall()
+        except mysql.connector.Error as e:
+            if not fulltext or e.errno != ERROR_SIN_FULLTEXT:
+                raise
+
+
+# Índice único del proceso, compartido por las pantallas
+INDICE_DONANTES = IndiceDonantes()
+_carga_lock = threading.Lock()
+
+
+def indice_donantes(db) -> IndiceDonantes:
+    """Devuelve el índice compartido, construyéndolo la primera vez (llamar fuera del hilo de Tk)."""
+    with _carga_lock:
+        if not INDICE_DONANTES.cargado:
+            INDICE_DONANTES.cargar(db)
+    return INDICE_DONANTES
+
+
+def firma_servidor(db) -> tuple:
+    """(cantidad de donantes, id máximo) en la BD."""
+    with db.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*), MAX(id) FROM donante")
+        total, max_id = cursor.fetchone()
+    return (total, max_id)
+
+
+def refrescar_indice(db) -> IndiceDonantes:
+    """
+    Devuelve el índice compartido, reconstruyéndolo si otro puesto agregó o borró
+    donantes desde que se cargó (llamar fuera del hilo de Tk).
+    """
+    with _carga_lock:
+        if not INDICE_DONANTES.cargado or INDICE_DONANTES.firma() != firma_servidor(db):
+            INDICE_DONANTES.cargar(db)
+    return INDICE_DONANTES
@@ -0,0 +1,123 @@
+"""
+Módulo de caché de catálogos.
+Guarda una sola vez por proceso el catálogo de tipos de sangre y las reglas de
+compatibilidad, para que las pantallas no repitan las mismas consultas al abrirse.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+import mysql.connector
+
+from tabla_compatibilidad import TablaCompatibilidad
+
+# Cada cuánto (segundos) se verifica contra la BD si los catálogos cambiaron
+TTL_SEGUNDOS = 300
+
+
+class CacheCatalogos:
+    """Caché versionada de tipodesangre y compatibilidad, compartida por todo el proceso."""
+
+    def __init__(self, ttl: float = TTL_SEGUNDOS):
+        self.ttl = ttl
+        self.version = 0
+        self._datos = None
+        self._firma = None
+        self._verificado_en = 0.0
+        self._lock = threading.Lock()
+
+    def _firma_actual(self, db):
+        """Checksum de las tablas de catálogo (consulta liviana, no lee las filas)."""
+        with db.cursor() as cursor:
+            cursor.execute("CHECKSUM TABLE tipodesangre, compatibilidad")
+            return tuple(cursor.fetchall())
+
+    def _cargar(self, db) -> dict:
+        with db.cursor() as cursor:
+            cursor.execute("SELECT id, TipodeSangre FROM tipodesangre ORDER BY id")
+            tipos = [(row[0], row[1]) for row in cursor.fetchall()]
+            cursor.execute('''
+                SELECT ts1.TipodeSangre, ts2.TipodeSangre
+                FROM compatibilidad c
+                JOIN tipodesangre ts1 ON c.id_TipodeSangreReceptor = ts1.id
+                JOIN tipodesangre ts2 ON c.id_TipodeSangreDonable = ts2.id
+                ORDER BY c.preferencia ASC
+            ''')
+            compat = {}
+            for receptor, donable in cursor.fetchall():
+                compat.setdefault(receptor, []).append(donable)
+
+        return {
+            "tipos": tipos,
+            "ids": {nombre: id_tipo for id_tipo, nombre in tipos},
+            "compatibilidades": compat,
+            "tabla": TablaCompatibilidad(compat) if compat else None,
+        }
+
+    def obtener(self, db) -> dict:
+        """
+        Devuelve los catálogos, cargándolos solo si no están o si cambiaron en la BD.
+
+        Args:
+            db: ProveedorConexiones de la BD
+
+        Returns:
+            Dict con "tipos" [(id, nombre)], "ids" {nombre: id},
+            "compatibilidades" {receptor: [donables]} y "tabla" (TablaCompatibilidad o None)
+
+        Raises:
+            mysql.connector.Error: si no se pudieron cargar y no hay datos previos
+        """
+        with self._lock:
+            ahora = time.monotonic()
+            if self._datos is not None and ahora - self._verificado_en < self.ttl:
+                return self._datos
+
+            firma = None
+            try:
+                firma = self._firma_actual(db)
+            except mysql.connector.Error:
+                # Sin checksum (permisos, motor) se recarga al vencer el TTL
+                pass
+
+            if self._datos is not None and firma is not None and firma == self._firma:
+                self._verificado_en = ahora
+                return self._datos
+
+            self._datos = self._cargar(db)
+            self._firma = firma
+            self._verificado_en = ahora
+            self.version += 1
+            return self._datos
+
+    def invalidar(self):
+        """Fuerza la recarga en el próximo acceso."""
+        with self._lock:
+            self._datos = None
+            self._firma = None
+
+
+# Instancia única del proceso
+CATALOGOS = CacheCatalogos()
+
+
+def tipos_sangre(db, ordenados: bool = False) -> List[str]:
+    """Nombres de los tipos de sangre del catálogo (en orden de id, o alfabético)."""
+    nombres = [nombre for _, nombre in CATALOGOS.obtener(db)["tipos"]]
+    return sorted(nombres) if ordenados else nombres
+
+
+def id_tipo_sangre(db, nombre: str) -> Optional[int]:
+    """Id de un tipo de sangre en el catálogo, o None si no existe."""
+    return CATALOGOS.obtener(db)["ids"].get(nombre)
+
+
+def compatibilidades(db) -> Dict[str, List[str]]:
+    """Reglas receptor -> donables cargadas de la tabla compatibilidad (vacío si no hay)."""
+    return CATALOGOS.obtener(db)["compatibilidades"]
+
+
+def invalidar_catalogos():
+    """Descarta los catálogos en caché (por ejemplo, tras editarlos)."""
+    CATALOGOS.invalidar()
@@ -5,6 +5,12 @@ Implementa búsqueda recursiva de tipos compatibles cuando el tipo solicitado no
 
 import mysql.connector
 from typing import List, Tuple, Optional
+from inventario_sangre import InventarioSangre
+from tabla_compatibilidad import TablaCompatibilidad
+from cache_catalogos import CATALOGOS
+from versiones_datos import registrar_escritura
+from vencimientos import condicion_vigente
+from repositorios import condicion_keyset, parametros_keyset
 
 # Tabla de compatibilidades estándar:
 # Un paciente con tipo X puede recibir sangre de los tipos listados
@@ -20,50 +26,55 @@ COMPATIBILIDADES_ESTANDAR = {
     "AB-": ["AB-", "A-", "B-", "O-"],
 }
 
+# Tabla compilada una sola vez para el caso (habitual) en que se usan las estándar
+TABLA_ESTANDAR = TablaCompatibilidad(COMPATIBILIDADES_ESTANDAR)
+
+# Tolerancia para comparar volúmenes en ml
+EPSILON = 1e-6
+
+# Reservas bloqueadas por consulta al descontar (se piden más solo si no alcanzan)
+LOTE_BLOQUEO = 20
+
+
+class StockInsuficiente(Exception):
+    """No hay stock compatible suficiente; faltante en ml."""
+
+    def __init__(self, faltante: float):
+        super().__init__(f"Faltan {faltante:.2f} ml")
+        self.faltante = faltante
+
 
 class GestorCompatibilidadSangre:
     """Gestiona la búsqueda y asignación de sangre compatible."""
 
-    def __init__(self, conn):
+    def __init__(self, db):
         """
-        Inicializa el gestor con una conexión a BD.
+        Inicializa el gestor con el proveedor de conexiones a BD.
         
         Args:
-            conn: Conexión mysql.connector a la BD
+            db: ProveedorConexiones de la BD
         """
-        self.conn = conn
-        self.compatibilidades = self._cargar_compatibilidades()
+        self.db = db
+        self.compatibilidades, self.tabla = self._cargar_compatibilidades()
+        self.inventario = InventarioSangre(db)
 
-    def _cargar_compatibilidades(self) -> dict:
+    def _cargar_compatibilidades(self) -> Tuple[dict, TablaCompatibilidad]:
         """
-        Carga las compatibilidades desde la BD si existen.
-        Si no, usa las compatibilidades estándar.
+        Obtiene las compatibilidades de la caché de catálogos del proceso
+        (que solo consulta la BD la primera vez o si la tabla cambió).
+        Si no hay reglas en la BD, usa las compatibilidades estándar.
         
         Returns:
-            Dict con tipo_sangre -> lista de tipos compatibles ordenados
+            Tupla (dict tipo_sangre -> lista de tipos compatibles ordenados, tabla compilada)
         """
         try:
-            with self.conn.cursor() as cursor:
-                cursor.execute('''
-                    SELECT ts1.TipodeSangre, ts2.TipodeSangre 
-                    FROM compatibilidad c
-                    JOIN tipodesangre ts1 ON c.id_TipodeSangreReceptor = ts1.id
-                    JOIN tipodesangre ts2 ON c.id_TipodeSangreDonable = ts2.id
-                    ORDER BY c.preferencia ASC
-                ''')
-                resultados = cursor.fetchall()
-                
-                # Reorganizar en dict
-                compat = {}
-                for receptor, donable in resultados:
-                    if receptor not in compat:
-                        compat[receptor] = []
-                    compat[receptor].append(donable)
-                
-                return compat if compat else COMPATIBILIDADES_ESTANDAR
+            catalogos = CATALOGOS.obtener(self.db)
+            if catalogos["compatibilidades"]:
+                return (catalogos["compatibilidades"], catalogos["tabla"])
         except Exception:
             # Si hay error, usar estándares
-            return COMPATIBILIDADES_ESTANDAR
+            pass
+        return (COMPATIBILIDADES_ESTANDAR, TABLA_ESTANDAR)
 
     def obtener_compatibles(self, tipo_sangre: str) -> List[str]:
         """
@@ -75,7 +86,19 @@ class GestorCompatibilidadSangre:
         Returns:
             Lista de tipos compatibles en orden de preferencia
         """
-        return self.compatibilidades.get(tipo_sangre, [tipo_sangre])
+        return list(self.tabla.donantes_de(tipo_sangre))
+
+    def obtener_compatibles_en_stock(self, tipo_sangre: str) -> List[str]:
+        """
+        Obtiene los tipos compatibles que además tienen stock según el inventario.
+
+        Args:
+            tipo_sangre: Tipo de sangre solicitado (ej: "O+")
+
+        Returns:
+            Lista de tipos compatibles con stock, en orden de preferencia
+        """
+        return list(self.tabla.donantes_en_stock(tipo_sangre, self.inventario.mascara_en_stock()))
 
     def buscar_sangre_disponible_recursivo(
         self,
@@ -109,62 +132,51 @@ class GestorCompatibilidadSangre:
             return (None, 0)
         visitados.add(tipo_sangre_solicitado)
 
-        try:
-            with self.conn.cursor() as cursor:
-                # Obtener stock disponible del tipo solicitado
-                cursor.execute('''
-                    SELECT SUM(VolumenDisp) FROM reserva 
-                    WHERE TipodeSangre = %s
-                ''', (tipo_sangre_solicitado,))
-                resultado = cursor.fetchone()
-                volumen_disponible = float(resultado[0]) if resultado[0] else 0.0
-
-                # Si hay suficiente volumen, usar este tipo
-                if volumen_disponible >= volumen_requerido:
-                    return (tipo_sangre_solicitado, volumen_requerido)
-
-                # Si hay volumen parcial, guardarlo y buscar lo que falta
-                if volumen_disponible > 0:
-                    volumen_faltante = volumen_requerido - volumen_disponible
-                    
-                    # Intentar encontrar los tipos compatibles
-                    compatibles = self.obtener_compatibles(tipo_sangre_solicitado)
-                    
-                    for tipo_compatible in compatibles:
-                        if tipo_compatible == tipo_sangre_solicitado:
-                            continue  # Ya lo intentamos
-                        
-                        tipo_encontrado, vol_encontrado = self.buscar_sangre_disponible_recursivo(
-                            tipo_compatible, volumen_faltante, visitados.copy()
-                        )
-                        
-                        if vol_encontrado > 0:
-                            # Devolvemos el tipo original pero con volumen combinado
-                            return (tipo_sangre_solicitado, volumen_disponible + vol_encontrado)
-                    
-                    # Si no encontramos complemento, devolver lo que hay
-                    return (tipo_sangre_solicitado, volumen_disponible)
-
-                # No hay volumen en el tipo solicitado, buscar en compatibles
-                compatibles = self.obtener_compatibles(tipo_sangre_solicitado)
-                
-                for tipo_compatible in compatibles:
-                    if tipo_compatible == tipo_sangre_solicitado:
-                        continue
-                    
-                    tipo_encontrado, vol_encontrado = self.buscar_sangre_disponible_recursivo(
-                        tipo_compatible, volumen_requerido, visitados.copy()
-                    )
-                    
-                    if vol_encontrado >= volumen_requerido:
-                        return (tipo_compatible, vol_encontrado)
-
-                # No hay sangre compatible disponible
-                return (None, 0)
+        # El volumen disponible se consulta en el inventario en memoria
+        volumen_disponible = self.inventario.volumen(tipo_sangre_solicitado)
 
-        except mysql.connector.Error as e:
-            print(f"Error en búsqueda recursiva: {e}")
-            return (None, 0)
+        # Si hay suficiente volumen, usar este tipo
+        if volumen_disponible >= volumen_requerido:
+            return (tipo_sangre_solicitado, volumen_requerido)
+
+        # Si hay volumen parcial, guardarlo y buscar lo que falta
+        if volumen_disponible > 0:
+            volumen_faltante = volumen_requerido - volumen_disponible
+
+            # Intentar encontrar los tipos compatibles
+            compatibles = self.obtener_compatibles(tipo_sangre_solicitado)
+
+            for tipo_compatible in compatibles:
+                if tipo_compatible == tipo_sangre_solicitado:
+                    continue  # Ya lo intentamos
+
+                tipo_encontrado, vol_encontrado = self.buscar_sangre_disponible_recursivo(
+                    tipo_compatible, volumen_faltante, visitados.copy()
+                )
+
+                if vol_encontrado > 0:
+                    # Devolvemos el tipo original pero con volumen combinado
+                    return (tipo_sangre_solicitado, volumen_disponible + vol_encontrado)
+
+            # Si no encontramos complemento, devolver lo que hay
+            return (tipo_sangre_solicitado, volumen_disponible)
+
+        # No hay volumen en el tipo solicitado, buscar en compatibles
+        compatibles = self.obtener_compatibles(tipo_sangre_solicitado)
+
+        for tipo_compatible in compatibles:
+            if tipo_compatible == tipo_sangre_solicitado:
+                continue
+
+            tipo_encontrado, vol_encontrado = self.buscar_sangre_disponible_recursivo(
+                tipo_compatible, volumen_requerido, visitados.copy()
+            )
+
+            if vol_encontrado >= volumen_requerido:
+                return (tipo_compatible, vol_encontrado)
+
+        # No hay sangre compatible disponible
+        return (None, 0)
 
     def obtener_recomendacion(self, tipo_sangre: str) -> str:
         """
@@ -180,7 +192,68 @@ class GestorCompatibilidadSangre:
         if not compatibles:
             return f"No hay información de compatibilidad para {tipo_sangre}"
         
-        return f"Tipos aceptados para {tipo_sangre}: {', '.join(compatibles)}"
+        mensaje = f"Tipos aceptados para {tipo_sangre}: {', '.join(compatibles)}"
+        en_stock = self.obtener_compatibles_en_stock(tipo_sangre)
+        if en_stock:
+            return f"{mensaje}\nCon stock disponible: {', '.join(en_stock)}"
+        return f"{mensaje}\nNo hay stock compatible disponible"
+
+    def consumir_reservas(self, cursor, tipo_sangre_solicitado: str, volumen_requerido: float) -> List[tuple]:
+        """
+        Toma volumen de las reservas compatibles dentro de una transacción abierta.
+
+        Las reservas se bloquean con SELECT ... FOR UPDATE SKIP LOCKED de a
+        LOTE_BLOQUEO filas (por tipo en orden de preferencia y por vencimiento):
+        las que otra transacción está usando se saltean en lugar de esperar, y
+        ninguna bolsa puede asignarse dos veces. Las consumidas quedan con
+        VolumenDisp = 0 (no se borran, las referencian solicitudes y transfusiones).
+
+        Args:
+            cursor: Cursor de una transacción (db.transaccion())
+            tipo_sangre_solicitado: Tipo solicitado
+            volumen_requerido: Volumen a tomar (ml)
+
+        Returns:
+            Lista de (id_reserva, volumen_tomado, tipo)
+
+        Raises:
+            StockInsuficiente: si no alcanzó (quien llama debe revertir la transacción)
+        """
+        volumen_faltante = float(volumen_requerido)
+        tomas = []
+        for tipo in self.obtener_compatibles(tipo_sangre_solicitado):
+            despues = None
+            while volumen_faltante > EPSILON:
+                condiciones = f"TipodeSangre = %s AND VolumenDisp > 0 AND {condicion_vigente()}"
+                params = [tipo]
+                if despues is not None:
+                    condiciones += " AND " + condicion_keyset(("Vencimiento", "ID"))
+                    params.extend(parametros_keyset(despues))
+                cursor.execute(f'''
+                    SELECT ID, VolumenDisp, Vencimiento FROM reserva
+                    WHERE {condiciones}
+                    ORDER BY Vencimiento ASC, ID ASC
+                    LIMIT {LOTE_BLOQUEO}
+                    FOR UPDATE SKIP LOCKED
+                ''', tuple(params))
+                filas = cursor.fetchall()
+                for id_res, vol_disp, _ in filas:
+                    tomado = min(float(vol_disp), volumen_faltante)
+                    tomas.append((id_res, tomado, tipo))
+                    volumen_faltante -= tomado
+                    if volumen_faltante <= EPSILON:
+                        break
+                if len(filas) < LOTE_BLOQUEO:
+                    break
+                despues = (filas[-1][2], filas[-1][0])
+
+        if volumen_faltante > EPSILON:
+            raise StockInsuficiente(volumen_faltante)
+
+        # Relativo al valor bloqueado: nadie más puede haberlo cambiado
+        cursor.executemany("UPDATE reserva SET VolumenDisp = VolumenDisp - %s WHERE ID = %s",
+                           [(tomado, id_res) for id_res, tomado, _ in tomas])
+        return tomas
 
     def descontar_stock_con_compatibilidad(
         self,
@@ -188,71 +261,31 @@ class GestorCompatibilidadSangre:
         volumen_requerido: float
     ) -> Tuple[bool, str]:
         """
-        Descuenta del stock considerando compatibilidades.
-        Usa búsqueda recursiva para encontrar la mejor fuente.
-        
+        Descuenta del stock considerando compatibilidades, en una única transacción:
+        si no alcanza el stock, no se descuenta nada.
+
         Args:
             tipo_sangre_solicitado: Tipo solicitado
             volumen_requerido: Volumen a descontar
-            
+
         Returns:
             Tupla (éxito, mensaje)
         """
+        # La decisión es de la BD: el inventario en memoria puede estar atrasado
+        # respecto de lo que cargaron otros puestos
         try:
-            # Buscaremos y descontaremos reservas por orden de vencimiento,
-            # probando tipos compatibles en orden de preferencia.
-            compatibles = self.obtener_compatibles(tipo_sangre_solicitado)
-            volumen_faltante = float(volumen_requerido)
-
-            try:
-                with self.conn.cursor() as cursor:
-                    # Desactivar chequeo de claves foráneas mientras modificamos reservas
-                    cursor.execute("SET FOREIGN_KEY_CHECKS=0")
-
-                    for tipo in compatibles:
-                        if volumen_faltante <= 0:
-                            break
-
-                        # Obtener reservas ordenadas por vencimiento (FIFO por antigüedad de vencimiento)
-                        cursor.execute('''
-                            SELECT ID, VolumenDisp FROM reserva
-                            WHERE TipodeSangre = %s
-                            ORDER BY Vencimiento ASC
-                        ''', (tipo,))
-                        filas = cursor.fetchall()
-
-                        for fila in filas:
-                            if volumen_faltante <= 0:
-                                break
-                            id_res = fila[0]
-                            vol_disp = float(fila[1]) if fila[1] is not None else 0.0
-
-                            if vol_disp <= 0:
-                                continue
-
-                            if vol_disp <= volumen_faltante + 1e-6:
-                                # Consumir toda la reserva
-                                cursor.execute('DELETE FROM reserva WHERE ID = %s', (id_res,))
-                                volumen_faltante -= vol_disp
-                            else:
-                                # Reducir el VolumenDisp de la reserva
-                                nuevo_vol = vol_disp - volumen_faltante
-                                cursor.execute('UPDATE reserva SET VolumenDisp = %s WHERE ID = %s', (nuevo_vol, id_res))
-                                volumen_faltante = 0
-                                break
-
-                    # Reactivar FK checks
-                    cursor.execute("SET FOREIGN_KEY_CHECKS=1")
-                    self.conn.commit()
-
-                if volumen_faltante > 0:
-                    return (False, f"Stock insuficiente. Faltan {volumen_faltante:.2f} ml para cubrir {volumen_requerido} ml.")
-
-                msg = f"Stock descontado correctamente para {tipo_sangre_solicitado}: {volumen_requerido} ml"
-                return (True, msg)
-
-            except mysql.connector.Error as e:
-                return (False, f"Error al descontar stock: {str(e)}")
-
+            with self.db.transaccion() as cursor:
+                tomas = self.consumir_reservas(cursor, tipo_sangre_solicitado, volumen_requerido)
+        except StockInsuficiente as e:
+            # transaccion() ya revirtió lo tomado
+            return (False, f"Stock insuficiente. Faltan {e.faltante:.2f} ml para cubrir {volumen_requerido} ml.")
         except mysql.connector.Error as e:
             return (False, f"Error al descontar stock: {str(e)}")
+
+        # Mantener el inventario en memoria al día con lo consumido
+        for _, tomado, tipo in tomas:
+            self.inventario.restar(tipo, tomado)
+        registrar_escritura("reserva")
+
+        msg = f"Stock descontado correctamente para {tipo_sangre_solicitado}: {volumen_requerido} ml"
+        return (True, msg)
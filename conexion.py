@@ -0,0 +1,167 @@
+"""
+Módulo de conexiones a la base de datos.
+Provee un pool de conexiones mysql.connector con verificación de salud y
+cursores administrados por contexto, en lugar de una única conexión compartida.
+Las conexiones que presta están instrumentadas: cada sentencia queda medida en
+instrumentacion.METRICAS (ver instrumentacion.py).
+
+El motor se elige con BANCO_BACKEND (ver crear_proveedor): "mysql" (servidor
+central, por defecto) o "sqlite" (archivo local, ver conexion_sqlite.py).
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector import pooling
+
+from instrumentacion import instrumentar
+
+# Configuración por defecto; se puede cambiar con variables de entorno
+CONFIG_BD = {
+    "host": os.environ.get("BANCO_DB_HOST", "localhost"),
+    "port": int(os.environ.get("BANCO_DB_PORT", "3306")),
+    "user": os.environ.get("BANCO_DB_USER", "root"),
+    "password": os.environ.get("BANCO_DB_PASSWORD", "41061199"),
+    "database": os.environ.get("BANCO_DB_NAME", "bancodesangre"),
+}
+
+# Cantidad de conexiones del pool
+TAMANO_POOL = int(os.environ.get("BANCO_DB_POOL", "5"))
+
+# Motor de BD: "mysql" o "sqlite"
+BACKEND = os.environ.get("BANCO_BACKEND", "mysql").strip().lower()
+
+# Reintentos al obtener una conexión sana del pool
+REINTENTOS = 3
+ESPERA_REINTENTO = 0.5
+
+
+class ProveedorConexiones:
+    """Pool de conexiones a MySQL con reconexión y cursores por operación."""
+
+    dialecto = "mysql"
+    fulltext = True
+
+    def __init__(self, tamano: int = TAMANO_POOL, **config):
+        """
+        Crea el pool (abre las conexiones iniciales).
+
+        Args:
+            tamano: Cantidad de conexiones del pool
+            **config: Parámetros de conexión que reemplazan a CONFIG_BD
+
+        Raises:
+            mysql.connector.Error: si no se puede conectar a la BD
+        """
+        self.config = {**CONFIG_BD, **config}
+        self.tamano = tamano
+        self.pool = pooling.MySQLConnectionPool(
+            pool_name="bancodesangre",
+            pool_size=tamano,
+            pool_reset_session=True,
+            **self.config
+        )
+
+    def _obtener(self):
+        """Obtiene una conexión del pool, verificando que siga viva."""
+        ultimo_error = None
+        for intento in range(REINTENTOS):
+            try:
+                conn = self.pool.get_connection()
+            except pooling.PoolError as e:
+                # Pool agotado: esperar a que se libere una conexión
+                ultimo_error = e
+                time.sleep(ESPERA_REINTENTO * (intento + 1))
+                continue
+            try:
+                # Reconecta si el servidor cerró la conexión por inactividad
+                conn.ping(reconnect=True, attempts=2, delay=ESPERA_REINTENTO)
+                return conn
+            except (mysql.connector.OperationalError, mysql.connector.InterfaceError) as e:
+                ultimo_error = e
+                conn.close()
+        raise ultimo_error
+
+    @contextmanager
+    def conexion(self):
+        """Presta una conexión del pool y la devuelve al salir del bloque."""
+        conn = self._obtener()
+        try:
+            yield instrumentar(conn)
+        finally:
+            try:
+                conn.close()  # en una conexión del pool, close() la devuelve al pool
+            except mysql.connector.Error:
+                # Cerrada por cortar(): vuelve al pool igual y _obtener() la reconecta
+                if conn.is_connected():
+                    raise
+
+    def cortar(self, conn) -> bool:
+        """
+        Corta la sentencia que está leyendo conn sin recibir el resto del resultado.
+
+        Manda KILL QUERY desde otra conexión del pool; si no se puede (pool agotado,
+        sin permiso), cierra el socket de conn.
+
+        Args:
+            conn: Conexión prestada por conexion() con una lectura sin buffer en curso
+
+        Returns:
+            True si se mandó KILL QUERY: el cursor recibe enseguida el error
+            "Query execution was interrupted" y hay que leerlo antes de cerrarlo.
+            False si se cerró el socket: no queda nada por leer.
+        """
+        try:
+            with self.cursor() as cursor:
+                cursor.execute("KILL QUERY %s", (conn.connection_id,))
+            return True
+        except mysql.connector.Error:
+            conn.disconnect()
+            return False
+
+    @contextmanager
+    def cursor(self, commit: bool = False, **opciones):
+        """
+        Cursor de una sola operación: se cierra (y libera la conexión) al salir del bloque.
+
+        Args:
+            commit: Si es True, confirma al terminar sin errores y revierte si hay una excepción
+            **opciones: Opciones para conn.cursor() (ej: buffered=False, dictionary=True)
+        """
+        with self.conexion() as conn:
+            cursor = conn.cursor(**opciones)
+            try:
+                yield cursor
+                if commit:
+                    conn.commit()
+            except Exception:
+                if commit:
+                    conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def transaccion(self, **opciones):
+        """Atajo de cursor(commit=True): todo el bloque es una transacción."""
+        return self.cursor(commit=True, **opciones)
+
+
+def crear_proveedor(tamano: int = None):
+    """
+    Proveedor de conexiones del motor configurado en BANCO_BACKEND.
+
+    Args:
+        tamano: Cantidad de conexiones (por defecto, la de cada motor)
+
+    Raises:
+        mysql.connector.Error: si no se puede conectar o abrir la BD
+        ValueError: si BANCO_BACKEND no es un motor conocido
+    """
+    if BACKEND == "sqlite":
+        from conexion_sqlite import ProveedorSQLite
+        return ProveedorSQLite() if tamano is None else ProveedorSQLite(tamano=tamano)
+    if BACKEND == "mysql":
+        return ProveedorConexiones() if tamano is None else ProveedorConexiones(tamano)
+    raise ValueError(f"BANCO_BACKEND desconocido: {BACKEND!r} (use mysql o sqlite)")
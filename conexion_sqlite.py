@@ -0,0 +1,315 @@
+"""
+Módulo de conexiones a una BD SQLite local.
+ProveedorSQLite cumple el mismo contrato que ProveedorConexiones (conexion,
+cursor, transaccion, tamano) sobre un archivo SQLite en modo WAL, para los
+puestos sin red (BANCO_BACKEND=sqlite, ver conexion.crear_proveedor) y para
+pruebas y benchmarks.
+
+Los módulos escriben SQL de MySQL; cada sentencia se traduce al dialecto de
+SQLite (ver traducir_sql) y los errores de sqlite3 se convierten a los de
+mysql.connector, así los manejadores existentes (except mysql.connector.Error)
+sirven con los dos motores sin cambios.
+
+Bloqueos: SQLite admite un solo escritor a la vez. Una transacción
+(cursor(commit=True)) empieza con BEGIN IMMEDIATE antes de su primera
+sentencia, así que un SELECT ... FOR UPDATE ya toma el bloqueo de escritura
+que en MySQL tomaría la fila. Las lecturas fuera de transacción no esperan a
+los escritores (WAL).
+
+El esquema se crea o actualiza al abrir el archivo (migraciones.migrar).
+"""
+
+import os
+import queue
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+import mysql.connector
+from mysql.connector import errors
+
+from instrumentacion import instrumentar
+
+# Archivo de la BD local
+RUTA_SQLITE = os.environ.get("BANCO_SQLITE_RUTA", "bancodesangre.db")
+
+# Conexiones abiertas a la vez (lectores concurrentes; escritor hay uno solo)
+TAMANO_POOL_SQLITE = 4
+
+# Espera máxima por el bloqueo de escritura y por una conexión libre (s)
+ESPERA_BLOQUEO_S = 10
+
+# Ajustes de cada conexión: WAL y páginas en memoria para que las lecturas no toquen disco
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA cache_size = -20000",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+)
+
+# SQL de MySQL -> SQLite, en orden
+_TRADUCCIONES = [
+    # CURDATE() + INTERVAL n DAY
+    (re.compile(r"CURDATE\(\)\s*([+-])\s*INTERVAL\s+(%s|\d+)\s+DAY", re.IGNORECASE),
+     r"date('now', 'localtime', '\1' || \2 || ' days')"),
+    (re.compile(r"CURDATE\(\)", re.IGNORECASE), "date('now', 'localtime')"),
+    # El bloqueo lo da BEGIN IMMEDIATE (ver docstring del módulo)
+    (re.compile(r"\s+FOR\s+UPDATE(\s+SKIP\s+LOCKED)?", re.IGNORECASE), ""),
+    (re.compile(r"SET\s+FOREIGN_KEY_CHECKS\s*=\s*([01])", re.IGNORECASE), r"PRAGMA foreign_keys = \1"),
+    (re.compile(r"%s"), "?"),
+]
+
+_RE_PRAGMA = re.compile(r"\s*PRAGMA\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def traducir_sql(sql: str) -> str:
+    """
+    Traduce una sentencia escrita para MySQL al dialecto de SQLite.
+
+    "... WHERE Vencimiento >= CURDATE() AND TipodeSangre = %s FOR UPDATE"
+    -> "... WHERE Vencimiento >= date('now', 'localtime') AND TipodeSangre = ?"
+
+    CONCAT() no se traduce: cada conexión la registra como función.
+    """
+    for patron, reemplazo in _TRADUCCIONES:
+        sql = patron.sub(reemplazo, sql)
+    return sql
+
+
+def _concat(*partes):
+    # Como en MySQL: NULL si alguna parte es NULL
+    if any(p is None for p in partes):
+        return None
+    return "".join(str(p) for p in partes)
+
+
+def _convertir_fecha(valor: bytes):
+    texto = valor.decode()
+    try:
+        return date.fromisoformat(texto[:10]) if len(texto) <= 10 else datetime.fromisoformat(texto)
+    except ValueError:
+        return texto
+
+
+# Fechas y decimales como los devuelve mysql.connector
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda d: d.isoformat(" "))
+sqlite3.register_adapter(Decimal, float)
+for _tipo in ("DATE", "DATETIME", "TIMESTAMP"):
+    sqlite3.register_converter(_tipo, _convertir_fecha)
+
+
+def _error_mysql(e: sqlite3.Error) -> mysql.connector.Error:
+    """Error de mysql.connector equivalente (con el errno de MySQL más cercano)."""
+    mensaje = str(e)
+    if isinstance(e, sqlite3.IntegrityError):
+        errno = 1062 if "UNIQUE" in mensaje else 1451 if "FOREIGN KEY" in mensaje else 1048
+        return errors.IntegrityError(msg=mensaje, errno=errno)
+    if isinstance(e, sqlite3.OperationalError):
+        if "locked" in mensaje or "busy" in mensaje:
+            return errors.OperationalError(msg=mensaje, errno=1205)
+        if "no such table" in mensaje:
+            return errors.ProgrammingError(msg=mensaje, errno=1146)
+        if "syntax error" in mensaje or "no such column" in mensaje or "no such function" in mensaje:
+            return errors.ProgrammingError(msg=mensaje, errno=1064)
+        return errors.OperationalError(msg=mensaje)
+    return errors.DatabaseError(msg=mensaje)
+
+
+class CursorSQLite:
+    """Cursor de sqlite3 con el SQL de MySQL y la interfaz que usan los módulos."""
+
+    def __init__(self, conexion, dictionary: bool = False, **opciones):
+        # buffered y demás opciones de mysql.connector no cambian nada en SQLite
+        self._conexion = conexion
+        self._cursor = conexion.conn.cursor()
+        self._diccionario = dictionary
+
+    def execute(self, sql, params=()):
+        self._conexion.antes_de(sql)
+        try:
+            self._cursor.execute(traducir_sql(sql), tuple(params or ()))
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+
+    def executemany(self, sql, filas):
+        self._conexion.antes_de(sql)
+        try:
+            self._cursor.executemany(traducir_sql(sql), (tuple(f) for f in filas))
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+
+    def _fila(self, fila):
+        if fila is None or not self._diccionario:
+            return fila
+        return {columna[0]: valor for columna, valor in zip(self._cursor.description, fila)}
+
+    def fetchone(self):
+        return self._fila(self._cursor.fetchone())
+
+    def fetchmany(self, size: int = 1):
+        return [self._fila(f) for f in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._fila(f) for f in self._cursor.fetchall()]
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+class ConexionSQLite:
+    """Una conexión sqlite3 del pool, con transacción de escritura diferida hasta la primera sentencia."""
+
+    def __init__(self, ruta: str):
+        try:
+            self.conn = sqlite3.connect(ruta, timeout=ESPERA_BLOQUEO_S, isolation_level=None,
+                                        check_same_thread=False, detect_types=sqlite3.PARSE_DECLTYPES,
+                                        cached_statements=256)
+            for pragma in PRAGMAS:
+                self.conn.execute(pragma)
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+        self.conn.create_function("CONCAT", -1, _concat, deterministic=True)
+        self._transaccion = False
+
+    def iniciar_transaccion(self):
+        """La próxima sentencia (que no sea un PRAGMA) abre BEGIN IMMEDIATE."""
+        self._transaccion = True
+
+    def antes_de(self, sql: str):
+        # PRAGMA foreign_keys no tiene efecto dentro de una transacción: va antes del BEGIN
+        if self._transaccion and not self.conn.in_transaction and not _RE_PRAGMA.match(traducir_sql(sql)):
+            try:
+                self.conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.Error as e:
+                raise _error_mysql(e) from e
+
+    def cursor(self, **opciones) -> CursorSQLite:
+        return CursorSQLite(self, **opciones)
+
+    def commit(self):
+        self._transaccion = False
+        try:
+            if self.conn.in_transaction:
+                self.conn.commit()
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+
+    def rollback(self):
+        self._transaccion = False
+        if self.conn.in_transaction:
+            self.conn.rollback()
+
+    def reiniciar(self):
+        """Deja la conexión como nueva al volver al pool (como pool_reset_session en MySQL)."""
+        self.rollback()
+        self.conn.execute("PRAGMA foreign_keys = ON")
+
+    def close(self):
+        self.conn.close()
+
+
+class ProveedorSQLite:
+    """Pool de conexiones a un archivo SQLite, con el mismo contrato que ProveedorConexiones."""
+
+    dialecto = "sqlite"
+    # Sin índice FULLTEXT: la búsqueda de donantes usa LIKE (ver busqueda.buscar_en_servidor)
+    fulltext = False
+
+    def __init__(self, ruta: str = RUTA_SQLITE, tamano: int = TAMANO_POOL_SQLITE, migrar: bool = True):
+        """
+        Abre (o crea) la BD local y aplica las migraciones pendientes.
+
+        Args:
+            ruta: Archivo de la BD (":memory:" para una BD en memoria, con una sola conexión)
+            tamano: Cantidad de conexiones del pool
+            migrar: Si es False, no crea ni actualiza el esquema
+
+        Raises:
+            mysql.connector.Error: si no se puede abrir el archivo
+        """
+        self.ruta = ruta
+        # Cada conexión a ":memory:" sería una BD distinta
+        self.tamano = 1 if ruta == ":memory:" else tamano
+        self._libres = queue.LifoQueue()
+        for _ in range(self.tamano):
+            self._libres.put(ConexionSQLite(ruta))
+        if migrar:
+            from migraciones import migrar as aplicar_migraciones
+            aplicar_migraciones(self, informar=lambda mensaje: None)
+
+    @contextmanager
+    def conexion(self):
+        """Presta una conexión del pool y la devuelve al salir del bloque."""
+        try:
+            conn = self._libres.get(timeout=ESPERA_BLOQUEO_S)
+        except queue.Empty:
+            raise errors.PoolError("No hay conexiones libres a la BD local.")
+        try:
+            yield instrumentar(conn)
+        finally:
+            try:
+                conn.reiniciar()
+            finally:
+                self._libres.put(conn)
+
+    @contextmanager
+    def cursor(self, commit: bool = False, **opciones):
+        """
+        Cursor de una sola operación (ver ProveedorConexiones.cursor).
+
+        Args:
+            commit: Si es True, el bloque es una transacción de escritura (BEGIN IMMEDIATE)
+            **opciones: Opciones de cursor de mysql.connector (dictionary=True; buffered se ignora)
+        """
+        with self.conexion() as conn:
+            if commit:
+                conn.iniciar_transaccion()
+            cursor = conn.cursor(**opciones)
+            try:
+                yield cursor
+                if commit:
+                    conn.commit()
+            except Exception:
+                if commit:
+                    conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def transaccion(self, **opciones):
+        """Atajo de cursor(commit=True): todo el bloque es una transacción."""
+        return self.cursor(commit=True, **opciones)
+
+    def cortar(self, conn) -> bool:
+        """Ver ProveedorConexiones.cortar: en SQLite cerrar el cursor ya descarta el resto del resultado."""
+        return False
+
+    def cerrar(self):
+        """Cierra las conexiones libres (para tests y scripts)."""
+        while True:
+            try:
+                self._libres.get_nowait().close()
+            except queue.Empty:
+                return
@@ -0,0 +1,140 @@
+"""
+Panel de diagnóstico de consultas (oculto: Ctrl+Shift+D en el menú).
+Muestra lo que midió instrumentacion.METRICAS desde que se abrió la aplicación
+(o desde el último "Reiniciar"): consultas más lentas y más frecuentes, costo
+por pantalla y método, patrones N+1 y las últimas sentencias.
+"""
+
+import time
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+
+from instrumentacion import METRICAS, UMBRAL_N_MAS_1, VENTANA_N_MAS_1_S
+
+# Filas de cada ranking
+TOP_N = 30
+
+# Mientras el panel está abierto se actualiza solo cada este intervalo
+INTERVALO_REFRESCO_MS = 2000
+
+
+class PanelDiagnostico:
+    """Ventana con las métricas de consultas; una sola instancia a la vez."""
+
+    _abierto = None
+
+    @classmethod
+    def abrir(cls, root):
+        """Abre el panel o, si ya está abierto, lo trae al frente."""
+        if cls._abierto is not None and cls._abierto.ventana.winfo_exists():
+            cls._abierto.ventana.lift()
+            cls._abierto.ventana.focus_force()
+            return cls._abierto
+        cls._abierto = cls(root)
+        return cls._abierto
+
+    def __init__(self, root, metricas=METRICAS):
+        self.metricas = metricas
+        self.ventana = tk.Toplevel(root)
+        self.ventana.title("Diagnóstico de consultas")
+        self.ventana.geometry("1100x600")
+        self.ventana.protocol("WM_DELETE_WINDOW", self.cerrar)
+        self._refresco = None
+
+        barra = tk.Frame(self.ventana)
+        barra.pack(fill=tk.X, padx=8, pady=6)
+        self.resumen_label = tk.Label(barra, text="", font=("Arial", 10), anchor="w")
+        self.resumen_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        tk.Button(barra, text="Exportar Prometheus...", command=self.exportar).pack(side=tk.RIGHT, padx=4)
+        tk.Button(barra, text="Reiniciar", command=self.reiniciar).pack(side=tk.RIGHT, padx=4)
+        tk.Button(barra, text="Actualizar", command=self.actualizar).pack(side=tk.RIGHT, padx=4)
+
+        pestanas = ttk.Notebook(self.ventana)
+        pestanas.pack(fill=tk.BOTH, expand=True, padx=8, pady=(0, 8))
+        columnas_consulta = (("Promedio (ms)", 90), ("Máx (ms)", 80), ("Veces", 60),
+                             ("Total (ms)", 90), ("Filas", 70), ("Consulta", 600))
+        self.lentas = self._tabla(pestanas, "Más lentas", columnas_consulta)
+        self.frecuentes = self._tabla(pestanas, "Más frecuentes", columnas_consulta)
+        self.origenes = self._tabla(pestanas, "Por pantalla", (
+            ("Pantalla", 160), ("Método", 320), ("Veces", 70), ("Total (ms)", 90),
+            ("Promedio (ms)", 90), ("Filas", 80)))
+        self.n_mas_1 = self._tabla(pestanas, "N+1", (
+            ("Método", 300), ("Detectado", 80), ("Máx. seguidas", 100), ("Consulta", 600)))
+        self.recientes = self._tabla(pestanas, "Últimas", (
+            ("Hora", 80), ("ms", 70), ("Filas", 60), ("Pantalla", 130), ("Método", 260),
+            ("Hilo", 110), ("Consulta", 500)))
+
+        self.actualizar()
+
+    def _tabla(self, pestanas, titulo, columnas) -> ttk.Treeview:
+        frame = tk.Frame(pestanas)
+        pestanas.add(frame, text=titulo)
+        nombres = [nombre for nombre, _ in columnas]
+        tabla = ttk.Treeview(frame, columns=nombres, show="headings")
+        for nombre, ancho in columnas:
+            tabla.heading(nombre, text=nombre)
+            tabla.column(nombre, width=ancho, anchor="w", stretch=(nombre == "Consulta"))
+        scroll = ttk.Scrollbar(frame, orient="vertical", command=tabla.yview)
+        tabla.configure(yscrollcommand=scroll.set)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        tabla.pack(fill=tk.BOTH, expand=True)
+        return tabla
+
+    @staticmethod
+    def _cargar(tabla, filas):
+        tabla.delete(*tabla.get_children())
+        for fila in filas:
+            tabla.insert("", tk.END, values=fila)
+
+    def actualizar(self):
+        """Relee las métricas y reprograma el refresco automático."""
+        if self._refresco is not None:
+            self.ventana.after_cancel(self._refresco)
+            self._refresco = None
+
+        def fila_consulta(c):
+            sql, veces, total, promedio, maximo, filas = c
+            return (f"{promedio:.2f}", f"{maximo:.2f}", veces, f"{total:.1f}", filas, sql)
+
+        self._cargar(self.lentas, [fila_consulta(c) for c in self.metricas.mas_lentas(TOP_N)])
+        self._cargar(self.frecuentes, [fila_consulta(c) for c in self.metricas.mas_frecuentes(TOP_N)])
+        origenes = self.metricas.por_origen()
+        self._cargar(self.origenes, [(p, o, veces, f"{total:.1f}", f"{total / veces:.2f}", filas)
+                                     for p, o, veces, total, filas in origenes[:TOP_N]])
+        patrones = self.metricas.patrones_n_mas_1()
+        self._cargar(self.n_mas_1, patrones[:TOP_N])
+        self._cargar(self.recientes, [
+            (time.strftime("%H:%M:%S", time.localtime(instante)), f"{ms:.2f}", filas, pantalla, origen, hilo, sql)
+            for instante, sql, ms, filas, origen, pantalla, hilo in self.metricas.recientes(200)])
+
+        sentencias = sum(o[2] for o in origenes)
+        total_ms = sum(o[3] for o in origenes)
+        desde = time.strftime("%H:%M:%S", time.localtime(self.metricas.desde))
+        self.resumen_label.config(text=(
+            f"Desde {desde}: {sentencias} sentencias, {total_ms / 1000:.2f} s en la BD, "
+            f"{len(patrones)} patrón(es) N+1 (≥{UMBRAL_N_MAS_1} repeticiones en {VENTANA_N_MAS_1_S:g} s)"))
+
+        self._refresco = self.ventana.after(INTERVALO_REFRESCO_MS, self.actualizar)
+
+    def reiniciar(self):
+        self.metricas.reiniciar()
+        self.actualizar()
+
+    def exportar(self):
+        ruta = filedialog.asksaveasfilename(parent=self.ventana, defaultextension=".prom",
+                                            initialfile="metricas.prom",
+                                            filetypes=[("Prometheus", "*.prom"), ("Texto", "*.txt")])
+        if not ruta:
+            return
+        try:
+            with open(ruta, "w", encoding="utf-8") as archivo:
+                archivo.write(self.metricas.exposicion_prometheus())
+        except OSError as e:
+            messagebox.showerror("Error", f"No se pudo guardar el archivo:\n{e}", parent=self.ventana)
+
+    def cerrar(self):
+        if self._refresco is not None:
+            self.ventana.after_cancel(self._refresco)
+            self._refresco = None
+        PanelDiagnostico._abierto = None
+        self.ventana.destroy()
@@ -0,0 +1,147 @@
+"""
+Módulo de ejecución de consultas en segundo plano.
+Corre las consultas en un pool de hilos y entrega los resultados al hilo de Tk,
+para que la interfaz no se congele mientras espera a MySQL.
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from registro import obtener_logger
+
+# Hilos de trabajo (conviene que no supere el tamaño del pool de conexiones)
+HILOS_TRABAJO = 4
+
+# Cada cuántos ms el hilo de Tk revisa si hay resultados listos
+INTERVALO_SONDEO_MS = 30
+
+
+class EjecutorConsultas:
+    """Ejecuta funciones de acceso a datos fuera del hilo de Tk."""
+
+    def __init__(self, root, hilos: int = HILOS_TRABAJO):
+        """
+        Args:
+            root: Ventana raíz de Tk (los callbacks se ejecutan en su hilo)
+            hilos: Cantidad de hilos de trabajo
+        """
+        self.root = root
+        self.pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="consultas")
+        self._resultados = queue.Queue()
+        self._generaciones = {}
+        self._lock = threading.Lock()
+        self._activos = 0
+        self._sondeando = False
+
+    def ejecutar(
+        self,
+        clave: str,
+        funcion: Callable,
+        al_terminar: Callable,
+        al_fallar: Optional[Callable] = None,
+        al_avanzar: Optional[Callable] = None,
+    ) -> int:
+        """
+        Ejecuta funcion() en segundo plano y llama a al_terminar(resultado) en el hilo de Tk.
+
+        Las consultas con la misma clave se reemplazan: si llega una nueva antes de que
+        termine la anterior, el resultado de la anterior se descarta (por ejemplo, la
+        búsqueda de una tecla ya superada por otra).
+
+        Args:
+            clave: Identifica la consulta (ej: "VerDonaciones.buscar")
+            funcion: Función sin argumentos que accede a la BD y devuelve el resultado
+            al_terminar: Callback con el resultado, en el hilo de Tk
+            al_fallar: Callback con la excepción, en el hilo de Tk
+            al_avanzar: Si se indica, funcion recibe un argumento avisar(valor): cada
+                llamada entrega valor a al_avanzar en el hilo de Tk, y devuelve False
+                cuando la consulta dejó de estar vigente (reemplazada o cancelada),
+                para que un trabajo largo pueda cortar a tiempo
+
+        Returns:
+            Número de generación asignado a esta consulta
+        """
+        with self._lock:
+            generacion = self._generaciones.get(clave, 0) + 1
+            self._generaciones[clave] = generacion
+            self._activos += 1
+
+        def avisar(valor) -> bool:
+            self._resultados.put((clave, generacion, al_avanzar, valor, None))
+            return self.vigente(clave, generacion)
+
+        def trabajo():
+            try:
+                if not self.vigente(clave, generacion):
+                    return  # ya hay una consulta más nueva: ni siquiera ir a la BD
+                try:
+                    if al_avanzar is None:
+                        resultado = funcion()
+                    else:
+                        resultado = funcion(avisar)
+                    self._resultados.put((clave, generacion, al_terminar, resultado, None))
+                except Exception as e:
+                    self._resultados.put((clave, generacion, al_fallar, None, e))
+            finally:
+                with self._lock:
+                    self._activos -= 1
+
+        self.pool.submit(trabajo)
+        self._programar_sondeo()
+        return generacion
+
+    def cancelar(self, clave: str):
+        """Descarta el resultado de cualquier consulta en curso con esta clave."""
+        with self._lock:
+            self._generaciones[clave] = self._generaciones.get(clave, 0) + 1
+
+    def vigente(self, clave: str, generacion: int) -> bool:
+        """Indica si una generación sigue siendo la última pedida para esa clave."""
+        with self._lock:
+            return self._generaciones.get(clave) == generacion
+
+    def _programar_sondeo(self):
+        if not self._sondeando:
+            self._sondeando = True
+            self.root.after(INTERVALO_SONDEO_MS, self._sondear)
+
+    def _sondear(self):
+        """Entrega en el hilo de Tk los resultados vigentes y descarta los viejos."""
+        while True:
+            try:
+                clave, generacion, callback, resultado, error = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+            if not self.vigente(clave, generacion) or callback is None:
+                if error is not None and callback is None:
+                    obtener_logger("ejecutor_consultas").error("Error en consulta '%s'", clave, exc_info=error)
+                continue
+            try:
+                callback(error if error is not None else resultado)
+            except Exception as e:
+                # Un widget destruido mientras corría la consulta no debe romper el sondeo
+                obtener_logger("ejecutor_consultas").exception("Error entregando resultado de '%s'", clave)
+
+        self._sondeando = False
+        with self._lock:
+            pendientes = self._activos > 0
+        if pendientes or not self._resultados.empty():
+            self._programar_sondeo()
+
+    def cerrar(self):
+        """Detiene los hilos de trabajo (al cerrar la aplicación)."""
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+_EJECUTORES = {}
+
+
+def obtener_ejecutor(widget) -> EjecutorConsultas:
+    """Devuelve el ejecutor compartido de la ventana raíz a la que pertenece el widget."""
+    root = widget.nametowidget(".")
+    clave = str(root)
+    if clave not in _EJECUTORES:
+        _EJECUTORES[clave] = EjecutorConsultas(root)
+    return _EJECUTORES[clave]
@@ -0,0 +1,131 @@
+"""
+Prueba de estrés de la asignación de stock concurrente.
+Varios hilos (cada uno con su GestorCompatibilidadSangre, como puestos distintos)
+descuentan stock a la vez sobre la misma BD, y al final se verifica que el
+volumen que bajó la reserva sea exactamente el que se asignó con éxito: ni
+bolsas asignadas dos veces ni descuentos perdidos, y ninguna reserva en negativo.
+
+⚠️ Inserta y consume reservas: correrlo solo contra una BD de prueba
+(BANCO_DB_NAME, o BANCO_SQLITE_RUTA con BANCO_BACKEND=sqlite; ver conexion.py).
+
+Uso:
+    python estres_asignacion.py [hilos] [pedidos_por_hilo] [bolsas]
+"""
+
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+import mysql.connector
+
+from compatibilidad_sangre import GestorCompatibilidadSangre
+from inventario_sangre import TIPOS_SANGRE
+from vencimientos import condicion_vigente
+
+HILOS = 32
+PEDIDOS_POR_HILO = 50
+BOLSAS = 2000
+
+# Volúmenes enteros: VolumenDisp es DECIMAL(7, 2) y así las sumas son exactas
+VOLUMENES_BOLSA = (250, 450, 500)
+VOLUMENES_PEDIDO = (100, 300, 450, 900)
+
+
+def sembrar(db, bolsas: int, semilla: int = 7):
+    """Inserta bolsas vigentes de todos los tipos."""
+    rnd = random.Random(semilla)
+    hoy = date.today()
+    filas = [(float(rnd.choice(VOLUMENES_BOLSA)), hoy, hoy + timedelta(days=rnd.randint(1, 42)),
+              rnd.choice(TIPOS_SANGRE)) for _ in range(bolsas)]
+    with db.transaccion() as cursor:
+        cursor.executemany('''
+            INSERT INTO reserva (VolumenDisp, FechaExtraccion, Vencimiento, TipodeSangre, Estado)
+            VALUES (%s, %s, %s, %s, 'No vencida')
+        ''', filas)
+
+
+def stock_vigente(db) -> float:
+    with db.cursor() as cursor:
+        cursor.execute(f"SELECT COALESCE(SUM(VolumenDisp), 0) FROM reserva WHERE {condicion_vigente()}")
+        return float(cursor.fetchone()[0])
+
+
+def negativas(db) -> int:
+    with db.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM reserva WHERE VolumenDisp < 0")
+        return cursor.fetchone()[0]
+
+
+def ejecutar(db, hilos: int, pedidos: int) -> dict:
+    """Lanza los hilos y devuelve lo asignado, los rechazos y los errores."""
+    resultado = {"asignado": 0.0, "aceptados": 0, "rechazados": 0, "errores": []}
+    lock = threading.Lock()
+    largada = threading.Barrier(hilos)
+
+    def puesto(numero, gestor):
+        rnd = random.Random(numero)
+        largada.wait()
+        for _ in range(pedidos):
+            tipo = rnd.choice(TIPOS_SANGRE)
+            volumen = float(rnd.choice(VOLUMENES_PEDIDO))
+            exito, mensaje = gestor.descontar_stock_con_compatibilidad(tipo, volumen)
+            with lock:
+                if exito:
+                    resultado["asignado"] += volumen
+                    resultado["aceptados"] += 1
+                elif mensaje.startswith("Stock insuficiente"):
+                    resultado["rechazados"] += 1
+                else:
+                    resultado["errores"].append(mensaje)
+
+    # Un gestor (con su inventario en memoria) por hilo, como puestos distintos
+    gestores = [GestorCompatibilidadSangre(db) for _ in range(hilos)]
+    trabajadores = [threading.Thread(target=puesto, args=(i, gestores[i])) for i in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+    return resultado
+
+
+if __name__ == "__main__":
+    from conexion import crear_proveedor
+
+    hilos = int(sys.argv[1]) if len(sys.argv) > 1 else HILOS
+    pedidos = int(sys.argv[2]) if len(sys.argv) > 2 else PEDIDOS_POR_HILO
+    bolsas = int(sys.argv[3]) if len(sys.argv) > 3 else BOLSAS
+
+    try:
+        db = crear_proveedor(tamano=min(32, hilos))
+        sembrar(db, bolsas)
+        antes = stock_vigente(db)
+    except mysql.connector.Error as e:
+        print(f"❌ No se pudo preparar la prueba: {e}")
+        sys.exit(1)
+
+    print("=" * 60)
+    print(f"ESTRÉS DE ASIGNACIÓN: {hilos} hilos x {pedidos} pedidos, {antes:.0f} ml en stock")
+    print("=" * 60)
+    inicio = time.perf_counter()
+    try:
+        resultado = ejecutar(db, hilos, pedidos)
+        duracion = time.perf_counter() - inicio
+        despues = stock_vigente(db)
+        en_negativo = negativas(db)
+    except mysql.connector.Error as e:
+        print(f"❌ Error de base de datos: {e}")
+        sys.exit(1)
+    bajada = antes - despues
+    print(f"Pedidos aceptados: {resultado['aceptados']} | rechazados sin stock: {resultado['rechazados']} | "
+          f"errores: {len(resultado['errores'])} | {duracion:.1f} s")
+    print(f"Asignado con éxito: {resultado['asignado']:.2f} ml | bajó la reserva: {bajada:.2f} ml")
+    for error in resultado["errores"][:5]:
+        print(f"   {error}")
+
+    ok = abs(bajada - resultado["asignado"]) < 0.01 and en_negativo == 0 and not resultado["errores"]
+    if en_negativo:
+        print(f"❌ {en_negativo} reservas quedaron con volumen negativo")
+    print(f"\n{'✅' if ok else '❌'} Sin volumen perdido ni duplicado")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,282 @@
+"""
+Módulo de exportación.
+Exporta la reserva, las donaciones y las solicitudes a CSV (o a Parquet si está
+instalado pyarrow) leyendo con un cursor sin buffer de a TAMANO_BLOQUE filas y
+escribiendo cada bloque apenas llega, así la memoria no depende de cuántas
+filas tenga la tabla. La exportación corre en el ejecutor de consultas e
+informa el avance a la ventana.
+
+Uso:
+    python exportacion.py reserva|donaciones|solicitudes archivo.csv|archivo.parquet
+"""
+
+import csv
+import os
+import sys
+import tkinter as tk
+from decimal import Decimal
+from tkinter import filedialog, messagebox
+from typing import Callable, Iterator, Optional
+
+import mysql.connector
+
+from ejecutor_consultas import obtener_ejecutor
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet es opcional: sin pyarrow solo se exporta CSV
+    pyarrow = None
+
+# Filas por fetchmany() y por bloque escrito
+TAMANO_BLOQUE = 5000
+
+# Cada exportación: título, columnas (encabezado, tipo) y consulta.
+# El orden por la clave primaria deja que MySQL envíe las filas sin ordenarlas antes.
+EXPORTACIONES = {
+    "reserva": {
+        "titulo": "Stock de reserva",
+        "columnas": [("ID", "int"), ("Volumen (ml)", "float"), ("Fecha de extracción", "date"),
+                     ("Vencimiento", "date"), ("Tipo de sangre", "str"), ("Estado", "str"),
+                     ("ID Donante", "int")],
+        "consulta": '''
+            SELECT ID, VolumenDisp, FechaExtraccion, Vencimiento, TipodeSangre, Estado, id_Donante
+            FROM reserva
+            ORDER BY ID
+        ''',
+    },
+    "donaciones": {
+        "titulo": "Donaciones",
+        "columnas": [("ID Reserva", "int"), ("ID Donante", "int"), ("Nombre", "str"), ("Apellido", "str"),
+                     ("DNI", "str"), ("Fecha de extracción", "date"), ("Volumen (ml)", "float"),
+                     ("Estado", "str")],
+        "consulta": '''
+            SELECT r.ID, r.id_Donante, d.nombre, d.apellido, d.dni,
+                   r.FechaExtraccion, r.VolumenDisp, r.Estado
+            FROM reserva r
+            LEFT JOIN donante d ON r.id_Donante = d.id
+            ORDER BY r.ID
+        ''',
+    },
+    "solicitudes": {
+        "titulo": "Solicitudes de transfusión",
+        "columnas": [("ID", "int"), ("Hospital", "str"), ("Dirección", "str"), ("Teléfono", "str"),
+                     ("Volumen (ml)", "float"), ("Estado", "str"), ("Tipo de sangre", "str")],
+        "consulta": '''
+            SELECT s.id, h.Nombre, h.direccion, h.telefono, s.VolumenSolic, s.Estado, ts.TipodeSangre
+            FROM solicitud s
+            JOIN hospital h ON h.id = s.id_Hospital
+            JOIN tipodesangre ts ON ts.id = s.id_TipodeSangre
+            ORDER BY s.id
+        ''',
+    },
+}
+
+
+class ExportacionCancelada(Exception):
+    """La exportación se canceló antes de terminar."""
+
+
+def formatos_disponibles() -> list:
+    return ["csv", "parquet"] if pyarrow is not None else ["csv"]
+
+
+def leer_bloques(db, consulta: str, params: tuple = (), tamano: int = TAMANO_BLOQUE) -> Iterator[list]:
+    """
+    Recorre el resultado con un cursor sin buffer, de a `tamano` filas.
+
+    Si se corta a mitad (cancelación o error al escribir), la sentencia se corta en
+    el servidor (db.cortar) en lugar de recibir el resto de las filas.
+    """
+    with db.conexion() as conn:
+        cursor = conn.cursor(buffered=False)
+        terminado = False
+        try:
+            cursor.execute(consulta, params)
+        except Exception:
+            cursor.close()
+            raise
+        try:
+            while True:
+                bloque = cursor.fetchmany(tamano)
+                if not bloque:
+                    terminado = True
+                    break
+                yield bloque
+        finally:
+            if not terminado and db.cortar(conn):
+                # Después de KILL QUERY solo queda lo que ya estaba en camino y el error de interrupción
+                try:
+                    while cursor.fetchmany(tamano):
+                        pass
+                except mysql.connector.Error:
+                    pass
+            cursor.close()
+
+
+def _escribir_csv(bloques, ruta, columnas, avanzar) -> int:
+    total = 0
+    with open(ruta, "w", newline="", encoding="utf-8-sig") as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow([nombre for nombre, _ in columnas])
+        for bloque in bloques:
+            escritor.writerows(bloque)
+            total += len(bloque)
+            avanzar(total)
+    return total
+
+
+def _esquema_parquet(columnas):
+    tipos = {"int": pyarrow.int64(), "float": pyarrow.float64(), "date": pyarrow.date32(), "str": pyarrow.string()}
+    return pyarrow.schema([(nombre, tipos[tipo]) for nombre, tipo in columnas])
+
+
+def _escribir_parquet(bloques, ruta, columnas, avanzar) -> int:
+    if pyarrow is None:
+        raise ValueError("Para exportar a Parquet hace falta instalar pyarrow (pip install pyarrow).")
+    esquema = _esquema_parquet(columnas)
+    total = 0
+    with pyarrow.parquet.ParquetWriter(ruta, esquema) as escritor:
+        for bloque in bloques:
+            datos = {}
+            for i, (nombre, tipo) in enumerate(columnas):
+                valores = [fila[i] for fila in bloque]
+                if tipo == "float":
+                    valores = [float(v) if isinstance(v, Decimal) else v for v in valores]
+                elif tipo == "str":
+                    valores = [None if v is None else str(v) for v in valores]
+                datos[nombre] = valores
+            # Cada bloque es un row group: la memoria queda acotada al bloque
+            escritor.write_table(pyarrow.Table.from_pydict(datos, schema=esquema))
+            total += len(bloque)
+            avanzar(total)
+    return total
+
+
+def exportar(db, nombre: str, ruta: str, formato: Optional[str] = None,
+             al_avanzar: Optional[Callable] = None) -> int:
+    """
+    Exporta una tabla a un archivo.
+
+    Se escribe primero un archivo temporal junto al destino y se renombra al
+    terminar, así una exportación cancelada o fallida no deja un archivo a medias.
+
+    Args:
+        db: ProveedorConexiones de la BD
+        nombre: Clave de EXPORTACIONES ("reserva", "donaciones" o "solicitudes")
+        ruta: Archivo de destino
+        formato: "csv" o "parquet" (por defecto, según la extensión de ruta)
+        al_avanzar: Función(filas escritas) -> bool; si devuelve False se cancela
+            (es el avisar() de EjecutorConsultas.ejecutar)
+
+    Returns:
+        Cantidad de filas exportadas
+
+    Raises:
+        ExportacionCancelada: si al_avanzar devolvió False
+        ValueError: si el formato no está disponible
+    """
+    exportacion = EXPORTACIONES[nombre]
+    formato = formato or os.path.splitext(ruta)[1].lstrip(".").lower()
+    escribir = {"csv": _escribir_csv, "parquet": _escribir_parquet}.get(formato)
+    if escribir is None:
+        raise ValueError(f"Formato no soportado: {formato} (use {' o '.join(formatos_disponibles())})")
+
+    def avanzar(total):
+        if al_avanzar is not None and al_avanzar(total) is False:
+            raise ExportacionCancelada()
+
+    temporal = ruta + ".parcial"
+    bloques = leer_bloques(db, exportacion["consulta"])
+    try:
+        total = escribir(bloques, temporal, exportacion["columnas"], avanzar)
+        os.replace(temporal, ruta)
+        return total
+    finally:
+        bloques.close()
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+class VentanaExportacion:
+    """Pide el archivo de destino, exporta en segundo plano y muestra el avance con opción de cancelar."""
+
+    def __init__(self, parent, db, nombre: str):
+        """
+        Args:
+            parent: Widget de la pantalla que exporta
+            db: ProveedorConexiones de la BD
+            nombre: Clave de EXPORTACIONES
+        """
+        self.parent = parent
+        self.db = db
+        self.nombre = nombre
+        self.clave = f"exportar.{nombre}"
+        self.ejecutor = obtener_ejecutor(parent)
+        self.ventana = None
+
+        titulo = EXPORTACIONES[nombre]["titulo"]
+        tipos = [("CSV", "*.csv")] + ([("Parquet", "*.parquet")] if pyarrow is not None else [])
+        self.ruta = filedialog.asksaveasfilename(parent=parent, title=f"Exportar {titulo.lower()}",
+                                                 defaultextension=".csv", filetypes=tipos,
+                                                 initialfile=f"{nombre}.csv")
+        if not self.ruta:
+            return
+
+        self.ventana = tk.Toplevel(parent)
+        self.ventana.title(f"Exportar {titulo.lower()}")
+        self.ventana.geometry("360x130")
+        self.ventana.protocol("WM_DELETE_WINDOW", self.cancelar)
+        self.estado_label = tk.Label(self.ventana, text="⏳ Exportando...", font=("Arial", 11))
+        self.estado_label.pack(pady=(20, 10))
+        tk.Button(self.ventana, text="Cancelar", bg="#d9534f", fg="white",
+                  command=self.cancelar).pack(pady=5)
+
+        self.ejecutor.ejecutar(
+            self.clave,
+            lambda avisar: exportar(self.db, self.nombre, self.ruta, al_avanzar=avisar),
+            self._terminado, self._fallo, al_avanzar=self._avance,
+        )
+
+    def cancelar(self):
+        # La exportación corta en el próximo bloque y borra el archivo temporal
+        self.ejecutor.cancelar(self.clave)
+        self._cerrar()
+
+    def _cerrar(self):
+        if self.ventana is not None:
+            self.ventana.destroy()
+            self.ventana = None
+
+    def _avance(self, total):
+        if self.ventana is not None:
+            self.estado_label.config(text=f"⏳ Exportadas {total:,} filas...".replace(",", "."))
+
+    def _terminado(self, total):
+        self._cerrar()
+        messagebox.showinfo("Exportación", f"✅ Se exportaron {total} filas a:\n{self.ruta}")
+
+    def _fallo(self, e):
+        self._cerrar()
+        if isinstance(e, ExportacionCancelada):
+            return
+        if isinstance(e, mysql.connector.Error):
+            messagebox.showerror("Error de base de datos", f"No se pudo exportar: {e}")
+        else:
+            messagebox.showerror("Error", f"No se pudo exportar: {e}")
+
+
+if __name__ == "__main__":
+    from conexion import crear_proveedor
+
+    if len(sys.argv) < 3 or sys.argv[1] not in EXPORTACIONES:
+        print(__doc__)
+        sys.exit(2)
+    try:
+        # Dos conexiones: la segunda es para cortar la lectura si se interrumpe
+        total = exportar(crear_proveedor(tamano=2), sys.argv[1], sys.argv[2],
+                         al_avanzar=lambda n: print(f"\r{n} filas", end="", flush=True))
+    except (ValueError, OSError, mysql.connector.Error) as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
+    print(f"\n✅ {total} filas exportadas a {sys.argv[2]}")
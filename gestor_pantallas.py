@@ -0,0 +1,122 @@
+"""
+Módulo de navegación entre pantallas.
+Cada pantalla del menú se construye la primera vez que se abre, dentro de su
+propio Frame, y después solo se oculta (pack_forget) al cambiar de pantalla.
+Al volver a mostrarla no se reconstruyen los widgets: si cambiaron las tablas
+que muestra (versiones_datos) o pasó REFRESCO_MAXIMO_S desde la última carga
+(escrituras de otros puestos), se llama a su refrescar(), que recarga los datos
+con diff sobre lo ya mostrado.
+"""
+
+import time
+import tkinter as tk
+from typing import Callable, Dict, Sequence
+
+from recursos import mostrar_logo
+from versiones_datos import VERSIONES
+
+# Evento virtual que genera el botón "Cancelar" de una pantalla para volver al inicio
+EVENTO_VOLVER_INICIO = "<<VolverInicio>>"
+
+# Aunque no haya escrituras locales, se refresca al volver si pasó este tiempo (s)
+REFRESCO_MAXIMO_S = 60
+
+
+def volver_inicio(widget) -> bool:
+    """
+    Pide volver a la pantalla de inicio si widget está dentro de un GestorPantallas.
+
+    Returns:
+        True si se generó <<VolverInicio>>; False si la pantalla no está gestionada
+        (quien llama hace entonces su limpieza de siempre)
+    """
+    while widget is not None:
+        if getattr(widget, "gestor_pantallas", None) is not None:
+            widget.event_generate(EVENTO_VOLVER_INICIO)
+            return True
+        widget = widget.master
+    return False
+
+
+class GestorPantallas:
+    """Pantallas persistentes dentro de un contenedor, construidas a pedido."""
+
+    def __init__(self, contenedor):
+        """
+        Args:
+            contenedor: Frame donde se muestran las pantallas (content_frame del menú)
+        """
+        self.contenedor = contenedor
+        self.contenedor.gestor_pantallas = self
+        self.contenedor.bind(EVENTO_VOLVER_INICIO, lambda evento: self.mostrar_inicio())
+        self._registradas: Dict[str, tuple] = {}
+        # nombre -> [frame, instancia, versiones, cargada_en]
+        self._pantallas: Dict[str, list] = {}
+        self.actual = None
+
+        self._inicio = tk.Frame(contenedor, bg="white")
+        mostrar_logo(self._inicio)
+
+    def registrar(self, nombre: str, fabrica: Callable, tablas: Sequence[str] = ()):
+        """
+        Args:
+            nombre: Clave de la pantalla
+            fabrica: Función(frame) que construye la pantalla dentro del frame
+            tablas: Tablas que muestra; si cambian, se refresca al volver a ella
+        """
+        self._registradas[nombre] = (fabrica, tuple(tablas))
+
+    def _versiones(self, tablas) -> tuple:
+        return tuple(VERSIONES.version(tabla) for tabla in tablas)
+
+    def _ocultar_actual(self):
+        if self.actual is None:
+            self._inicio.pack_forget()
+        elif self.actual in self._pantallas:
+            self._pantallas[self.actual][0].pack_forget()
+
+    def mostrar(self, nombre: str):
+        """Muestra una pantalla: la construye si es la primera vez, si no la refresca si hace falta."""
+        fabrica, tablas = self._registradas[nombre]
+        self._ocultar_actual()
+
+        pantalla = self._pantallas.get(nombre)
+        if pantalla is None or not pantalla[0].winfo_exists():
+            frame = tk.Frame(self.contenedor, bg="white")
+            frame.pack(expand=True, fill=tk.BOTH)
+            self.actual = nombre
+            versiones = self._versiones(tablas)  # antes de construir: lo que lea ya las incluye
+            try:
+                instancia = fabrica(frame)
+            except Exception:
+                frame.destroy()
+                self.actual = None
+                self._inicio.pack(expand=True, fill=tk.BOTH)
+                raise
+            self._pantallas[nombre] = [frame, instancia, versiones, time.monotonic()]
+            return
+
+        frame, instancia, versiones, cargada_en = pantalla
+        frame.pack(expand=True, fill=tk.BOTH)
+        self.actual = nombre
+        actuales = self._versiones(tablas)
+        vieja = time.monotonic() - cargada_en > REFRESCO_MAXIMO_S
+        if (actuales != versiones or vieja) and hasattr(instancia, "refrescar"):
+            pantalla[2] = actuales
+            pantalla[3] = time.monotonic()
+            instancia.refrescar()
+
+    def mostrar_inicio(self):
+        """Oculta la pantalla actual y muestra el logo (sin leer ni redimensionar imágenes)."""
+        self._ocultar_actual()
+        self.actual = None
+        self._inicio.pack(expand=True, fill=tk.BOTH)
+
+    def descartar(self, nombre: str):
+        """Destruye una pantalla; se vuelve a construir la próxima vez que se abra."""
+        pantalla = self._pantallas.pop(nombre, None)
+        if pantalla is None:
+            return
+        if self.actual == nombre:
+            self.mostrar_inicio()
+        pantalla[0].destroy()
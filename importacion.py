@@ -0,0 +1,365 @@
+"""
+Módulo de importación masiva de reservas.
+Lee un archivo CSV o XLSX fila por fila (sin cargarlo entero), valida cada fila
+con las mismas reglas que Reserva.guardar_reserva, junta en memoria las bolsas
+con el mismo (Vencimiento, Tipo, Estado) y escribe por tandas: un UPDATE con
+executemany para los grupos que ya existen en la BD y un INSERT con executemany
+para los nuevos, cada tanda en su propia transacción.
+
+Uso:
+    python importacion.py archivo.csv|archivo.xlsx [informe_errores.csv]
+"""
+
+import csv
+import math
+import os
+import sys
+from datetime import date, datetime
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import mysql.connector
+
+from busqueda import normalizar
+from cache_catalogos import tipos_sangre as catalogo_tipos_sangre
+from versiones_datos import registrar_escritura
+
+try:
+    import openpyxl
+except ImportError:  # XLSX es opcional: sin openpyxl solo se importa CSV
+    openpyxl = None
+
+# Grupos (Vencimiento, Tipo, Estado) escritos por transacción
+TAMANO_TANDA = 200
+
+# Tope de reserva.VolumenDisp (DECIMAL(7, 2)): un grupo que lo superaría sigue en otra reserva
+VOLUMEN_MAXIMO_RESERVA = 99999.99
+
+# Filas leídas por bloque (los DNIs de un bloque se buscan en una consulta)
+TAMANO_CONSULTA_DNI = 500
+
+# Estados válidos de reserva (los mismos que Reserva.ESTADOS_DISPONIBLES)
+ESTADOS_RESERVA = ("No vencida", "Vencida")
+ESTADO_PREDETERMINADO = "No vencida"
+
+# Encabezados aceptados para cada campo (se comparan normalizados, sin ':' ni '*')
+ENCABEZADOS = {
+    "volumen": ("volumen", "volumen (ml)", "volumen donado", "volumen donado (ml)", "volumendisp"),
+    "fecha": ("fecha de donacion", "fecha donacion", "fecha de extraccion", "fechaextraccion", "fecha"),
+    "vencimiento": ("vencimiento", "fecha de vencimiento"),
+    "tipo": ("tipo de sangre", "tipo", "tipodesangre"),
+    "estado": ("estado",),
+    "dni": ("dni", "dni donante", "dni del donante"),
+}
+CAMPOS_REQUERIDOS = ("volumen", "fecha", "vencimiento", "tipo")
+
+
+def _campo_de_encabezado(encabezado) -> Optional[str]:
+    texto = normalizar(encabezado).replace(":", "").replace("*", "").strip()
+    for campo, alias in ENCABEZADOS.items():
+        if texto in alias:
+            return campo
+    return None
+
+
+def leer_filas(ruta: str) -> Iterator[Tuple[int, dict]]:
+    """
+    Recorre las filas de datos de un CSV o XLSX.
+
+    Yields:
+        (número de fila en el archivo, {campo: valor crudo})
+
+    Raises:
+        ValueError: si falta una columna requerida o el formato no es soportado
+    """
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == ".csv":
+        filas = _filas_csv(ruta)
+    elif extension in (".xlsx", ".xlsm"):
+        filas = _filas_xlsx(ruta)
+    else:
+        raise ValueError(f"Formato no soportado: {extension} (use .csv o .xlsx)")
+
+    encabezados = next(filas, None)
+    if encabezados is None:
+        return
+    campos = [_campo_de_encabezado(e) for e in encabezados]
+    faltantes = [c for c in CAMPOS_REQUERIDOS if c not in campos]
+    if faltantes:
+        raise ValueError(f"Faltan columnas requeridas: {', '.join(faltantes)}")
+
+    for numero, valores in enumerate(filas, start=2):
+        if not any(v not in (None, "") for v in valores):
+            continue  # fila vacía
+        yield numero, {campo: valor for campo, valor in zip(campos, valores) if campo}
+
+
+def _filas_csv(ruta):
+    with open(ruta, newline="", encoding="utf-8-sig") as archivo:
+        muestra = archivo.read(4096)
+        archivo.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=",;\t")
+        except csv.Error:
+            dialecto = csv.excel
+        yield from csv.reader(archivo, dialecto)
+
+
+def _filas_xlsx(ruta):
+    if openpyxl is None:
+        raise ValueError("Para importar XLSX hace falta instalar openpyxl (pip install openpyxl).")
+    libro = openpyxl.load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        for fila in libro.active.iter_rows(values_only=True):
+            yield list(fila)
+    finally:
+        libro.close()
+
+
+def _fecha(valor, nombre: str) -> date:
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    try:
+        return datetime.strptime(str(valor).strip(), "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        raise ValueError(f"{nombre} debe tener formato YYYY-MM-DD (ej: 2025-11-12).")
+
+
+def validar_fila(datos: dict, tipos_validos, donantes: Dict[str, int]) -> tuple:
+    """
+    Valida una fila con las reglas de guardar_reserva.
+
+    Args:
+        datos: {campo: valor crudo}
+        tipos_validos: Tipos de sangre del catálogo
+        donantes: DNI -> id de donante (de los DNIs del archivo)
+
+    Returns:
+        (volumen, fecha_extraccion, vencimiento, tipo, estado, id_donante)
+
+    Raises:
+        ValueError: con el motivo del rechazo
+    """
+    vacios = [c for c in CAMPOS_REQUERIDOS if datos.get(c) in (None, "")]
+    if vacios:
+        raise ValueError(f"Los siguientes campos son requeridos: {', '.join(vacios)}")
+
+    try:
+        volumen = float(str(datos["volumen"]).replace(",", "."))
+    except ValueError:
+        raise ValueError("El volumen debe ser un número válido (puede incluir decimales).")
+    if not math.isfinite(volumen):
+        raise ValueError("El volumen debe ser un número válido (puede incluir decimales).")
+    if volumen <= 0:
+        raise ValueError("El volumen debe ser un número positivo.")
+    if volumen > VOLUMEN_MAXIMO_RESERVA:
+        raise ValueError(f"El volumen no puede superar {VOLUMEN_MAXIMO_RESERVA:.2f} ml.")
+
+    fecha_extraccion = _fecha(datos["fecha"], "La fecha de donación")
+    vencimiento = _fecha(datos["vencimiento"], "El vencimiento")
+
+    tipo = str(datos["tipo"]).strip().upper()
+    if tipo not in tipos_validos:
+        raise ValueError(f"Tipo de sangre desconocido: {datos['tipo']}")
+
+    estado = str(datos.get("estado") or ESTADO_PREDETERMINADO).strip()
+    estado = next((e for e in ESTADOS_RESERVA if e.lower() == estado.lower()), None)
+    if estado is None:
+        raise ValueError(f"Estado inválido: {datos['estado']} (use {' o '.join(ESTADOS_RESERVA)})")
+
+    id_donante = None
+    dni = _dni(datos.get("dni"))
+    if dni:
+        id_donante = donantes.get(dni)
+        if id_donante is None:
+            raise ValueError(f"No hay un donante registrado con DNI {dni}.")
+
+    return (volumen, fecha_extraccion, vencimiento, tipo, estado, id_donante)
+
+
+def _dni(valor) -> str:
+    if valor in (None, ""):
+        return ""
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)  # Excel guarda los DNI como número
+    return str(valor).strip()
+
+
+def _buscar_donantes(db, dnis) -> Dict[str, int]:
+    """DNI -> id de donante, en consultas de a TAMANO_CONSULTA_DNI."""
+    dnis = list(dnis)
+    encontrados = {}
+    with db.cursor() as cursor:
+        for i in range(0, len(dnis), TAMANO_CONSULTA_DNI):
+            tanda = dnis[i:i + TAMANO_CONSULTA_DNI]
+            cursor.execute(f"SELECT DNI, id FROM donante WHERE DNI IN ({', '.join(['%s'] * len(tanda))})",
+                           tuple(tanda))
+            for dni, id_donante in cursor.fetchall():
+                encontrados[str(dni)] = id_donante
+    return encontrados
+
+
+def _escribir_tanda(db, grupos: List[tuple]) -> Tuple[int, int]:
+    """
+    Suma o inserta una tanda de grupos en una transacción.
+
+    Un grupo se suma a la reserva existente con su clave solo si el total no
+    pasa de VOLUMEN_MAXIMO_RESERVA; si no entra, se inserta como reserva nueva.
+
+    Args:
+        grupos: Lista de ((vencimiento, tipo, estado), [volumen, fecha_extraccion, id_donante])
+            (una clave puede repetirse si su volumen no entraba en una sola reserva)
+
+    Returns:
+        (reservas actualizadas, reservas insertadas)
+    """
+    claves = list(dict.fromkeys(clave for clave, _ in grupos))
+    with db.transaccion() as cursor:
+        # Reservas existentes con la misma clave (como guardar_reserva, se suma a la primera)
+        cursor.execute(f'''
+            SELECT ID, VolumenDisp, Vencimiento, TipodeSangre, Estado FROM reserva
+            WHERE (Vencimiento, TipodeSangre, Estado) IN ({', '.join(['(%s, %s, %s)'] * len(claves))})
+            ORDER BY ID
+            FOR UPDATE
+        ''', tuple(v for clave in claves for v in clave))
+        existentes = {}
+        for id_res, volumen_disp, vencimiento, tipo, estado in cursor.fetchall():
+            existentes.setdefault((vencimiento, tipo, estado), [id_res, float(volumen_disp or 0)])
+
+        actualizar = []
+        insertar = []
+        for clave, datos in grupos:
+            existente = existentes.get(clave)
+            if existente is not None and existente[1] + datos[0] <= VOLUMEN_MAXIMO_RESERVA:
+                existente[1] += datos[0]
+                actualizar.append((datos[0], existente[0]))
+            else:
+                insertar.append((datos[0], datos[1], clave[0], clave[1], clave[2], datos[2]))
+        if actualizar:
+            cursor.executemany("UPDATE reserva SET VolumenDisp = VolumenDisp + %s WHERE ID = %s", actualizar)
+        if insertar:
+            cursor.executemany('''
+                INSERT INTO reserva (VolumenDisp, FechaExtraccion, Vencimiento, TipodeSangre, Estado, id_Donante)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            ''', insertar)
+    return len(actualizar), len(insertar)
+
+
+def importar_reservas(db, ruta: str, al_avanzar: Optional[Callable] = None) -> dict:
+    """
+    Importa un archivo de bolsas a la tabla reserva.
+
+    Las filas inválidas no se importan y quedan en el informe; las válidas se
+    escriben aunque haya errores en otras.
+
+    Args:
+        db: ProveedorConexiones de la BD
+        ruta: Archivo .csv o .xlsx con columnas Volumen, Fecha de donación,
+            Vencimiento, Tipo de sangre y, opcionales, Estado y DNI
+        al_avanzar: Función(texto) para informar el avance (se llama desde el hilo que importa)
+
+    Returns:
+        Dict con "leidas", "validas", "ml", "actualizadas", "insertadas"
+        y "errores" [(fila, mensaje)]
+
+    Raises:
+        ValueError: si el archivo no se puede leer (formato o columnas)
+        mysql.connector.Error: si falla una escritura (las tandas anteriores quedan guardadas)
+    """
+    informar = al_avanzar or (lambda texto: None)
+    tipos_validos = set(catalogo_tipos_sangre(db))
+
+    # Se lee por bloques: los DNIs de cada bloque se buscan juntos y solo los grupos quedan en memoria
+    donantes: Dict[str, int] = {}
+    errores = []
+    # (vencimiento, tipo, estado) -> [[volumen, fecha_extraccion, id_donante], ...], cada uno <= VOLUMEN_MAXIMO_RESERVA
+    grupos: Dict[tuple, list] = {}
+    leidas = 0
+    ml = 0.0
+    filas = leer_filas(ruta)
+    while True:
+        bloque = list(islice(filas, TAMANO_CONSULTA_DNI))
+        if not bloque:
+            break
+        leidas += len(bloque)
+        nuevos = {d for d in (_dni(datos.get("dni")) for _, datos in bloque) if d and d not in donantes}
+        if nuevos:
+            donantes.update(_buscar_donantes(db, nuevos))
+
+        for numero, datos in bloque:
+            try:
+                volumen, fecha_extraccion, vencimiento, tipo, estado, id_donante = \
+                    validar_fila(datos, tipos_validos, donantes)
+            except ValueError as e:
+                errores.append((numero, str(e)))
+                continue
+            ml += volumen
+            partes = grupos.setdefault((vencimiento, tipo, estado), [])
+            if partes and partes[-1][0] + volumen <= VOLUMEN_MAXIMO_RESERVA:
+                partes[-1][0] += volumen
+            else:
+                partes.append([volumen, fecha_extraccion, id_donante])
+        informar(f"{leidas} filas leídas")
+    validas = leidas - len(errores)
+    pendientes = [(clave, datos) for clave, partes in grupos.items() for datos in partes]
+    informar(f"{validas} filas válidas en {len(pendientes)} grupos")
+
+    actualizadas = insertadas = 0
+    try:
+        for i in range(0, len(pendientes), TAMANO_TANDA):
+            a, n = _escribir_tanda(db, pendientes[i:i + TAMANO_TANDA])
+            actualizadas += a
+            insertadas += n
+            informar(f"Guardados {min(i + TAMANO_TANDA, len(pendientes))} de {len(pendientes)} grupos")
+    finally:
+        if actualizadas or insertadas:
+            registrar_escritura("reserva")
+
+    return {
+        "leidas": leidas,
+        "validas": validas,
+        "ml": ml,
+        "actualizadas": actualizadas,
+        "insertadas": insertadas,
+        "errores": errores,
+    }
+
+
+def texto_resultado(resultado: dict) -> str:
+    texto = (f"Filas leídas: {resultado['leidas']}\n"
+             f"Filas importadas: {resultado['validas']} ({resultado['ml']:.0f} ml)\n"
+             f"Reservas nuevas: {resultado['insertadas']} | sumadas a existentes: {resultado['actualizadas']}")
+    if resultado["errores"]:
+        texto += f"\nFilas con errores: {len(resultado['errores'])}"
+    return texto
+
+
+def escribir_informe(errores: List[tuple], ruta: str):
+    """Guarda el informe de errores como CSV (fila, error)."""
+    with open(ruta, "w", newline="", encoding="utf-8-sig") as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(("Fila", "Error"))
+        escritor.writerows(errores)
+
+
+if __name__ == "__main__":
+    from conexion import crear_proveedor
+
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(2)
+    try:
+        resultado = importar_reservas(crear_proveedor(tamano=1), sys.argv[1], al_avanzar=print)
+    except (ValueError, mysql.connector.Error) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    print(texto_resultado(resultado))
+    if resultado["errores"]:
+        if len(sys.argv) > 2:
+            escribir_informe(resultado["errores"], sys.argv[2])
+            print(f"Informe de errores guardado en {sys.argv[2]}")
+        else:
+            for fila, error in resultado["errores"]:
+                print(f"  Fila {fila}: {error}")
@@ -0,0 +1,130 @@
+"""
+Informe de tiempo de arranque hasta la ventana de login.
+
+Lanza el mismo camino de inicio que menu.py (importar menu, crear la ventana y
+el Login, dibujarla) en un intérprete nuevo con -X importtime, varias veces, y
+guarda un informe con:
+
+    - tiempo hasta la ventana de login (de cada corrida y la mediana)
+    - los módulos que más tardan en importarse (acumulado, en ms)
+    - el total por paquete de primer nivel (tkinter, PIL, mysql, ...)
+
+Pensado para correrlo en cada build (junto al dist/ de PyInstaller) y comparar
+el arranque entre versiones. Sin pantalla (servidor de CI) se informa solo la
+parte de imports.
+
+Uso:
+    python informe_arranque.py [corridas] [salida.json]
+"""
+
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+CORRIDAS = 5
+SALIDA = os.path.join("dist", "informe_arranque.json")
+MODULOS_MAS_LENTOS = 25
+
+# Lo mismo que hace menu.py al iniciar; os._exit evita esperar la conexión a la BD
+# que el login deja corriendo en segundo plano
+CODIGO_ARRANQUE = """
+import os, time, tkinter as tk
+import menu
+try:
+    root = tk.Tk()
+except tk.TclError:
+    print("IMPORTS", repr(time.time()), flush=True)
+    os._exit(0)
+menu.Login(root)
+root.update()
+print("VENTANA", repr(time.time()), flush=True)
+os._exit(0)
+"""
+
+_RE_IMPORTTIME = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def leer_importtime(salida_error: str) -> list:
+    """Líneas de -X importtime -> lista de (módulo, propio_us, acumulado_us, nivel)."""
+    modulos = []
+    for linea in salida_error.splitlines():
+        encontrado = _RE_IMPORTTIME.match(linea)
+        if encontrado:
+            propio, acumulado, sangria, modulo = encontrado.groups()
+            modulos.append((modulo, int(propio), int(acumulado), (len(sangria) - 1) // 2))
+    return modulos
+
+
+def correr_una_vez(directorio: str) -> dict:
+    """Un arranque en frío del intérprete; devuelve tiempo y detalle de imports."""
+    inicio = time.time()
+    proceso = subprocess.run([sys.executable, "-X", "importtime", "-c", CODIGO_ARRANQUE],
+                             cwd=directorio, capture_output=True, text=True, timeout=120)
+    marca = proceso.stdout.split()
+    if proceso.returncode != 0 or len(marca) < 2:
+        raise RuntimeError(f"El arranque falló:\n{proceso.stderr[-2000:]}")
+    return {
+        "hasta": "ventana" if marca[0] == "VENTANA" else "imports",
+        "ms": round((float(marca[1]) - inicio) * 1000, 1),
+        "modulos": leer_importtime(proceso.stderr),
+    }
+
+
+def armar_informe(corridas: list) -> dict:
+    # El detalle de imports se toma de la corrida con la mediana de tiempo
+    mediana = sorted(corridas, key=lambda c: c["ms"])[len(corridas) // 2]
+    modulos = mediana["modulos"]
+    por_paquete = {}
+    for modulo, _, acumulado, nivel in modulos:
+        if nivel == 0:
+            paquete = modulo.split(".")[0]
+            por_paquete[paquete] = por_paquete.get(paquete, 0) + acumulado
+    lentos = sorted(modulos, key=lambda m: m[2], reverse=True)[:MODULOS_MAS_LENTOS]
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "medido_hasta": mediana["hasta"],
+        "corridas_ms": [c["ms"] for c in corridas],
+        "mediana_ms": statistics.median(c["ms"] for c in corridas),
+        "imports_ms": round(sum(m[2] for m in modulos if m[3] == 0) / 1000, 1),
+        "por_paquete_ms": {p: round(us / 1000, 1)
+                           for p, us in sorted(por_paquete.items(), key=lambda x: x[1], reverse=True)},
+        "mas_lentos": [{"modulo": m, "propio_ms": round(p / 1000, 2), "acumulado_ms": round(a / 1000, 2)}
+                       for m, p, a, _ in lentos],
+    }
+
+
+def imprimir(informe: dict):
+    destino = "la ventana de login" if informe["medido_hasta"] == "ventana" else "fin de imports (sin pantalla)"
+    print(f"Hasta {destino}: mediana {informe['mediana_ms']:.0f} ms  (corridas: {informe['corridas_ms']})")
+    print(f"Imports de primer nivel: {informe['imports_ms']:.0f} ms\n")
+    print("Por paquete:")
+    for paquete, ms in list(informe["por_paquete_ms"].items())[:15]:
+        print(f"  {paquete:30} {ms:8.1f} ms")
+    print("\nMódulos más lentos (acumulado):")
+    for m in informe["mas_lentos"][:15]:
+        print(f"  {m['modulo']:40} {m['acumulado_ms']:8.1f} ms")
+
+
+if __name__ == "__main__":
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else CORRIDAS
+    salida = sys.argv[2] if len(sys.argv) > 2 else SALIDA
+    directorio = os.path.dirname(os.path.abspath(__file__))
+
+    try:
+        corridas = [correr_una_vez(directorio) for _ in range(cantidad)]
+    except (RuntimeError, subprocess.TimeoutExpired) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    informe = armar_informe(corridas)
+    imprimir(informe)
+
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as archivo:
+        json.dump(informe, archivo, indent=2, ensure_ascii=False)
+    print(f"\nInforme guardado en {salida}")
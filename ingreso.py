@@ -1,12 +1,30 @@
 import tkinter as tk
 from tkinter import messagebox
-from PIL import Image, ImageTk
+from concurrent.futures import ThreadPoolExecutor
+from recursos import TAMANO_LOGO_INGRESO, mostrar_logo
 # Importar Menu se hace dinamicamente para evitar referencias circulares
 
 
 # Códigos de acceso permitidos
 CODIGOS_VALIDOS = ["1234", "5678", "9101", "5524"]
 
+# Cada cuánto (ms) se revisa si ya terminó la conexión a la BD después de ingresar el código
+INTERVALO_ESPERA_CONEXION_MS = 100
+
+
+def _crear_proveedor():
+    # mysql.connector se importa en este hilo, no en el de Tk: el login no lo espera
+    from conexion import crear_proveedor
+    return crear_proveedor()
+
+
+def conectar_en_segundo_plano():
+    """Empieza a conectar a la BD mientras se escribe el código; devuelve un Future con el proveedor de conexiones."""
+    ejecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="conexion")
+    futuro = ejecutor.submit(_crear_proveedor)
+    ejecutor.shutdown(wait=False)
+    return futuro
+
 
 class Login:
     def __init__(self, root):
@@ -23,30 +41,41 @@ class Login:
 
         tk.Button(root, text="Ingresar", command=self.verificar_login, bg="#d9a5a5", font=("Arial", 12)).pack(pady=10)
 
-        logo_path = "imagenbanco.jpg"
-        try:
-            image = Image.open(logo_path)
-            image = image.resize((700, 700), Image.LANCZOS)
-            logo = ImageTk.PhotoImage(image)
-            logo_label = tk.Label(self.root, image=logo, bg="white")
-            logo_label.image = logo
-            logo_label.pack(pady=20)
-        except Exception as e:
-            tk.Label(self.root, text="No se encontró el logo.", font=("Arial", 16), bg="white").pack()
+        self.estado_label = tk.Label(root, text="", font=("Arial", 10, "italic"), bg="white", fg="#888")
+        self.estado_label.pack()
+
+        mostrar_logo(self.root, TAMANO_LOGO_INGRESO)
+
+        self.conexion = conectar_en_segundo_plano()
+        self._esperando = False
        
 
     def verificar_login(self):
         codigo = self.entry_codigo.get()
         if codigo in CODIGOS_VALIDOS:
-            self.mostrar_menu()
+            self._esperar_conexion()
         else:
             messagebox.showerror("Error", "Código incorrecto")
 
+    def _esperar_conexion(self):
+        """Abre el menú cuando termina la conexión en segundo plano (sin congelar la ventana)."""
+        if not self.conexion.done():
+            if not self._esperando:
+                self._esperando = True
+                self.estado_label.config(text="⏳ Conectando a la base de datos...")
+                self.root.after(INTERVALO_ESPERA_CONEXION_MS, self._reintentar_espera)
+            return
+        self.mostrar_menu()
+
+    def _reintentar_espera(self):
+        self._esperando = False
+        self._esperar_conexion()
+
     def mostrar_menu(self):
         from menu import Menu  # Importar aquí para evitar referencia circular
         for widget in self.root.winfo_children():
             widget.destroy()
-        Menu(self.root)
+        Menu(self.root, conexion=self.conexion)
 
     
 
@@ -0,0 +1,423 @@
+"""
+Módulo de instrumentación de consultas.
+ProveedorConexiones envuelve cada conexión y cursor para medir cada sentencia:
+SQL normalizado (sin literales), duración (execute + fetch), filas y quién la
+ejecutó (origen: el método que llamó, ej. "Reserva.cargar_stock"; pantalla: la
+clase más externa de la aplicación en la pila, ej. "Reserva").
+
+Las mediciones van a:
+    - METRICAS: un buffer circular con las últimas sentencias y totales por
+      consulta y por pantalla (lo muestra el panel de diagnóstico del menú)
+    - un log rotativo en la carpeta de datos del usuario (BANCO_LOG_CONSULTAS, por
+      defecto consultas.log; vacío lo desactiva). Por defecto solo guarda los
+      avisos N+1; con BANCO_LOG_CONSULTAS_NIVEL=INFO guarda cada sentencia. Se
+      escribe desde un hilo aparte, no desde el que ejecutó la consulta
+    - exposicion_prometheus(): formato de texto de Prometheus (GET /metricas del servicio HTTP)
+
+Además detecta patrones N+1: la misma sentencia, desde el mismo origen y el
+mismo hilo, repetida UMBRAL_N_MAS_1 veces o más en VENTANA_N_MAS_1_S segundos
+(típicamente una consulta por fila dentro de un for).
+
+Con BANCO_INSTRUMENTACION=0 los cursores no se envuelven.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional, Tuple
+
+from registro import manejador_archivo
+
+ACTIVA = os.environ.get("BANCO_INSTRUMENTACION", "1") != "0"
+
+# Sentencias que se guardan completas en el buffer circular
+CAPACIDAD_BUFFER = 2000
+
+# Log rotativo de sentencias (en registro.carpeta_datos()); WARNING = solo N+1, INFO = cada sentencia
+ARCHIVO_LOG = os.environ.get("BANCO_LOG_CONSULTAS", "consultas.log")
+NIVEL_LOG = os.environ.get("BANCO_LOG_CONSULTAS_NIVEL", "WARNING").upper()
+
+# Detección de N+1
+UMBRAL_N_MAS_1 = 10
+VENTANA_N_MAS_1_S = 2.0
+
+# Límites (en segundos) del histograma de duración de Prometheus
+LIMITES_HISTOGRAMA = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Módulos de la aplicación que no cuentan como origen ni como pantalla
+MODULOS_INFRAESTRUCTURA = {
+    "conexion", "conexion_sqlite", "instrumentacion", "ejecutor_consultas", "gestor_pantallas", "menu",
+    "diagnostico",
+}
+
+_DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+_RE_CADENA = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_RE_NUMERO = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_MARCADOR = re.compile(r"%s|%\(\w+\)s")
+_RE_LISTA = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_RE_FILAS = re.compile(r"(\(\?\.\.\.\))(?:\s*,\s*\(\?\.\.\.\))+")
+_RE_ESPACIOS = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalizar_sql(sql: str) -> str:
+    """
+    SQL sin literales ni parámetros, para agrupar las ejecuciones de una misma consulta.
+
+    "SELECT * FROM reserva WHERE ID IN (%s, %s, %s) AND Estado = 'Vigente'"
+    -> "SELECT * FROM reserva WHERE ID IN (?...) AND Estado = ?"
+    """
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode("utf-8", "replace")
+    texto = _RE_CADENA.sub("?", sql)
+    texto = _RE_MARCADOR.sub("?", texto)
+    texto = _RE_NUMERO.sub("?", texto)
+    texto = _RE_LISTA.sub("(?...)", texto)
+    texto = _RE_FILAS.sub(r"\1, ...", texto)
+    return _RE_ESPACIOS.sub(" ", texto).strip()
+
+
+# code object -> (módulo, nombre calificado) o None si no es código de la aplicación
+_CODIGOS: Dict[object, Optional[Tuple[str, str]]] = {}
+
+
+def _describir(codigo) -> Optional[Tuple[str, str]]:
+    try:
+        return _CODIGOS[codigo]
+    except KeyError:
+        pass
+    descripcion = None
+    archivo = os.path.abspath(codigo.co_filename)
+    if os.path.dirname(archivo) == _DIRECTORIO:
+        modulo = os.path.splitext(os.path.basename(archivo))[0]
+        if modulo not in MODULOS_INFRAESTRUCTURA:
+            nombre = getattr(codigo, "co_qualname", codigo.co_name)
+            # "Reserva.cargar_stock.<locals>.<lambda>" -> "Reserva.cargar_stock"
+            nombre = nombre.split(".<locals>")[0]
+            if nombre == "<module>":
+                nombre = modulo
+            descripcion = (modulo, nombre)
+    _CODIGOS[codigo] = descripcion
+    return descripcion
+
+
+def quien_llama() -> Tuple[str, str]:
+    """
+    (origen, pantalla) de la sentencia que se está ejecutando.
+
+    origen: el frame de la aplicación más cercano (ej. "GestorCompatibilidadSangre.consumir_reservas")
+    pantalla: la clase del frame de la aplicación más externo (ej. "Reserva"); en los
+        hilos de consultas es la función que mandó a ejecutar la pantalla
+    """
+    origen = pantalla = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        descripcion = _describir(frame.f_code)
+        if descripcion is not None:
+            if origen is None:
+                origen = descripcion[1]
+            if descripcion[1] != descripcion[0]:  # el código de nivel de módulo no es una pantalla
+                pantalla = descripcion[1]
+        frame = frame.f_back
+    if origen is None:
+        return ("(externo)", "(externo)")
+    return (origen, (pantalla or origen).split(".")[0])
+
+
+_logger_lock = threading.Lock()
+
+
+def _logger() -> logging.Logger:
+    logger = logging.getLogger("bancodesangre.consultas")
+    if logger.handlers:
+        return logger
+    with _logger_lock:
+        if not logger.handlers:
+            logger.propagate = False
+            logger.setLevel(getattr(logging, NIVEL_LOG, logging.WARNING))
+            manejador = manejador_archivo(ARCHIVO_LOG)
+            if isinstance(manejador, logging.NullHandler):
+                logger.addHandler(manejador)
+            else:
+                # El hilo que consulta (a menudo el de Tk) solo encola; el archivo lo escribe el listener
+                manejador.setFormatter(logging.Formatter("%(asctime)s %(threadName)s %(message)s"))
+                cola = queue.SimpleQueue()
+                listener = QueueListener(cola, manejador)
+                listener.start()
+                atexit.register(listener.stop)
+                logger.addHandler(QueueHandler(cola))
+    return logger
+
+
+class MetricasConsultas:
+    """Últimas sentencias y totales por consulta, origen y pantalla; seguro entre hilos."""
+
+    def __init__(self, capacidad: int = CAPACIDAD_BUFFER):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._recientes = deque(maxlen=capacidad)
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self._recientes.clear()
+            # sql -> [cantidad, total_ms, max_ms, filas]
+            self._por_consulta: Dict[str, list] = {}
+            # (pantalla, origen) -> [cantidad, total_ms, filas]
+            self._por_origen: Dict[Tuple[str, str], list] = {}
+            # pantalla -> conteos por límite del histograma (+Inf al final), total_s
+            self._histogramas: Dict[str, list] = {}
+            # (sql, origen) -> [veces detectado, máximo de repeticiones en la ventana]
+            self._n_mas_1: Dict[Tuple[str, str], list] = {}
+            self.desde = time.time()
+        self._local = threading.local()
+
+    def registrar(self, sql: str, duracion_ms: float, filas: int, origen: str, pantalla: str):
+        """Agrega una sentencia ejecutada (sql ya normalizado)."""
+        repeticiones = self._contar_repeticion(sql, origen)
+        segundos = duracion_ms / 1000
+        with self._lock:
+            self._recientes.append((time.time(), sql, duracion_ms, filas, origen, pantalla,
+                                    threading.current_thread().name))
+
+            consulta = self._por_consulta.setdefault(sql, [0, 0.0, 0.0, 0])
+            consulta[0] += 1
+            consulta[1] += duracion_ms
+            consulta[2] = max(consulta[2], duracion_ms)
+            consulta[3] += filas
+
+            por_origen = self._por_origen.setdefault((pantalla, origen), [0, 0.0, 0])
+            por_origen[0] += 1
+            por_origen[1] += duracion_ms
+            por_origen[2] += filas
+
+            histograma = self._histogramas.setdefault(pantalla, [[0] * (len(LIMITES_HISTOGRAMA) + 1), 0.0])
+            for i, limite in enumerate(LIMITES_HISTOGRAMA):
+                if segundos <= limite:
+                    histograma[0][i] += 1
+            histograma[0][-1] += 1
+            histograma[1] += segundos
+
+            if repeticiones >= UMBRAL_N_MAS_1:
+                patron = self._n_mas_1.setdefault((sql, origen), [0, 0])
+                if repeticiones == UMBRAL_N_MAS_1:
+                    patron[0] += 1
+                patron[1] = max(patron[1], repeticiones)
+
+        if repeticiones == UMBRAL_N_MAS_1:
+            _logger().warning("N+1 %s: %s", origen, sql)
+
+    def _contar_repeticion(self, sql: str, origen: str) -> int:
+        """Cuántas veces ejecutó este hilo la misma sentencia desde el mismo origen dentro de la ventana."""
+        vistas = getattr(self._local, "vistas", None)
+        if vistas is None:
+            vistas = self._local.vistas = {}
+        ahora = time.monotonic()
+        vista = vistas.get((sql, origen))
+        if vista is None or ahora - vista[0] > VENTANA_N_MAS_1_S:
+            vistas[(sql, origen)] = [ahora, 1]
+            return 1
+        vista[1] += 1
+        return vista[1]
+
+    def recientes(self, cantidad: int = 100) -> List[tuple]:
+        """Últimas sentencias: (instante, sql, duración_ms, filas, origen, pantalla, hilo)."""
+        with self._lock:
+            return list(self._recientes)[-cantidad:][::-1]
+
+    def _consultas(self) -> List[tuple]:
+        with self._lock:
+            return [(sql, c[0], c[1], c[1] / c[0], c[2], c[3]) for sql, c in self._por_consulta.items()]
+
+    def mas_lentas(self, cantidad: int = 20) -> List[tuple]:
+        """Consultas con mayor duración promedio: (sql, cantidad, total_ms, promedio_ms, max_ms, filas)."""
+        return sorted(self._consultas(), key=lambda c: c[3], reverse=True)[:cantidad]
+
+    def mas_frecuentes(self, cantidad: int = 20) -> List[tuple]:
+        """Consultas más ejecutadas: (sql, cantidad, total_ms, promedio_ms, max_ms, filas)."""
+        return sorted(self._consultas(), key=lambda c: c[1], reverse=True)[:cantidad]
+
+    def por_origen(self) -> List[tuple]:
+        """Totales por pantalla y método: (pantalla, origen, cantidad, total_ms, filas), del más costoso."""
+        with self._lock:
+            filas = [(p, o, v[0], v[1], v[2]) for (p, o), v in self._por_origen.items()]
+        return sorted(filas, key=lambda f: f[3], reverse=True)
+
+    def patrones_n_mas_1(self) -> List[tuple]:
+        """Patrones N+1 detectados: (origen, sql, veces, máximo de repeticiones seguidas)."""
+        with self._lock:
+            filas = [(o, sql, v[0], v[1]) for (sql, o), v in self._n_mas_1.items()]
+        return sorted(filas, key=lambda f: (f[2], f[3]), reverse=True)
+
+    def exposicion_prometheus(self) -> str:
+        """Métricas en el formato de texto de Prometheus (versión 0.0.4)."""
+        with self._lock:
+            por_origen = dict(self._por_origen)
+            histogramas = {p: (list(h[0]), h[1]) for p, h in self._histogramas.items()}
+            n_mas_1 = dict(self._n_mas_1)
+
+        lineas = [
+            "# HELP banco_consultas_total Sentencias SQL ejecutadas por pantalla y método.",
+            "# TYPE banco_consultas_total counter",
+        ]
+        for (pantalla, origen), v in sorted(por_origen.items()):
+            lineas.append(f"banco_consultas_total{{pantalla={_etiqueta(pantalla)},origen={_etiqueta(origen)}}} {v[0]}")
+        lineas += [
+            "# HELP banco_consultas_filas_total Filas leídas o modificadas por pantalla y método.",
+            "# TYPE banco_consultas_filas_total counter",
+        ]
+        for (pantalla, origen), v in sorted(por_origen.items()):
+            lineas.append(f"banco_consultas_filas_total{{pantalla={_etiqueta(pantalla)},origen={_etiqueta(origen)}}} {v[2]}")
+        lineas += [
+            "# HELP banco_consulta_duracion_segundos Duración de las sentencias SQL por pantalla.",
+            "# TYPE banco_consulta_duracion_segundos histogram",
+        ]
+        for pantalla, (conteos, total) in sorted(histogramas.items()):
+            etiqueta = _etiqueta(pantalla)
+            for limite, conteo in zip(LIMITES_HISTOGRAMA, conteos):
+                lineas.append(f'banco_consulta_duracion_segundos_bucket{{pantalla={etiqueta},le="{limite}"}} {conteo}')
+            lineas.append(f'banco_consulta_duracion_segundos_bucket{{pantalla={etiqueta},le="+Inf"}} {conteos[-1]}')
+            lineas.append(f"banco_consulta_duracion_segundos_sum{{pantalla={etiqueta}}} {total:.6f}")
+            lineas.append(f"banco_consulta_duracion_segundos_count{{pantalla={etiqueta}}} {conteos[-1]}")
+        lineas += [
+            "# HELP banco_consultas_n_mas_1_total Veces que se detectó un patrón N+1 por método.",
+            "# TYPE banco_consultas_n_mas_1_total counter",
+        ]
+        veces_por_origen: Dict[str, int] = {}
+        for (_, origen), v in n_mas_1.items():
+            veces_por_origen[origen] = veces_por_origen.get(origen, 0) + v[0]
+        for origen, veces in sorted(veces_por_origen.items()):
+            lineas.append(f"banco_consultas_n_mas_1_total{{origen={_etiqueta(origen)}}} {veces}")
+        return "\n".join(lineas) + "\n"
+
+
+def _etiqueta(valor: str) -> str:
+    return '"' + valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+
+
+METRICAS = MetricasConsultas()
+
+
+def exposicion_prometheus() -> str:
+    """Atajo de METRICAS.exposicion_prometheus()."""
+    return METRICAS.exposicion_prometheus()
+
+
+class CursorInstrumentado:
+    """
+    Envoltorio de un cursor de mysql.connector que mide cada sentencia.
+
+    La medición de una sentencia se cierra al ejecutar la siguiente o al cerrar el
+    cursor, así incluye el tiempo y las filas de los fetch (en un cursor sin
+    buffer, rowcount recién se conoce al leer).
+    """
+
+    def __init__(self, cursor, metricas: MetricasConsultas = METRICAS):
+        self._cursor = cursor
+        self._metricas = metricas
+        # [sql, origen, pantalla, duración_s, filas, contar_fetch]
+        self._pendiente = None
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def _empezar(self, sql):
+        self._terminar()
+        origen, pantalla = quien_llama()
+        self._pendiente = [sql, origen, pantalla, 0.0, 0, True]
+
+    def _terminar(self):
+        pendiente, self._pendiente = self._pendiente, None
+        if pendiente is None:
+            return
+        sql, origen, pantalla, duracion, filas, _ = pendiente
+        duracion_ms = duracion * 1000
+        normalizado = normalizar_sql(sql)
+        self._metricas.registrar(normalizado, duracion_ms, filas, origen, pantalla)
+        _logger().info("%.2f ms %d filas %s [%s] %s", duracion_ms, filas, origen, pantalla, normalizado)
+
+    def _ejecutado(self, inicio: float):
+        pendiente = self._pendiente
+        pendiente[3] += time.perf_counter() - inicio
+        filas = self._cursor.rowcount
+        if filas is not None and filas >= 0:
+            # DML o cursor con buffer: rowcount ya es el total. Sin buffer vale -1
+            # hasta que se leen las filas, y se cuentan en los fetch
+            pendiente[4] = filas
+            pendiente[5] = False
+
+    def execute(self, sql, *args, **kwargs):
+        self._empezar(sql)
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, *args, **kwargs)
+        finally:
+            self._ejecutado(inicio)
+
+    def executemany(self, sql, *args, **kwargs):
+        self._empezar(sql)
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, *args, **kwargs)
+        finally:
+            self._ejecutado(inicio)
+
+    def _leido(self, inicio: float, filas: int):
+        pendiente = self._pendiente
+        if pendiente is not None:
+            pendiente[3] += time.perf_counter() - inicio
+            if pendiente[5]:
+                pendiente[4] += filas
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        fila = self._cursor.fetchone()
+        self._leido(inicio, 0 if fila is None else 1)
+        return fila
+
+    def fetchmany(self, *args, **kwargs):
+        inicio = time.perf_counter()
+        filas = self._cursor.fetchmany(*args, **kwargs)
+        self._leido(inicio, len(filas))
+        return filas
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        filas = self._cursor.fetchall()
+        self._leido(inicio, len(filas))
+        return filas
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._terminar()
+        return self._cursor.close()
+
+
+class ConexionInstrumentada:
+    """Envoltorio de una conexión cuyos cursores se miden."""
+
+    def __init__(self, conexion, metricas: MetricasConsultas = METRICAS):
+        self._conexion = conexion
+        self._metricas = metricas
+
+    def __getattr__(self, nombre):
+        return getattr(self._conexion, nombre)
+
+    def cursor(self, *args, **kwargs):
+        return CursorInstrumentado(self._conexion.cursor(*args, **kwargs), self._metricas)
+
+
+def instrumentar(conexion):
+    """Devuelve la conexión envuelta si la instrumentación está activa (si no, la misma)."""
+    return ConexionInstrumentada(conexion) if ACTIVA else conexion
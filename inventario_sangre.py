@@ -0,0 +1,88 @@
+"""
+Módulo de inventario de sangre en memoria.
+Mantiene el volumen disponible por tipo de sangre en un arreglo compacto
+para responder consultas de disponibilidad sin ir a la BD en cada búsqueda.
+"""
+
+import mysql.connector
+from array import array
+from typing import Dict
+from registro import obtener_logger
+from vencimientos import condicion_vigente
+
+# Los ocho tipos ABO/Rh. El orden define el índice de cada tipo en el inventario.
+TIPOS_SANGRE = ("O-", "O+", "A-", "A+", "B-", "B+", "AB-", "AB+")
+
+# Interning tipo -> índice
+INDICE_TIPO = {tipo: i for i, tipo in enumerate(TIPOS_SANGRE)}
+
+
+class InventarioSangre:
+    """Volumen disponible (ml) por tipo de sangre, cargado una sola vez desde la BD."""
+
+    def __init__(self, db):
+        """
+        Inicializa el inventario y lo carga desde la BD.
+
+        Args:
+            db: ProveedorConexiones de la BD
+        """
+        self.db = db
+        self.volumenes = array("d", [0.0] * len(TIPOS_SANGRE))
+        self.recargar()
+
+    def recargar(self):
+        """Recarga los totales por tipo con un único GROUP BY (sin la reserva vencida)."""
+        volumenes = array("d", [0.0] * len(TIPOS_SANGRE))
+        try:
+            with self.db.cursor() as cursor:
+                cursor.execute(f'''
+                    SELECT TipodeSangre, SUM(VolumenDisp) FROM reserva
+                    WHERE {condicion_vigente()}
+                    GROUP BY TipodeSangre
+                ''')
+                for tipo, total in cursor.fetchall():
+                    indice = INDICE_TIPO.get(tipo)
+                    if indice is not None and total:
+                        volumenes[indice] = float(total)
+        except mysql.connector.Error as e:
+            obtener_logger("inventario_sangre").error("Error al cargar el inventario: %s", e)
+            return
+        self.volumenes = volumenes
+
+    def volumen(self, tipo_sangre: str) -> float:
+        """
+        Devuelve el volumen disponible de un tipo.
+
+        Args:
+            tipo_sangre: Tipo de sangre (ej: "O+")
+
+        Returns:
+            Volumen disponible en ml (0 si el tipo no es conocido)
+        """
+        indice = INDICE_TIPO.get(tipo_sangre)
+        return self.volumenes[indice] if indice is not None else 0.0
+
+    def sumar(self, tipo_sangre: str, volumen: float):
+        """Registra un ingreso de volumen para un tipo (usado al guardar una reserva)."""
+        indice = INDICE_TIPO.get(tipo_sangre)
+        if indice is not None:
+            self.volumenes[indice] += float(volumen)
+
+    def restar(self, tipo_sangre: str, volumen: float):
+        """Registra un egreso de volumen para un tipo (consumo o borrado de reserva)."""
+        indice = INDICE_TIPO.get(tipo_sangre)
+        if indice is not None:
+            self.volumenes[indice] = max(0.0, self.volumenes[indice] - float(volumen))
+
+    def mascara_en_stock(self) -> int:
+        """Máscara de bits con los tipos que tienen volumen disponible (bit i = TIPOS_SANGRE[i])."""
+        m = 0
+        for i, vol in enumerate(self.volumenes):
+            if vol > 0:
+                m |= 1 << i
+        return m
+
+    def totales(self) -> Dict[str, float]:
+        """Devuelve un dict tipo -> volumen solo con los tipos que tienen stock."""
+        return {tipo: self.volumenes[i] for i, tipo in enumerate(TIPOS_SANGRE) if self.volumenes[i] > 0}
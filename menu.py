@@ -1,16 +1,20 @@
 import tkinter as tk
 from tkinter import messagebox
-from PIL import Image, ImageTk
-import mysql.connector
-from registrardonante import *
-from verdonante import *
-from verreserva import *
-from verdonaciones import *
-from solicitudestransfusion import *
-from ingreso import*
+from ingreso import Login
+from vencimientos import BarridoVencimientos, texto_informe
+from gestor_pantallas import GestorPantallas
+# Las pantallas, mysql.connector y la conexión se importan recién al usarlos,
+# para que la ventana de login aparezca sin esperarlos
 
 class Menu:
-    def __init__(self, root):
+    def __init__(self, root, conexion=None):
+        """
+        Args:
+            root: Ventana raíz de Tk
+            conexion: Future con el proveedor de conexiones que empezó a crear el login
+                (si no se indica, se conecta acá)
+        """
+        import mysql.connector
         self.root = root
         self.root.title("Sistema Gestor Banco de Sangre")
         self.root.geometry("1200x800")
@@ -18,19 +22,17 @@ class Menu:
 
 
         try:
-            self.conn = mysql.connector.connect(
-                host="localhost",
-                user="root",
-                password="41061199",
-                database="bancodesangre"
-            )
-            self.cursor = self.conn.cursor()
-        except mysql.connector.Error as err:
-            # Mostrar un mensaje claro al usuario y dejar la conexión en None
+            # Pool de conexiones (motor y servidor configurables con variables de entorno, ver conexion.py)
+            if conexion is not None:
+                self.db = conexion.result()
+            else:
+                from conexion import crear_proveedor
+                self.db = crear_proveedor()
+        except (mysql.connector.Error, ValueError) as err:
+            # Mostrar un mensaje claro al usuario y dejar el proveedor en None
             messagebox.showerror("Error de conexión",
                                  f"No se pudo conectar a la base de datos:\n{err}")
-            self.conn = None
-            self.cursor = None
+            self.db = None
 
 
         sidebar = tk.Frame(root, bg="#d9a5a5", width=200)
@@ -70,59 +72,87 @@ class Menu:
         self.content_frame = tk.Frame(self.main_frame, bg="white") #Es una especie de "pantalla" donde se cargan diferentes interfaces sin necesidad de abrir nuevas ventanas.
         self.content_frame.pack(expand= True, fill=tk.BOTH)
 
+        # Cada pantalla se construye la primera vez y después se oculta/muestra (ver gestor_pantallas.py)
+        self.pantallas = GestorPantallas(self.content_frame)
+        self.pantallas.registrar("registro_donante", self._crear_registro_donante, ("donante",))
+        self.pantallas.registrar("donantes", self._crear_ver_donantes, ("donante",))
+        self.pantallas.registrar("reserva", self._crear_reserva, ("reserva", "donante"))
+        self.pantallas.registrar("donaciones", self._crear_ver_donaciones, ("reserva", "donante"))
+        self.pantallas.registrar("solicitudes", self._crear_solicitudes, ("solicitud",))
+
         self.agregar_logo()
 
+        # Panel de diagnóstico de consultas (oculto)
+        for atajo in ("<Control-Shift-D>", "<Control-Shift-d>"):
+            self.root.bind_all(atajo, self.abrir_diagnostico)
+
+        # Marcar la reserva vencida al iniciar y luego periódicamente
+        self.barrido_vencimientos = None
+        if self.db:
+            self.barrido_vencimientos = BarridoVencimientos(root, self.db, al_informar=self._informar_vencidas)
+            self.barrido_vencimientos.iniciar()
+
+    # Cada pantalla importa su módulo (y tkcalendar, PIL, etc.) la primera vez que se abre
+
+    def _crear_registro_donante(self, frame):
+        from registrardonante import Donante
+        return Donante(frame, self.db)
+
+    def _crear_ver_donantes(self, frame):
+        from verdonante import VerDonante
+        return VerDonante(frame, self.db)
+
+    def _crear_reserva(self, frame):
+        from verreserva import Reserva
+        return Reserva(frame, self.db)
+
+    def _crear_ver_donaciones(self, frame):
+        from verdonaciones import VerDonaciones
+        return VerDonaciones(frame, self.db)
+
+    def _crear_solicitudes(self, frame):
+        from solicitudestransfusion import VerSolicitud
+        return VerSolicitud(frame, self.db)
+
+    def _informar_vencidas(self, informe):
+        messagebox.showwarning("Reservas vencidas", texto_informe(informe))
+
     def abrir_registro_donante(self):
-        if not self.conn:
+        if not self.db:
             messagebox.showerror("Sin conexión", "No hay conexión a la base de datos.")
             return
-        self._limpiar_main_frame()
-        Donante(self.content_frame, self.conn)
+        self.pantallas.mostrar("registro_donante")
 
     def abrir_consulta_donante(self):
-        if not self.conn:
+        if not self.db:
             messagebox.showerror("Sin conexión", "No hay conexión a la base de datos.")
             return
-        self._limpiar_main_frame()
-        VerDonante(self.content_frame, self.conn)
+        self.pantallas.mostrar("donantes")
     
     def abrir_stock(self):
-        if not self.conn:
+        if not self.db:
             messagebox.showerror("Sin conexión", "No hay conexión a la base de datos.")
             return
-        self._limpiar_main_frame()
-        Reserva(self.content_frame, self.conn)
+        self.pantallas.mostrar("reserva")
 
     def ver_donaciones(self):
-        if not self.conn:
+        if not self.db:
             messagebox.showerror("Sin conexión", "No hay conexión a la base de datos.")
             return
-        self._limpiar_main_frame()
-        VerDonaciones(self.content_frame, self.conn)
+        self.pantallas.mostrar("donaciones")
 
     def abrir_solicitudes_transfusion(self):
-        if not self.conn:
+        if not self.db:
             messagebox.showerror("Sin conexión", "No hay conexión a la base de datos.")
             return
-        self._limpiar_main_frame()
-        VerSolicitud(self.content_frame, self.conn)
+        self.pantallas.mostrar("solicitudes")
+
+    def abrir_diagnostico(self, event=None):
+        from diagnostico import PanelDiagnostico
+        PanelDiagnostico.abrir(self.root)
 
     def agregar_logo(self):
-        self._limpiar_main_frame()
-        logo_path = "imagenbanco.jpg"
-        try:
-            image = Image.open(logo_path)
-            logo = ImageTk.PhotoImage(image)
-            logo_label = tk.Label(self.content_frame, image=logo, bg="white")
-            logo_label.image = logo
-            logo_label.pack(pady=20)
-        except Exception as e:
-            tk.Label(self.content_frame, text="No se encontró el logo.", font=("Arial", 16), bg="white").pack()
-
-
-    def _limpiar_main_frame(self):
-        for widget in self.content_frame.winfo_children():
-            widget.destroy()
+        self.pantallas.mostrar_inicio()
 
     
 
@@ -1,11 +1,17 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+
+# Por defecto se arma en modo carpeta (onedir): el ejecutable arranca sin
+# descomprimirse en un directorio temporal en cada inicio. Con BANCO_ONEFILE=1
+# se arma el ejecutable único de antes.
+ONEFILE = os.environ.get("BANCO_ONEFILE") == "1"
 
 
 a = Analysis(
     ['menu.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('imagenbanco.jpg', '.')],  # recursos.ruta_recurso() lo busca en sys._MEIPASS
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -16,23 +22,51 @@ a = Analysis(
 )
 pyz = PYZ(a.pure)
 
-exe = EXE(
-    pyz,
-    a.scripts,
-    a.binaries,
-    a.datas,
-    [],
-    name='menu',
-    debug=False,
-    bootloader_ignore_signals=False,
-    strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
-    console=False,
-    disable_windowed_traceback=False,
-    argv_emulation=False,
-    target_arch=None,
-    codesign_identity=None,
-    entitlements_file=None,
-)
+if ONEFILE:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        a.binaries,
+        a.datas,
+        [],
+        name='menu',
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=True,
+        upx_exclude=[],
+        runtime_tmpdir=None,
+        console=False,
+        disable_windowed_traceback=False,
+        argv_emulation=False,
+        target_arch=None,
+        codesign_identity=None,
+        entitlements_file=None,
+    )
+else:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        [],
+        exclude_binaries=True,
+        name='menu',
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=False,  # descomprimir con UPX en cada inicio cuesta más de lo que ahorra en disco
+        console=False,
+        disable_windowed_traceback=False,
+        argv_emulation=False,
+        target_arch=None,
+        codesign_identity=None,
+        entitlements_file=None,
+    )
+    coll = COLLECT(
+        exe,
+        a.binaries,
+        a.datas,
+        strip=False,
+        upx=False,
+        upx_exclude=[],
+        name='menu',
+    )
@@ -0,0 +1,503 @@
+"""
+Módulo de migraciones del esquema.
+Crea las tablas (las mismas del modelo 'Modelo Relacional.mwb') y los índices
+que usan las consultas frecuentes, registrando en schema_version qué versiones
+ya se aplicaron. Cada paso es idempotente (CREATE TABLE IF NOT EXISTS, índices
+verificados en information_schema), así que se puede volver a correr sin riesgo.
+
+Incluye además un chequeo con EXPLAIN de que cada consulta frecuente use un índice.
+
+La BD local SQLite (conexion_sqlite.py) tiene su propio DDL con las mismas
+versiones (MIGRACIONES_SQLITE); migrar(), estado() y explicar() eligen según el
+dialecto del proveedor.
+
+Uso:
+    python migraciones.py [aplicar|estado|explicar]
+"""
+
+import re
+import sys
+from datetime import date
+from typing import Callable, List, Optional
+
+import mysql.connector
+
+from busqueda import DDL_INDICES_BUSQUEDA
+from repositorios import DDL_INDICES_PAGINACION
+from resumen_stock import CONSULTA_RESUMEN, DIAS_POR_VENCER
+from vencimientos import condicion_vigente
+
+# Lock con nombre para que dos puestos no migren a la vez
+NOMBRE_LOCK = "bancodesangre_migraciones"
+ESPERA_LOCK_S = 30
+
+TIPOS_ENUM = "ENUM('A+', 'A-', 'B+', 'B-', 'O+', 'O-', 'AB+', 'AB-')"
+
+DDL_SCHEMA_VERSION = '''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INT NOT NULL PRIMARY KEY,
+        descripcion VARCHAR(255) NOT NULL,
+        aplicada DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB
+'''
+
+DDL_TABLAS = [
+    f'''CREATE TABLE IF NOT EXISTS tipodesangre (
+        id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        TipodeSangre {TIPOS_ENUM} NOT NULL
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4''',
+    '''CREATE TABLE IF NOT EXISTS compatibilidad (
+        id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        id_TipodeSangreReceptor INT NOT NULL,
+        id_TipodeSangreDonable INT NOT NULL,
+        preferencia INT NOT NULL DEFAULT 0,
+        FOREIGN KEY (id_TipodeSangreReceptor) REFERENCES tipodesangre (id),
+        FOREIGN KEY (id_TipodeSangreDonable) REFERENCES tipodesangre (id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4''',
+    f'''CREATE TABLE IF NOT EXISTS compatibilidadsangre (
+        id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        Donante {TIPOS_ENUM} NOT NULL,
+        Receptor VARCHAR(50) NOT NULL
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4''',
+    '''CREATE TABLE IF NOT EXISTS donante (
+        id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        nombre VARCHAR(100) NOT NULL,
+        apellido VARCHAR(100) NOT NULL,
+        fecha_n DATE NOT NULL,
+        sexo ENUM('M', 'F', 'otro') NOT NULL,
+        DNI VARCHAR(10) DEFAULT NULL,
+        telefono VARCHAR(15) DEFAULT NULL,
+        Correo VARCHAR(100) DEFAULT NULL,
+        direccion VARCHAR(255) NOT NULL,
+        UltimaD DATE DEFAULT NULL,
+        id_TipodeSangre INT NOT NULL,
+        FOREIGN KEY (id_TipodeSangre) REFERENCES tipodesangre (id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4''',
+    '''CREATE TABLE IF NOT EXISTS hospital (
+        id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        Nombre VARCHAR(255) NOT NULL,
+        direccion VARCHAR(255) NOT NULL,
+        telefono VARCHAR(15) NOT NULL,
+        Correo VARCHAR(100) DEFAULT NULL
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4''',
+    f'''CREATE TABLE IF NOT EXISTS reserva (
+        ID INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        VolumenDisp DECIMAL(7, 2) DEFAULT NULL,
+        FechaExtraccion DATE NOT NULL,
+        Vencimiento DATE NOT NULL,
+        TipodeSangre {TIPOS_ENUM} NOT NULL,
+        Estado ENUM('Vencida', 'No vencida') DEFAULT 'No vencida',
+        id_Donante INT DEFAULT NULL,
+        id_Compatibilidad INT DEFAULT NULL,
+        FOREIGN KEY (id_Donante) REFERENCES donante (id),
+        FOREIGN KEY (id_Compatibilidad) REFERENCES compatibilidadsangre (id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4''',
+    '''CREATE TABLE IF NOT EXISTS solicitud (
+        id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        VolumenSolic DECIMAL(5, 2) NOT NULL,
+        Estado ENUM('Aceptada', 'Rechazada', 'Pendiente') DEFAULT 'Pendiente',
+        id_Hospital INT NOT NULL,
+        id_TipodeSangre INT NOT NULL,
+        id_Reserva INT DEFAULT NULL,
+        FOREIGN KEY (id_Hospital) REFERENCES hospital (id),
+        FOREIGN KEY (id_TipodeSangre) REFERENCES tipodesangre (id),
+        FOREIGN KEY (id_Reserva) REFERENCES reserva (ID)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4''',
+    '''CREATE TABLE IF NOT EXISTS transfusion (
+        id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        FechaTransf DATE NOT NULL,
+        VolumenTransf DECIMAL(5, 2) NOT NULL,
+        id_Reserva INT DEFAULT NULL,
+        FOREIGN KEY (id_Reserva) REFERENCES reserva (ID)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4''',
+]
+
+# Índices de las consultas frecuentes (ver CONSULTAS_FRECUENTES)
+DDL_INDICES_CONSULTAS = [
+    # Reservas de un tipo por vencimiento (descontar_stock_con_compatibilidad)
+    "CREATE INDEX idx_reserva_tipo_vencimiento ON reserva (TipodeSangre, Vencimiento)",
+    # Duplicado en guardar_reserva (igualdad en las tres) y resumen GROUP BY tipo, estado (cubriente)
+    "CREATE INDEX idx_reserva_tipo_estado_venc ON reserva (TipodeSangre, Estado, Vencimiento, VolumenDisp)",
+    # Donaciones de los donantes encontrados (VerDonaciones: por_ids sobre id_Donante).
+    # FechaExtraccion ya no se filtra, pero el índice queda: también sostiene la clave foránea
+    "CREATE INDEX idx_reserva_donante_fecha ON reserva (id_Donante, FechaExtraccion)",
+    # Solicitudes pendientes (aceptar_pendientes)
+    "CREATE INDEX idx_solicitud_estado ON solicitud (Estado, id)",
+]
+
+# Ciclo de vida de la solicitud (solicitudes.py): estado Despachada y el detalle
+# de qué reservas cubrieron cada solicitud aceptada
+DDL_ASIGNACIONES = [
+    "ALTER TABLE solicitud MODIFY Estado ENUM('Aceptada', 'Rechazada', 'Pendiente', 'Despachada') "
+    "DEFAULT 'Pendiente'",
+    '''CREATE TABLE IF NOT EXISTS asignacion (
+        id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        id_Solicitud INT NOT NULL,
+        id_Reserva INT NOT NULL,
+        Volumen DECIMAL(7, 2) NOT NULL,
+        Fecha DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        KEY idx_asignacion_solicitud (id_Solicitud),
+        KEY idx_asignacion_reserva (id_Reserva),
+        FOREIGN KEY (id_Solicitud) REFERENCES solicitud (id),
+        FOREIGN KEY (id_Reserva) REFERENCES reserva (ID)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4''',
+]
+
+
+def _sembrar_catalogos(cursor):
+    """Carga tipodesangre y compatibilidad si están vacías (no toca catálogos existentes)."""
+    from compatibilidad_sangre import COMPATIBILIDADES_ESTANDAR
+
+    cursor.execute("SELECT COUNT(*) FROM tipodesangre")
+    if cursor.fetchone()[0] == 0:
+        cursor.executemany("INSERT INTO tipodesangre (TipodeSangre) VALUES (%s)",
+                           [(t,) for t in ("A+", "A-", "B+", "B-", "O+", "O-", "AB+", "AB-")])
+
+    cursor.execute("SELECT COUNT(*) FROM compatibilidad")
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("SELECT TipodeSangre, id FROM tipodesangre")
+        ids = dict(cursor.fetchall())
+        filas = [(ids[receptor], ids[donable], preferencia)
+                 for receptor, donables in COMPATIBILIDADES_ESTANDAR.items()
+                 for preferencia, donable in enumerate(donables)
+                 if receptor in ids and donable in ids]
+        cursor.executemany('''
+            INSERT INTO compatibilidad (id_TipodeSangreReceptor, id_TipodeSangreDonable, preferencia)
+            VALUES (%s, %s, %s)
+        ''', filas)
+
+
+# (versión, descripción, pasos); cada paso es un DDL o una función(cursor)
+MIGRACIONES = [
+    (1, "Esquema inicial", DDL_TABLAS + [_sembrar_catalogos]),
+    (2, "Índices de búsqueda de donantes", DDL_INDICES_BUSQUEDA),
+    (3, "Índices de paginación", DDL_INDICES_PAGINACION),
+    (4, "Índices de consultas frecuentes", DDL_INDICES_CONSULTAS),
+    (5, "Estado Despachada y asignaciones de solicitudes", DDL_ASIGNACIONES),
+]
+
+_RE_INDICE = re.compile(r"CREATE\s+(?:UNIQUE\s+|FULLTEXT\s+)?INDEX\s+(\w+)\s+ON\s+(\w+)", re.IGNORECASE)
+
+
+def _indice_existe(cursor, tabla: str, nombre: str) -> bool:
+    cursor.execute('''
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        LIMIT 1
+    ''', (tabla, nombre))
+    return cursor.fetchone() is not None
+
+
+def _aplicar_paso(cursor, paso):
+    if callable(paso):
+        paso(cursor)
+        return
+    # MySQL no tiene CREATE INDEX IF NOT EXISTS: se verifica antes
+    indice = _RE_INDICE.match(paso.strip())
+    if indice and _indice_existe(cursor, indice.group(2), indice.group(1)):
+        return
+    cursor.execute(paso)
+
+
+def versiones_aplicadas(cursor, ddl: str = DDL_SCHEMA_VERSION) -> set:
+    cursor.execute(ddl)
+    cursor.execute("SELECT version FROM schema_version")
+    return {fila[0] for fila in cursor.fetchall()}
+
+
+def migrar(db, hasta: Optional[int] = None, informar: Callable = print) -> List[int]:
+    """
+    Aplica las migraciones pendientes, en orden.
+
+    Los DDL de MySQL confirman solos, así que una migración cortada a la mitad
+    queda sin registrar y se repite entera la próxima vez (sus pasos son idempotentes).
+
+    Args:
+        db: ProveedorConexiones de la BD
+        hasta: Última versión a aplicar (None para todas)
+        informar: Función que recibe los mensajes de avance
+
+    Returns:
+        Versiones aplicadas en esta corrida
+    """
+    if _es_sqlite(db):
+        return _migrar_sqlite(db, hasta, informar)
+    aplicadas_ahora = []
+    with db.conexion() as conn:
+        cursor = conn.cursor(buffered=True)
+        try:
+            cursor.execute("SELECT GET_LOCK(%s, %s)", (NOMBRE_LOCK, ESPERA_LOCK_S))
+            if cursor.fetchone()[0] != 1:
+                raise RuntimeError("Otra migración está en curso; intente más tarde.")
+            try:
+                aplicadas = versiones_aplicadas(cursor)
+                for version, descripcion, pasos in MIGRACIONES:
+                    if version in aplicadas or (hasta is not None and version > hasta):
+                        continue
+                    informar(f"Aplicando {version}: {descripcion}...")
+                    for paso in pasos:
+                        _aplicar_paso(cursor, paso)
+                    cursor.execute("INSERT INTO schema_version (version, descripcion) VALUES (%s, %s)",
+                                   (version, descripcion))
+                    conn.commit()
+                    aplicadas_ahora.append(version)
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (NOMBRE_LOCK,))
+                cursor.fetchall()
+        finally:
+            cursor.close()
+    return aplicadas_ahora
+
+
+def estado(db) -> List[tuple]:
+    """Lista (versión, descripción, aplicada: bool) de todas las migraciones."""
+    sqlite = _es_sqlite(db)
+    with db.cursor() as cursor:
+        aplicadas = versiones_aplicadas(cursor, DDL_SCHEMA_VERSION_SQLITE if sqlite else DDL_SCHEMA_VERSION)
+    return [(version, descripcion, version in aplicadas)
+            for version, descripcion, _ in (MIGRACIONES_SQLITE if sqlite else MIGRACIONES)]
+
+
+# ------------------------------------------------------------ chequeo EXPLAIN
+
+# (nombre, tabla que debe usar índice, consulta, parámetros de ejemplo)
+CONSULTAS_FRECUENTES = [
+    ("Asignación: reservas de un tipo por vencimiento", "reserva",
+     f"SELECT ID, VolumenDisp, Vencimiento FROM reserva WHERE TipodeSangre = %s AND VolumenDisp > 0 "
+     f"AND {condicion_vigente()} ORDER BY Vencimiento ASC, ID ASC LIMIT 20", ("O+",)),
+    ("guardar_reserva: reserva duplicada", "reserva",
+     "SELECT ID, VolumenDisp FROM reserva WHERE Vencimiento = %s AND TipodeSangre = %s AND Estado = %s LIMIT 1",
+     (date.today(), "O+", "No vencida")),
+    ("Donaciones de los donantes encontrados", "reserva",
+     "SELECT ID, VolumenDisp FROM reserva WHERE id_Donante IN (%s, %s) ORDER BY ID DESC", (1, 2)),
+    ("Donante por DNI", "donante",
+     "SELECT id FROM donante WHERE DNI LIKE %s", ("30%",)),
+    ("Listado de reserva (primera página)", "reserva",
+     "SELECT ID, VolumenDisp, Vencimiento, TipodeSangre, Estado FROM reserva "
+     "WHERE VolumenDisp > 0 ORDER BY Vencimiento, ID LIMIT 500", ()),
+    ("Listado de donantes (primera página)", "donante",
+     "SELECT id, nombre, apellido FROM donante ORDER BY apellido, nombre, id LIMIT 500", ()),
+    ("Solicitudes pendientes", "solicitud",
+     "SELECT id, VolumenSolic FROM solicitud WHERE Estado = 'Pendiente' ORDER BY id", ()),
+    ("Resumen de stock", "reserva", CONSULTA_RESUMEN, (DIAS_POR_VENCER, DIAS_POR_VENCER)),
+    ("Barrido de vencimientos", "reserva",
+     "SELECT ID FROM reserva WHERE Vencimiento < CURDATE() AND (Estado IS NULL OR Estado <> 'Vencida')", ()),
+]
+
+
+def explicar(db) -> List[tuple]:
+    """
+    Corre EXPLAIN de cada consulta frecuente y verifica que use un índice en su tabla.
+
+    Con tablas casi vacías MySQL puede preferir un recorrido completo aunque el
+    índice exista; en ese caso se informa "aviso" en lugar de "falla".
+
+    Returns:
+        Lista de (nombre, resultado "ok" | "aviso" | "falla", detalle)
+    """
+    if _es_sqlite(db):
+        return _explicar_sqlite(db)
+    resultados = []
+    with db.cursor(dictionary=True) as cursor:
+        for nombre, tabla, sql, params in CONSULTAS_FRECUENTES:
+            cursor.execute("EXPLAIN " + sql, params)
+            planes = [p for p in cursor.fetchall() if p.get("table") == tabla]
+            if not planes:
+                resultados.append((nombre, "falla", f"EXPLAIN no muestra la tabla {tabla}"))
+                continue
+            plan = planes[0]
+            detalle = f"type={plan.get('type')} key={plan.get('key')} rows={plan.get('rows')}"
+            if plan.get("key"):
+                resultados.append((nombre, "ok", detalle))
+            elif plan.get("possible_keys"):
+                resultados.append((nombre, "aviso", detalle + f" (posibles: {plan['possible_keys']})"))
+            else:
+                resultados.append((nombre, "falla", detalle))
+    return resultados
+
+
+# ------------------------------------------------------------ SQLite
+
+# El mismo esquema para la BD local: ENUM como CHECK, AUTO_INCREMENT como
+# INTEGER PRIMARY KEY y textos de personas sin distinguir mayúsculas (como
+# utf8mb4 en MySQL). Las fechas se declaran DATE/DATETIME para que sqlite3 las
+# devuelva como date/datetime (ver conexion_sqlite.py).
+
+def _check_en(columna: str, valores) -> str:
+    return f"CHECK ({columna} IN ({', '.join(repr(v) for v in valores)}))"
+
+
+_TIPOS_SANGRE = ("A+", "A-", "B+", "B-", "O+", "O-", "AB+", "AB-")
+
+DDL_SCHEMA_VERSION_SQLITE = '''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER NOT NULL PRIMARY KEY,
+        descripcion TEXT NOT NULL,
+        aplicada DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+DDL_TABLAS_SQLITE = [
+    f'''CREATE TABLE IF NOT EXISTS tipodesangre (
+        id INTEGER PRIMARY KEY,
+        TipodeSangre TEXT NOT NULL {_check_en("TipodeSangre", _TIPOS_SANGRE)}
+    )''',
+    '''CREATE TABLE IF NOT EXISTS compatibilidad (
+        id INTEGER PRIMARY KEY,
+        id_TipodeSangreReceptor INTEGER NOT NULL REFERENCES tipodesangre (id),
+        id_TipodeSangreDonable INTEGER NOT NULL REFERENCES tipodesangre (id),
+        preferencia INTEGER NOT NULL DEFAULT 0
+    )''',
+    f'''CREATE TABLE IF NOT EXISTS compatibilidadsangre (
+        id INTEGER PRIMARY KEY,
+        Donante TEXT NOT NULL {_check_en("Donante", _TIPOS_SANGRE)},
+        Receptor TEXT NOT NULL
+    )''',
+    f'''CREATE TABLE IF NOT EXISTS donante (
+        id INTEGER PRIMARY KEY,
+        nombre TEXT NOT NULL COLLATE NOCASE,
+        apellido TEXT NOT NULL COLLATE NOCASE,
+        fecha_n DATE NOT NULL,
+        sexo TEXT NOT NULL {_check_en("sexo", ("M", "F", "otro"))},
+        DNI TEXT DEFAULT NULL COLLATE NOCASE,
+        telefono TEXT DEFAULT NULL,
+        Correo TEXT DEFAULT NULL,
+        direccion TEXT NOT NULL,
+        UltimaD DATE DEFAULT NULL,
+        id_TipodeSangre INTEGER NOT NULL REFERENCES tipodesangre (id)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS hospital (
+        id INTEGER PRIMARY KEY,
+        Nombre TEXT NOT NULL COLLATE NOCASE,
+        direccion TEXT NOT NULL,
+        telefono TEXT NOT NULL,
+        Correo TEXT DEFAULT NULL
+    )''',
+    f'''CREATE TABLE IF NOT EXISTS reserva (
+        ID INTEGER PRIMARY KEY,
+        VolumenDisp REAL DEFAULT NULL,
+        FechaExtraccion DATE NOT NULL,
+        Vencimiento DATE NOT NULL,
+        TipodeSangre TEXT NOT NULL {_check_en("TipodeSangre", _TIPOS_SANGRE)},
+        Estado TEXT DEFAULT 'No vencida' {_check_en("Estado", ("Vencida", "No vencida"))},
+        id_Donante INTEGER DEFAULT NULL REFERENCES donante (id),
+        id_Compatibilidad INTEGER DEFAULT NULL REFERENCES compatibilidadsangre (id)
+    )''',
+    # El estado Despachada (versión 5 en MySQL) ya está en el CHECK: SQLite no tiene ALTER ... MODIFY
+    f'''CREATE TABLE IF NOT EXISTS solicitud (
+        id INTEGER PRIMARY KEY,
+        VolumenSolic REAL NOT NULL,
+        Estado TEXT DEFAULT 'Pendiente' {_check_en("Estado", ("Aceptada", "Rechazada", "Pendiente", "Despachada"))},
+        id_Hospital INTEGER NOT NULL REFERENCES hospital (id),
+        id_TipodeSangre INTEGER NOT NULL REFERENCES tipodesangre (id),
+        id_Reserva INTEGER DEFAULT NULL REFERENCES reserva (ID)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS transfusion (
+        id INTEGER PRIMARY KEY,
+        FechaTransf DATE NOT NULL,
+        VolumenTransf REAL NOT NULL,
+        id_Reserva INTEGER DEFAULT NULL REFERENCES reserva (ID)
+    )''',
+]
+
+DDL_ASIGNACIONES_SQLITE = [
+    '''CREATE TABLE IF NOT EXISTS asignacion (
+        id INTEGER PRIMARY KEY,
+        id_Solicitud INTEGER NOT NULL REFERENCES solicitud (id),
+        id_Reserva INTEGER NOT NULL REFERENCES reserva (ID),
+        Volumen REAL NOT NULL,
+        Fecha DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )''',
+    "CREATE INDEX IF NOT EXISTS idx_asignacion_solicitud ON asignacion (id_Solicitud)",
+    "CREATE INDEX IF NOT EXISTS idx_asignacion_reserva ON asignacion (id_Reserva)",
+]
+
+
+def _indices_sqlite(ddls) -> List[str]:
+    """Los CREATE INDEX de MySQL con IF NOT EXISTS; los FULLTEXT se omiten (la búsqueda usa LIKE)."""
+    return [re.sub(r"^CREATE\s+(UNIQUE\s+)?INDEX\s+", r"CREATE \1INDEX IF NOT EXISTS ", ddl.strip(),
+                   flags=re.IGNORECASE)
+            for ddl in ddls if not re.match(r"\s*CREATE\s+FULLTEXT", ddl, re.IGNORECASE)]
+
+
+MIGRACIONES_SQLITE = [
+    (1, "Esquema inicial", DDL_TABLAS_SQLITE + [_sembrar_catalogos]),
+    (2, "Índices de búsqueda de donantes", _indices_sqlite(DDL_INDICES_BUSQUEDA)),
+    (3, "Índices de paginación", _indices_sqlite(DDL_INDICES_PAGINACION)),
+    (4, "Índices de consultas frecuentes", _indices_sqlite(DDL_INDICES_CONSULTAS)),
+    (5, "Estado Despachada y asignaciones de solicitudes", DDL_ASIGNACIONES_SQLITE),
+]
+
+
+def _es_sqlite(db) -> bool:
+    return getattr(db, "dialecto", "mysql") == "sqlite"
+
+
+def _migrar_sqlite(db, hasta: Optional[int], informar: Callable) -> List[int]:
+    """
+    migrar() para la BD local: en SQLite el DDL es transaccional, así que todas
+    las migraciones pendientes se aplican en una sola transacción (BEGIN IMMEDIATE
+    también hace de lock entre procesos).
+    """
+    aplicadas_ahora = []
+    with db.transaccion() as cursor:
+        aplicadas = versiones_aplicadas(cursor, DDL_SCHEMA_VERSION_SQLITE)
+        for version, descripcion, pasos in MIGRACIONES_SQLITE:
+            if version in aplicadas or (hasta is not None and version > hasta):
+                continue
+            informar(f"Aplicando {version}: {descripcion}...")
+            for paso in pasos:
+                if callable(paso):
+                    paso(cursor)
+                else:
+                    cursor.execute(paso)
+            cursor.execute("INSERT INTO schema_version (version, descripcion) VALUES (%s, %s)",
+                           (version, descripcion))
+            aplicadas_ahora.append(version)
+    return aplicadas_ahora
+
+
+def _explicar_sqlite(db) -> List[tuple]:
+    """explicar() con EXPLAIN QUERY PLAN: "SEARCH/SCAN tabla USING ... INDEX" es ok; "SCAN tabla" sola, falla."""
+    resultados = []
+    with db.cursor() as cursor:
+        for nombre, tabla, sql, params in CONSULTAS_FRECUENTES:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            planes = [fila[-1] for fila in cursor.fetchall()
+                      if re.search(rf"\b(SEARCH|SCAN) {tabla}\b", fila[-1])]
+            if not planes:
+                resultados.append((nombre, "falla", f"EXPLAIN QUERY PLAN no muestra la tabla {tabla}"))
+            elif "USING" in planes[0]:
+                resultados.append((nombre, "ok", planes[0]))
+            else:
+                resultados.append((nombre, "falla", planes[0]))
+    return resultados
+
+
+if __name__ == "__main__":
+    from conexion import crear_proveedor
+
+    comando = sys.argv[1] if len(sys.argv) > 1 else "aplicar"
+    try:
+        db = crear_proveedor(tamano=1)
+        if comando == "aplicar":
+            aplicadas = migrar(db)
+            print(f"✅ Migraciones aplicadas: {aplicadas}" if aplicadas else "✅ El esquema ya está al día.")
+        elif comando == "estado":
+            for version, descripcion, aplicada in estado(db):
+                print(f"{'✅' if aplicada else '⏳'} {version:3} {descripcion}")
+        elif comando == "explicar":
+            resultados = explicar(db)
+            marcas = {"ok": "✅", "aviso": "⚠️", "falla": "❌"}
+            for nombre, resultado, detalle in resultados:
+                print(f"{marcas[resultado]} {nombre}: {detalle}")
+            sys.exit(1 if any(r == "falla" for _, r, _ in resultados) else 0)
+        else:
+            print(__doc__)
+            sys.exit(2)
+    except (mysql.connector.Error, RuntimeError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
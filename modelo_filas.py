@@ -0,0 +1,178 @@
+"""
+Módulo de modelo de filas.
+Guarda las filas de un listado indexadas por su clave (el ID de la tabla), para
+que al recargar se calcule qué filas se insertaron, cambiaron o desaparecieron,
+y para que las escrituras de la propia pantalla se apliquen localmente sin
+volver a leer toda la tabla.
+"""
+
+import bisect
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+class ModeloFilas:
+    """Filas de un listado, por clave, con diff al recargar y parches locales."""
+
+    def __init__(self, clave: Optional[Callable] = None, orden: Optional[Callable] = None):
+        """
+        Args:
+            clave: Función fila -> clave única (por defecto, la primera columna)
+            orden: Función fila -> valor de orden del listado; se usa para ubicar
+                las filas insertadas localmente (si no se indica, van al final)
+        """
+        self.clave = clave or (lambda fila: fila[0])
+        self.orden = orden
+        self._filas: Dict = {}   # clave -> fila, en el orden del listado
+        self._suscriptores: List[Callable] = []
+        self.cargado = False
+
+    def __len__(self):
+        return len(self._filas)
+
+    def __contains__(self, clave):
+        return clave in self._filas
+
+    def filas(self) -> list:
+        """Filas en el orden del listado."""
+        return list(self._filas.values())
+
+    def obtener(self, clave):
+        return self._filas.get(clave)
+
+    def suscribir(self, funcion: Callable):
+        """Registra funcion(cambios), que se llama después de cada cambio del modelo."""
+        self._suscriptores.append(funcion)
+
+    def _notificar(self, cambios):
+        if cambios["insertadas"] or cambios["actualizadas"] or cambios["borradas"] or cambios["reordenado"]:
+            for funcion in self._suscriptores:
+                funcion(cambios)
+
+    def reemplazar(self, filas: Iterable) -> dict:
+        """
+        Carga el resultado completo de una consulta y calcula el diff con lo anterior.
+
+        Returns:
+            Dict con las claves "insertadas", "actualizadas" y "borradas" (listas de claves)
+            y "reordenado" (bool)
+        """
+        nuevas = {}
+        for fila in filas:
+            nuevas[self.clave(fila)] = tuple(fila)
+
+        anteriores = self._filas
+        cambios = {
+            "insertadas": [k for k in nuevas if k not in anteriores],
+            "actualizadas": [k for k, f in nuevas.items() if k in anteriores and anteriores[k] != f],
+            "borradas": [k for k in anteriores if k not in nuevas],
+            "reordenado": False,
+        }
+        if not cambios["insertadas"] and not cambios["borradas"]:
+            cambios["reordenado"] = list(nuevas) != list(anteriores)
+
+        self._filas = nuevas
+        self.cargado = True
+        self._notificar(cambios)
+        return cambios
+
+    def extender(self, filas: Iterable) -> dict:
+        """Agrega al final la página siguiente de un listado paginado."""
+        cambios = self._sin_cambios()
+        for fila in filas:
+            fila = tuple(fila)
+            clave = self.clave(fila)
+            if clave in self._filas:
+                # Ya estaba (por ejemplo, insertada localmente): queda la versión de la BD
+                if self._filas[clave] != fila:
+                    self._filas[clave] = fila
+                    cambios["actualizadas"].append(clave)
+            else:
+                self._filas[clave] = fila
+                cambios["insertadas"].append(clave)
+        self._notificar(cambios)
+        return cambios
+
+    def actualizar(self, fila) -> dict:
+        """Inserta o reemplaza una fila (después de una escritura de la propia pantalla)."""
+        fila = tuple(fila)
+        clave = self.clave(fila)
+        if clave in self._filas:
+            if self._filas[clave] == fila:
+                return self._sin_cambios()
+            self._filas[clave] = fila
+            cambios = {"insertadas": [], "actualizadas": [clave], "borradas": [], "reordenado": False}
+            if self.orden is not None:
+                cambios["reordenado"] = self._reubicar(clave)
+        else:
+            self._insertar(clave, fila)
+            cambios = {"insertadas": [clave], "actualizadas": [], "borradas": [], "reordenado": False}
+        self._notificar(cambios)
+        return cambios
+
+    def modificar(self, clave, columnas: Dict[int, object]) -> dict:
+        """
+        Cambia algunas columnas de una fila existente.
+
+        Args:
+            clave: Clave de la fila
+            columnas: Dict índice de columna -> valor nuevo
+        """
+        fila = self._filas.get(clave)
+        if fila is None:
+            return self._sin_cambios()
+        nueva = list(fila)
+        for indice, valor in columnas.items():
+            nueva[indice] = valor
+        return self.actualizar(nueva)
+
+    def modificar_varios(self, claves: Iterable, columnas: Dict[int, object]) -> dict:
+        """Aplica el mismo cambio de columnas a varias filas, con un solo aviso (no las reubica)."""
+        actualizadas = []
+        for clave in claves:
+            fila = self._filas.get(clave)
+            if fila is None:
+                continue
+            nueva = list(fila)
+            for indice, valor in columnas.items():
+                nueva[indice] = valor
+            nueva = tuple(nueva)
+            if nueva != fila:
+                self._filas[clave] = nueva
+                actualizadas.append(clave)
+        cambios = {"insertadas": [], "actualizadas": actualizadas, "borradas": [], "reordenado": False}
+        self._notificar(cambios)
+        return cambios
+
+    def quitar(self, *claves) -> dict:
+        """Quita filas por clave (después de borrarlas en la BD)."""
+        borradas = [k for k in claves if self._filas.pop(k, None) is not None]
+        cambios = {"insertadas": [], "actualizadas": [], "borradas": borradas, "reordenado": False}
+        self._notificar(cambios)
+        return cambios
+
+    def _sin_cambios(self):
+        return {"insertadas": [], "actualizadas": [], "borradas": [], "reordenado": False}
+
+    def _insertar(self, clave, fila):
+        """Ubica la fila según self.orden (el dict conserva el orden de inserción)."""
+        if self.orden is None:
+            self._filas[clave] = fila
+            return
+        filas = list(self._filas.values())
+        posicion = bisect.bisect_right([self.orden(f) for f in filas], self.orden(fila))
+        filas.insert(posicion, fila)
+        self._filas = {self.clave(f): f for f in filas}
+
+    def _reubicar(self, clave) -> bool:
+        """Mueve una fila editada si su valor de orden cambió. Devuelve True si se movió."""
+        filas = list(self._filas.values())
+        indice = list(self._filas).index(clave)
+        fila = filas[indice]
+        valor = self.orden(fila)
+        antes_ok = indice == 0 or self.orden(filas[indice - 1]) <= valor
+        despues_ok = indice == len(filas) - 1 or valor <= self.orden(filas[indice + 1])
+        if antes_ok and despues_ok:
+            return False
+        del self._filas[clave]
+        self._insertar(clave, fila)
+        return True
@@ -0,0 +1,265 @@
+"""
+Módulo de asignación óptima de sangre.
+Resuelve todas las solicitudes abiertas juntas como un problema de flujo de costo mínimo
+sobre el grafo de compatibilidades 8x8, en lugar de atender cada solicitud por separado.
+"""
+
+import heapq
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+from compatibilidad_sangre import COMPATIBILIDADES_ESTANDAR
+from asignacion_lotes import EPSILON, planificar_fifo
+from tabla_compatibilidad import TablaCompatibilidad
+
+# Premio por ml entregado. Debe ser mucho mayor que cualquier costo del objetivo,
+# así primero se maximiza el volumen atendido y después se minimiza el costo.
+PREMIO_ML = 1e6
+
+# Cantidad de receptores que puede atender cada tipo donante (mayor = más valioso)
+_RECEPTORES_POR_DONANTE = {}
+for _receptor, _donables in COMPATIBILIDADES_ESTANDAR.items():
+    for _donante in _donables:
+        _RECEPTORES_POR_DONANTE[_donante] = _RECEPTORES_POR_DONANTE.get(_donante, 0) + 1
+
+
+def costo_estandar(tipo_donante: str, tipo_receptor: str, dias_para_vencer: int) -> float:
+    """
+    Objetivo por defecto: costo por ml de usar sangre de un tipo donante en un receptor.
+
+    - Las unidades más próximas a vencer son más baratas (se usan antes y no se pierden).
+    - Los tipos que sirven a muchos receptores (O-, O+...) son más caros, para reservarlos.
+    - Usar un tipo distinto al del receptor tiene un recargo.
+
+    Args:
+        tipo_donante: Tipo de la unidad de reserva
+        tipo_receptor: Tipo del paciente
+        dias_para_vencer: Días hasta el vencimiento de la unidad
+
+    Returns:
+        Costo por ml (no negativo)
+    """
+    costo = float(max(dias_para_vencer, 0))
+    costo += 10.0 * (_RECEPTORES_POR_DONANTE.get(tipo_donante, 1) - 1)
+    if tipo_donante != tipo_receptor:
+        costo += 5.0
+    return costo
+
+
+class _RedFlujo:
+    """Red de flujo con aristas residuales para el algoritmo primal-dual."""
+
+    def __init__(self, n: int):
+        self.n = n
+        # Cada arista: [destino, capacidad, costo, índice de la arista inversa]
+        self.aristas = [[] for _ in range(n)]
+
+    def agregar(self, origen: int, destino: int, capacidad: float, costo: float) -> int:
+        self.aristas[origen].append([destino, capacidad, costo, len(self.aristas[destino])])
+        self.aristas[destino].append([origen, 0.0, -costo, len(self.aristas[origen]) - 1])
+        return len(self.aristas[origen]) - 1
+
+    def _potenciales_iniciales(self, fuente: int) -> List[float]:
+        # Bellman-Ford (SPFA): hay costos negativos pero ningún ciclo negativo
+        inf = float("inf")
+        dist = [inf] * self.n
+        dist[fuente] = 0.0
+        cola = [fuente]
+        en_cola = [False] * self.n
+        en_cola[fuente] = True
+        while cola:
+            siguiente = []
+            for u in cola:
+                en_cola[u] = False
+                for v, cap, costo, _ in self.aristas[u]:
+                    if cap > EPSILON and dist[u] + costo < dist[v] - 1e-9:
+                        dist[v] = dist[u] + costo
+                        if not en_cola[v]:
+                            en_cola[v] = True
+                            siguiente.append(v)
+            cola = siguiente
+        return [d if d < inf else 0.0 for d in dist]
+
+    def flujo_costo_minimo(self, fuente: int, sumidero: int):
+        """Envía flujo mientras haya caminos de costo negativo (maximiza el beneficio)."""
+        inf = float("inf")
+        pot = self._potenciales_iniciales(fuente)
+        while True:
+            # Dijkstra con costos reducidos
+            dist = [inf] * self.n
+            dist[fuente] = 0.0
+            heap = [(0.0, fuente)]
+            while heap:
+                d, u = heapq.heappop(heap)
+                if d > dist[u]:
+                    continue
+                pu = pot[u]
+                for v, cap, costo, _ in self.aristas[u]:
+                    if cap > EPSILON:
+                        nd = d + costo + pu - pot[v]
+                        if nd < dist[v] - 1e-9:
+                            dist[v] = nd
+                            heapq.heappush(heap, (nd, v))
+            if dist[sumidero] == inf:
+                return
+            for v in range(self.n):
+                if dist[v] < inf:
+                    pot[v] += dist[v]
+            # Costo real del camino más corto; si ya no da beneficio, terminar
+            if pot[sumidero] - pot[fuente] >= -1e-9:
+                return
+            # Aumentar por todos los caminos admisibles (costo reducido 0) de esta fase
+            while self._aumentar_fase(fuente, sumidero, pot) > EPSILON:
+                pass
+
+    def _aumentar_fase(self, fuente: int, sumidero: int, pot: List[float]) -> float:
+        total = 0.0
+        actual = [0] * self.n
+        while True:
+            # DFS iterativo por aristas admisibles
+            camino = []
+            u = fuente
+            visitados = {fuente}
+            while u != sumidero:
+                lista = self.aristas[u]
+                avanzo = False
+                while actual[u] < len(lista):
+                    v, cap, costo, _ = lista[actual[u]]
+                    if (cap > EPSILON and v not in visitados
+                            and abs(costo + pot[u] - pot[v]) <= 1e-7):
+                        camino.append((u, actual[u]))
+                        visitados.add(v)
+                        u = v
+                        avanzo = True
+                        break
+                    actual[u] += 1
+                if not avanzo:
+                    if not camino:
+                        return total
+                    # Retroceder: esta arista no lleva al sumidero
+                    u, _ = camino.pop()
+                    actual[u] += 1
+            cuello = min(self.aristas[a][i][1] for a, i in camino)
+            for a, i in camino:
+                arista = self.aristas[a][i]
+                arista[1] -= cuello
+                self.aristas[arista[0]][arista[3]][1] += cuello
+            total += cuello
+
+
+def planificar_optimo(
+    solicitudes,
+    reservas,
+    compatibilidades,
+    objetivo: Callable[[str, str, int], float] = costo_estandar,
+    hoy: Optional[date] = None,
+) -> dict:
+    """
+    Planifica la asignación de todas las solicitudes juntas minimizando el costo del objetivo.
+
+    Las reservas se agrupan por (tipo, vencimiento) y las solicitudes por tipo receptor,
+    así la red tiene a lo sumo 8 x fechas + 8 nodos sin importar cuántas unidades haya.
+    Después se reparte el flujo de cada tipo receptor entre sus solicitudes (en el orden
+    recibido) y entre las unidades de cada grupo (por ID).
+
+    Args:
+        solicitudes: Lista de tuplas (id_solicitud, tipo_sangre, volumen)
+        reservas: Dict tipo -> lista de [id_reserva, volumen_disp, vencimiento]
+        compatibilidades: Dict receptor -> lista de tipos donables
+        objetivo: Función (tipo_donante, tipo_receptor, dias_para_vencer) -> costo por ml
+        hoy: Fecha de referencia para los días al vencimiento (por defecto, hoy)
+
+    Returns:
+        Dict con "asignaciones", "aceptadas" y "pendientes", igual que planificar_fifo
+    """
+    hoy = hoy or date.today()
+    tabla = TablaCompatibilidad(compatibilidades)
+
+    demanda = {}
+    for _, tipo, volumen in solicitudes:
+        demanda[tipo] = demanda.get(tipo, 0.0) + float(volumen)
+    receptores = list(demanda)
+    indice_receptor = {tipo: i for i, tipo in enumerate(receptores)}
+
+    # Grupos de oferta: (tipo, vencimiento) -> filas [id, restante]
+    grupos: Dict[tuple, List[list]] = {}
+    for tipo, filas in reservas.items():
+        for fila in filas:
+            if fila[1] and float(fila[1]) > EPSILON:
+                grupos.setdefault((tipo, fila[2]), []).append([fila[0], float(fila[1])])
+    claves = list(grupos)
+
+    # Nodos: 0 fuente, 1 sumidero, 2.. grupos, luego receptores
+    fuente, sumidero = 0, 1
+    base_receptor = 2 + len(claves)
+    red = _RedFlujo(base_receptor + len(receptores))
+    aristas_grupo = []  # (nodo grupo, índice arista, tipo receptor, costo)
+    for g, (tipo, vencimiento) in enumerate(claves):
+        nodo = 2 + g
+        red.agregar(fuente, nodo, sum(f[1] for f in grupos[(tipo, vencimiento)]), 0.0)
+        dias = (vencimiento - hoy).days if vencimiento is not None else 0
+        for receptor in receptores:
+            if tabla.es_compatible(receptor, tipo):
+                costo = objetivo(tipo, receptor, dias)
+                indice = red.agregar(nodo, base_receptor + indice_receptor[receptor], float("inf"), costo)
+                aristas_grupo.append((nodo, indice, receptor, costo))
+    for receptor in receptores:
+        red.agregar(base_receptor + indice_receptor[receptor], sumidero, demanda[receptor], -PREMIO_ML)
+
+    red.flujo_costo_minimo(fuente, sumidero)
+
+    # Flujo por tipo receptor: lista de (costo, nodo grupo, volumen)
+    flujo = {receptor: [] for receptor in receptores}
+    for nodo, indice, receptor, costo in aristas_grupo:
+        arista = red.aristas[nodo][indice]
+        enviado = red.aristas[arista[0]][arista[3]][1]
+        if enviado > EPSILON:
+            flujo[receptor].append([costo, nodo, enviado])
+
+    plan = {"asignaciones": [], "aceptadas": [], "pendientes": []}
+    inicio_fila = {}
+    for receptor in receptores:
+        piezas = sorted(flujo[receptor], key=lambda p: p[0])
+        disponible = sum(p[2] for p in piezas)
+        for id_sol, tipo_sol, volumen in solicitudes:
+            if tipo_sol != receptor:
+                continue
+            faltante = float(volumen)
+            if faltante > disponible + EPSILON:
+                plan["pendientes"].append(id_sol)
+                continue
+            disponible -= faltante
+            plan["aceptadas"].append(id_sol)
+            for pieza in piezas:
+                if faltante <= EPSILON:
+                    break
+                if pieza[2] <= EPSILON:
+                    continue
+                clave = claves[pieza[1] - 2]
+                filas = grupos[clave]
+                i = inicio_fila.get(clave, 0)
+                while faltante > EPSILON and pieza[2] > EPSILON and i < len(filas):
+                    tomado = min(filas[i][1], pieza[2], faltante)
+                    if tomado > EPSILON:
+                        plan["asignaciones"].append((id_sol, filas[i][0], tomado, clave[0]))
+                        filas[i][1] -= tomado
+                        pieza[2] -= tomado
+                        faltante -= tomado
+                    if filas[i][1] <= EPSILON:
+                        i += 1
+                inicio_fila[clave] = i
+
+    # El flujo se reparte solicitud por solicitud y puede sobrar volumen que no
+    # alcanza para una completa; con ese sobrante se intenta cubrir las pendientes.
+    if plan["pendientes"]:
+        sobrante = {}
+        for (tipo, vencimiento) in sorted(grupos, key=lambda c: (c[1] is None, c[1] or hoy)):
+            for id_res, restante in grupos[(tipo, vencimiento)]:
+                if restante > EPSILON:
+                    sobrante.setdefault(tipo, []).append([id_res, restante, vencimiento])
+        pendientes = set(plan["pendientes"])
+        extra = planificar_fifo([s for s in solicitudes if s[0] in pendientes], sobrante, compatibilidades)
+        plan["asignaciones"].extend(extra["asignaciones"])
+        plan["aceptadas"].extend(extra["aceptadas"])
+        plan["pendientes"] = extra["pendientes"]
+    return plan
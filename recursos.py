@@ -0,0 +1,96 @@
+"""
+Módulo de recursos gráficos.
+Decodifica cada imagen una sola vez por tamaño y guarda los PhotoImage en una
+caché LRU acotada, para que volver a la pantalla de inicio no vuelva a leer ni
+redimensionar el JPEG. Las rutas se resuelven junto al código o, en el
+ejecutable de PyInstaller, dentro del paquete (sys._MEIPASS).
+"""
+
+import os
+import sys
+import threading
+import tkinter as tk
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from PIL import Image, ImageTk
+
+LOGO = "imagenbanco.jpg"
+
+# Tamaño del logo en la pantalla de ingreso
+TAMANO_LOGO_INGRESO = (700, 700)
+
+# Imágenes (ruta, tamaño) que se mantienen decodificadas
+MAX_IMAGENES = 8
+
+
+def ruta_recurso(nombre: str) -> str:
+    """Ruta absoluta de un recurso, junto al código o dentro del ejecutable de PyInstaller."""
+    base = getattr(sys, "_MEIPASS", None) or os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base, nombre)
+
+
+class CacheImagenes:
+    """PhotoImage por (ruta, tamaño), con desalojo del menos usado."""
+
+    def __init__(self, maximo: int = MAX_IMAGENES):
+        self.maximo = maximo
+        self._imagenes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, nombre: str, tamano: Optional[Tuple[int, int]] = None) -> ImageTk.PhotoImage:
+        """
+        Devuelve la imagen lista para usar en un widget.
+
+        Args:
+            nombre: Archivo del recurso (relativo al paquete)
+            tamano: (ancho, alto) al que se redimensiona, o None para el tamaño original
+
+        Raises:
+            OSError: si el archivo no existe o no es una imagen válida
+        """
+        clave = (ruta_recurso(nombre), tuple(tamano) if tamano else None)
+        with self._lock:
+            imagen = self._imagenes.get(clave)
+            if imagen is not None:
+                self._imagenes.move_to_end(clave)
+                return imagen
+
+        with Image.open(clave[0]) as original:
+            original.load()
+            decodificada = original.resize(clave[1], Image.LANCZOS) if clave[1] else original.copy()
+        imagen = ImageTk.PhotoImage(decodificada)
+
+        with self._lock:
+            self._imagenes[clave] = imagen
+            self._imagenes.move_to_end(clave)
+            # Los widgets que la muestran guardan su propia referencia: desalojar no la borra de pantalla
+            while len(self._imagenes) > self.maximo:
+                self._imagenes.popitem(last=False)
+        return imagen
+
+    def limpiar(self):
+        with self._lock:
+            self._imagenes.clear()
+
+
+IMAGENES = CacheImagenes()
+
+
+def imagen(nombre: str, tamano: Optional[Tuple[int, int]] = None) -> ImageTk.PhotoImage:
+    """Atajo de IMAGENES.obtener()."""
+    return IMAGENES.obtener(nombre, tamano)
+
+
+def mostrar_logo(parent, tamano: Optional[Tuple[int, int]] = None) -> tk.Label:
+    """Muestra el logo del banco en parent (o un aviso si no se encuentra)."""
+    try:
+        logo = imagen(LOGO, tamano)
+    except (OSError, tk.TclError):
+        etiqueta = tk.Label(parent, text="No se encontró el logo.", font=("Arial", 16), bg="white")
+        etiqueta.pack()
+        return etiqueta
+    etiqueta = tk.Label(parent, image=logo, bg="white")
+    etiqueta.image = logo
+    etiqueta.pack(pady=20)
+    return etiqueta
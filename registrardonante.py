@@ -1,15 +1,29 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
 from tkcalendar import DateEntry, Calendar
-from PIL import Image, ImageTk
+from recursos import mostrar_logo
+from gestor_pantallas import volver_inicio
 import mysql.connector
 import re  # Para validar email
 from datetime import datetime
+from cache_catalogos import tipos_sangre as catalogo_tipos_sangre
+from busqueda import INDICE_DONANTES
+from versiones_datos import registrar_escritura
+from ejecutor_consultas import obtener_ejecutor
+from tabla_virtual import TablaVirtual
+from modelo_filas import ModeloFilas
+from repositorios import ListadoPaginado, repositorio_donantes
 
 class Donante:
-    def __init__(self, parent, conn):
+    def __init__(self, parent, db):
         self.parent = parent
-        self.conn = conn
+        self.db = db
+        self.ejecutor = obtener_ejecutor(parent)
+        # Donantes existentes por páginas de (apellido, nombre, id), como en VerDonante
+        self.modelo = ModeloFilas(orden=lambda fila: (fila[2] or "", fila[1] or "", fila[0]))
+        self.modelo.suscribir(lambda cambios: self._mostrar_donantes())
+        self.listado = ListadoPaginado(repositorio_donantes(db), self.modelo, self.ejecutor,
+                                       "Donante.cargar_donantes", self._error_cargar_donantes)
 
         tk.Label(parent, text="Registrar Donante", font=("Arial", 16), bg="white").pack(pady=10)
 
@@ -55,28 +69,18 @@ class Donante:
 
         # Tabla de donantes existentes
         tk.Label(parent, text="Donantes existentes:", font=("Arial", 12), bg="white").pack(anchor="w", padx=20, pady=(8,0))
-        donors_frame = tk.Frame(parent, bg="white")
-        self.donors_frame_ref = donors_frame
-        donors_frame.pack(fill="both", expand=False, padx=20, pady=(4,12))
-
         cols = ("ID", "Nombre", "Apellido", "FechaN", "Sexo", "DNI", "Celular", "Correo", "TipoSangre")
-        self.donors_tree = ttk.Treeview(donors_frame, columns=cols, show="headings", height=6)
-        for c in cols:
-            self.donors_tree.heading(c, text=c)
-            self.donors_tree.column(c, width=100)
-        vsb = tk.Scrollbar(donors_frame, orient="vertical", command=self.donors_tree.yview)
-        self.donors_tree.configure(yscrollcommand=vsb.set)
-        vsb.pack(side="right", fill="y")
-        self.donors_tree.pack(side="left", fill="both", expand=True)
+        # Fila del repositorio: (id, nombre, apellido, fecha_n, sexo, DNI, telefono, Correo, direccion, UltimaD, tipo)
+        self.donors_tree = TablaVirtual(parent, cols, alto=6, formatear=lambda fila: fila[:8] + fila[10:],
+                                        al_pedir_mas=self.listado.pedir_mas)
+        self.donors_tree.pack(fill="both", expand=False, padx=20, pady=(4,12))
 
         # Cargar inicialmente la lista de donantes
         self.cargar_donantes()
 
     def cargar_tipos_sangre(self):
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT TipodeSangre FROM tipodesangre")
-            return [row[0] for row in cursor.fetchall()]
+            return catalogo_tipos_sangre(self.db)
         except mysql.connector.Error as e:
             messagebox.showerror("Error", f"Error al cargar tipos de sangre: {e}")
             return []
@@ -122,26 +126,31 @@ class Donante:
             sexo_abreviado = sexo_map.get(datos["Sexo:"], datos["Sexo:"][0].upper())
 
             # Guardar en la BD
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                INSERT INTO donante (nombre, apellido, fecha_n, sexo, dni, telefono, correo, direccion, ultimaD, id_TipodeSangre)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, (
-                    SELECT id FROM tipodesangre WHERE TipodeSangre = %s
+            with self.db.transaccion() as cursor:
+                cursor.execute('''
+                    INSERT INTO donante (nombre, apellido, fecha_n, sexo, dni, telefono, correo, direccion, ultimaD, id_TipodeSangre)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, (
+                        SELECT id FROM tipodesangre WHERE TipodeSangre = %s
+                    ))
+                ''', (
+                    datos["Nombre:"], datos["Apellido:"], datos["Fecha de Nacimiento:"],
+                    sexo_abreviado, datos["DNI:"], datos["Celular:"], datos["Correo:"],
+                    datos["Direccion:"], datos["Ultima Donacion:"], datos["Tipo de Sangre:"]
                 ))
-            ''', (
-                datos["Nombre:"], datos["Apellido:"], datos["Fecha de Nacimiento:"],
-                sexo_abreviado, datos["DNI:"], datos["Celular:"], datos["Correo:"],
-                datos["Direccion:"], datos["Ultima Donacion:"], datos["Tipo de Sangre:"]
+                nuevo_id = cursor.lastrowid
+            registrar_escritura("donante")
+
+            # Mantener al día el índice de búsqueda y la tabla sin volver a leer los donantes
+            INDICE_DONANTES.agregar(nuevo_id, datos["DNI:"], datos["Nombre:"], datos["Apellido:"])
+            self.modelo.actualizar((
+                nuevo_id, datos["Nombre:"], datos["Apellido:"], datos["Fecha de Nacimiento:"], sexo_abreviado,
+                datos["DNI:"], datos["Celular:"], datos["Correo:"], datos["Direccion:"],
+                datos["Ultima Donacion:"], datos["Tipo de Sangre:"],
             ))
-            self.conn.commit()
-            nuevo_id = cursor.lastrowid
 
             # Se ha eliminado la lógica que agregaba una donación estándar automática.
             # Ahora solo se registra el donante.
             messagebox.showinfo("Éxito", f"Donante {datos['Nombre:']} registrado correctamente.")
-
-            # Recargar tabla de donantes
-            self.cargar_donantes()
             self.limpiar()
 
         except ValueError as e:
@@ -178,33 +187,37 @@ class Donante:
         for widget in self.parent.winfo_children():
             widget.destroy()
 
+    def refrescar(self):
+        """Al volver a la pantalla: recarga la tabla de donantes existentes (con diff)."""
+        self.cargar_donantes()
+
+    def _vaciar_formulario(self):
+        for entry in self.entries.values():
+            if isinstance(entry, ttk.Combobox):
+                entry.set("")
+            else:
+                entry.delete(0, tk.END)
+        self.tipo_sangre_cb.set("")
+
     def limpiar(self):
+        # Dentro del menú la pantalla se conserva: se vacía el formulario y se vuelve al inicio
+        if volver_inicio(self.parent):
+            self._vaciar_formulario()
+            return
         # Limpia pantalla y vuelve a mostrar logo
         self.cancelar()
-        logo_path = "imagenbanco.jpg"
-        try:
-            image = Image.open(logo_path)
-            logo = ImageTk.PhotoImage(image)
-            logo_label = tk.Label(self.parent, image=logo, bg="white")
-            logo_label.image = logo
-            logo_label.pack(pady=20)
-        except Exception:
-            tk.Label(self.parent, text="No se encontró el logo.", font=("Arial", 16), bg="white").pack()
+        mostrar_logo(self.parent)
 
     def cargar_donantes(self):
-        try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                SELECT d.id, d.nombre, d.apellido, d.fecha_n, d.sexo, d.dni, d.telefono, d.correo, ts.TipodeSangre
-                FROM donante d
-                LEFT JOIN tipodesangre ts ON d.id_TipodeSangre = ts.id
-                ORDER BY d.apellido ASC
-            ''')
-            rows = cursor.fetchall()
-            # Limpiar
-            for item in self.donors_tree.get_children():
-                self.donors_tree.delete(item)
-            for r in rows:
-                self.donors_tree.insert("", "end", values=r)
-        except mysql.connector.Error as e:
-            messagebox.showerror("Error", f"No se pudieron cargar los donantes: {e}")
+        """Pide la primera página de donantes en segundo plano; las siguientes llegan al hacer scroll."""
+        def al_terminar(cambios):
+            if not any(cambios.values()):
+                self._mostrar_donantes()
+
+        self.listado.recargar(al_terminar)
+
+    def _mostrar_donantes(self):
+        self.donors_tree.cargar(self.modelo.filas(), completa=self.listado.completo)
+
+    def _error_cargar_donantes(self, e):
+        messagebox.showerror("Error", f"No se pudieron cargar los donantes: {e}")
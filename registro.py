@@ -0,0 +1,71 @@
+"""
+Módulo de registro de errores.
+Los errores de los trabajos en segundo plano (consultas del ejecutor, recarga del
+inventario, barrido de vencimientos, oyentes de escrituras) no tienen una
+ventana a la cual avisar: se guardan con logging en un archivo rotativo dentro
+de la carpeta de datos del usuario. El ejecutable se arma sin consola
+(console=False), así que un print se pierde.
+"""
+
+import logging
+import os
+import sys
+import threading
+from logging.handlers import RotatingFileHandler
+
+# Nombre de la carpeta de datos de la aplicación
+NOMBRE_APLICACION = "BancoDeSangre"
+
+# Archivo de errores (vacío para no escribir archivo)
+ARCHIVO_ERRORES = os.environ.get("BANCO_LOG_ERRORES", "errores.log")
+TAMANO_LOG = 1024 * 1024
+ARCHIVOS_LOG = 3
+
+_lock = threading.Lock()
+
+
+def carpeta_datos() -> str:
+    """
+    Carpeta de datos del usuario (%LOCALAPPDATA%\\BancoDeSangre en Windows,
+    ~/.local/share/BancoDeSangre o $XDG_DATA_HOME en Linux); se crea si no existe.
+    """
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    carpeta = os.path.join(base, NOMBRE_APLICACION)
+    os.makedirs(carpeta, exist_ok=True)
+    return carpeta
+
+
+def manejador_archivo(nombre: str) -> logging.Handler:
+    """
+    RotatingFileHandler para un archivo de la carpeta de datos.
+
+    Si el archivo no se puede abrir devuelve un NullHandler (no hay dónde avisarlo).
+    """
+    if not nombre:
+        return logging.NullHandler()
+    try:
+        ruta = nombre if os.path.isabs(nombre) else os.path.join(carpeta_datos(), nombre)
+        return RotatingFileHandler(ruta, maxBytes=TAMANO_LOG, backupCount=ARCHIVOS_LOG,
+                                   encoding="utf-8", delay=True)
+    except OSError:
+        return logging.NullHandler()
+
+
+def obtener_logger(modulo: str) -> logging.Logger:
+    """
+    Logger "bancodesangre.<modulo>"; la primera llamada configura el archivo de errores.
+
+    Args:
+        modulo: Nombre corto del módulo que registra (ej: "ejecutor_consultas")
+    """
+    raiz = logging.getLogger("bancodesangre")
+    with _lock:
+        if not raiz.handlers:
+            manejador = manejador_archivo(ARCHIVO_ERRORES)
+            manejador.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(threadName)s %(message)s"))
+            raiz.addHandler(manejador)
+            raiz.setLevel(logging.WARNING)
+    return logging.getLogger(f"bancodesangre.{modulo}")
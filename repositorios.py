@@ -0,0 +1,282 @@
+"""
+Módulo de repositorios paginados.
+Lee los listados de reserva, donante, donaciones y solicitud por páginas usando
+keyset pagination (WHERE clave > última clave vista ORDER BY clave LIMIT n) en
+lugar de traer la tabla completa con fetchall(). Así el tiempo hasta la primera
+página y la memoria no dependen de cuántos años de historia tenga la base.
+"""
+
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Filas por página (lo que se pide al servidor de una vez)
+TAMANO_PAGINA = 500
+
+# Filas por fetchmany() al leer una página con cursor sin buffer
+TAMANO_LOTE = 100
+
+# Máximo de ids en un IN (...) al traer filas puntuales
+LIMITE_IDS = 1000
+
+# Índices compuestos que usa la paginación (ver migraciones)
+DDL_INDICES_PAGINACION = [
+    "CREATE INDEX idx_reserva_vencimiento_id ON reserva (Vencimiento, ID)",
+    "CREATE INDEX idx_donante_apellido_nombre_id ON donante (apellido, nombre, id)",
+]
+
+
+def condicion_keyset(columnas: Sequence[str], descendente: bool = False) -> str:
+    """
+    Condición "(a, b, c) > (%s, %s, %s)" escrita en forma expandida
+    (a > x OR (a = x AND b > y) OR ...), que MySQL resuelve con un rango sobre
+    el índice compuesto.
+
+    Los parámetros se arman con parametros_keyset().
+    """
+    operador = "<" if descendente else ">"
+    partes = []
+    for i, columna in enumerate(columnas):
+        iguales = [f"{c} = %s" for c in columnas[:i]]
+        partes.append("(" + " AND ".join(iguales + [f"{columna} {operador} %s"]) + ")")
+    return "(" + " OR ".join(partes) + ")"
+
+
+def parametros_keyset(valores: Sequence) -> tuple:
+    """Parámetros para condicion_keyset(): x, x, y, x, y, z..."""
+    params = []
+    for i in range(len(valores)):
+        params.extend(valores[:i + 1])
+    return tuple(params)
+
+
+class RepositorioPaginado:
+    """Recorre una consulta por páginas ordenadas por una clave única."""
+
+    def __init__(
+        self,
+        db,
+        select: str,
+        orden: Sequence[str],
+        indices_clave: Sequence[int],
+        descendente: bool = False,
+        filtro: Optional[str] = None,
+        params: tuple = (),
+        tamano: int = TAMANO_PAGINA,
+    ):
+        """
+        Args:
+            db: ProveedorConexiones
+            select: SELECT ... FROM ... [JOIN ...] sin WHERE ni ORDER BY
+            orden: Columnas SQL del orden; juntas deben ser únicas (terminan en el ID)
+            indices_clave: Posición de cada columna de orden dentro de la fila
+            descendente: Orden descendente
+            filtro: Condición fija adicional (con %s)
+            params: Parámetros del filtro
+            tamano: Filas por página
+        """
+        self.db = db
+        self.select = select
+        self.orden = tuple(orden)
+        self.indices_clave = tuple(indices_clave)
+        self.descendente = descendente
+        self.filtro = filtro
+        self.params = tuple(params)
+        self.tamano = tamano
+
+    def clave_de(self, fila) -> tuple:
+        """Valores de la clave de orden de una fila (el 'cursor' de la página siguiente)."""
+        return tuple(fila[i] for i in self.indices_clave)
+
+    def _leer(self, sql: str, params: tuple) -> list:
+        """Lee el resultado con un cursor sin buffer, de a TAMANO_LOTE filas."""
+        filas = []
+        with self.db.cursor(buffered=False) as cursor:
+            cursor.execute(sql, params)
+            while True:
+                lote = cursor.fetchmany(TAMANO_LOTE)
+                if not lote:
+                    break
+                filas.extend(lote)
+        return filas
+
+    def pagina(self, despues: Optional[tuple] = None) -> Tuple[list, Optional[tuple]]:
+        """
+        Lee una página.
+
+        Args:
+            despues: Clave de la última fila de la página anterior (None para la primera)
+
+        Returns:
+            Tupla (filas, clave para la página siguiente o None si no hay más)
+        """
+        condiciones, params = [], []
+        if self.filtro:
+            condiciones.append(self.filtro)
+            params.extend(self.params)
+        if despues is not None:
+            condiciones.append(condicion_keyset(self.orden, self.descendente))
+            params.extend(parametros_keyset(despues))
+
+        direccion = " DESC" if self.descendente else ""
+        sql = self.select
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        sql += " ORDER BY " + ", ".join(c + direccion for c in self.orden) + " LIMIT %s"
+        params.append(self.tamano)
+
+        filas = self._leer(sql, tuple(params))
+        siguiente = self.clave_de(filas[-1]) if len(filas) == self.tamano else None
+        return filas, siguiente
+
+    def iterar(self) -> Iterator:
+        """Recorre todas las filas página por página, sin tenerlas todas en memoria."""
+        despues = None
+        while True:
+            filas, despues = self.pagina(despues)
+            yield from filas
+            if despues is None:
+                break
+
+    def por_ids(self, columna: str, ids: Iterable, limite: int = LIMITE_IDS) -> list:
+        """
+        Filas cuyo valor en columna está en ids (ej: donaciones de los donantes encontrados).
+        Se piden como mucho `limite` ids, en el orden del listado.
+        """
+        ids = list(ids)[:limite]
+        if not ids:
+            return []
+        condiciones = [f"{columna} IN ({', '.join(['%s'] * len(ids))})"]
+        params = list(ids)
+        if self.filtro:
+            condiciones.append(self.filtro)
+            params.extend(self.params)
+        direccion = " DESC" if self.descendente else ""
+        sql = (self.select + " WHERE " + " AND ".join(condiciones)
+               + " ORDER BY " + ", ".join(c + direccion for c in self.orden))
+        return self._leer(sql, tuple(params))
+
+
+# ---------------------------------------------------------------- listados
+
+def repositorio_reserva(db) -> RepositorioPaginado:
+    """
+    Reservas por (Vencimiento, ID): fila (ID, VolumenDisp, Vencimiento, TipodeSangre, Estado).
+    Las bolsas ya asignadas quedan con VolumenDisp = 0 y no se listan.
+    """
+    return RepositorioPaginado(
+        db,
+        "SELECT r.ID, r.VolumenDisp, r.Vencimiento, r.TipodeSangre, r.Estado FROM reserva r",
+        orden=("r.Vencimiento", "r.ID"),
+        indices_clave=(2, 0),
+        filtro="r.VolumenDisp > 0",
+    )
+
+
+def repositorio_donantes(db) -> RepositorioPaginado:
+    """Donantes por (apellido, nombre, id)."""
+    return RepositorioPaginado(
+        db,
+        """SELECT d.id, d.nombre, d.apellido, d.fecha_n, d.sexo, d.DNI, d.telefono, d.Correo,
+                  d.direccion, d.UltimaD, ts.TipodeSangre
+           FROM donante d
+           LEFT JOIN TipodeSangre ts ON ts.id = d.id_TipodeSangre""",
+        orden=("d.apellido", "d.nombre", "d.id"),
+        indices_clave=(2, 1, 0),
+    )
+
+
+def repositorio_donaciones(db) -> RepositorioPaginado:
+    """
+    Donaciones, las más recientes primero (por ID de reserva):
+    fila (id_Donante, nombre, apellido, dni, FechaExtraccion, VolumenDisp, Estado, ID).
+    """
+    return RepositorioPaginado(
+        db,
+        """SELECT r.id_Donante, d.nombre, d.apellido, d.dni,
+                  r.FechaExtraccion, r.VolumenDisp, r.Estado, r.ID
+           FROM reserva r
+           LEFT JOIN donante d ON r.id_Donante = d.id""",
+        orden=("r.ID",),
+        indices_clave=(7,),
+        descendente=True,
+    )
+
+
+def repositorio_solicitudes(db) -> RepositorioPaginado:
+    """Solicitudes por id: fila (id, Nombre, direccion, telefono, VolumenSolic, Estado, TipodeSangre)."""
+    return RepositorioPaginado(
+        db,
+        """SELECT s.id, h.Nombre, h.direccion, h.telefono, s.VolumenSolic, s.Estado, ts.TipodeSangre
+           FROM hospital h
+           JOIN solicitud s ON h.id = s.id_Hospital
+           JOIN tipodesangre ts ON ts.id = s.id_TipodeSangre""",
+        orden=("s.id",),
+        indices_clave=(0,),
+    )
+
+
+class ListadoPaginado:
+    """
+    Llena un ModeloFilas con un repositorio paginado, en segundo plano:
+    recargar() trae la primera página y pedir_mas() la siguiente (la tabla
+    virtual la pide al acercarse al final).
+    """
+
+    def __init__(self, repositorio: RepositorioPaginado, modelo, ejecutor, clave: str,
+                 al_fallar: Optional[Callable] = None):
+        """
+        Args:
+            repositorio: Origen de las páginas
+            modelo: ModeloFilas que recibe las filas
+            ejecutor: EjecutorConsultas de la pantalla
+            clave: Clave de la consulta en el ejecutor
+            al_fallar: Callback con la excepción, en el hilo de Tk
+        """
+        self.repositorio = repositorio
+        self.modelo = modelo
+        self.ejecutor = ejecutor
+        self.clave = clave
+        self.al_fallar = al_fallar
+        self.siguiente = None
+        self.completo = False
+        self.cargando = False
+        self._al_terminar = None
+
+    def recargar(self, al_terminar: Optional[Callable] = None):
+        """
+        Vuelve a la primera página (descarta una página siguiente que esté en camino).
+
+        Args:
+            al_terminar: Callback con los cambios del modelo, después de cada página
+        """
+        self.cargando = True
+        self._al_terminar = al_terminar
+        self.ejecutor.ejecutar(self.clave, self.repositorio.pagina, self._primera, self._fallo)
+
+    def pedir_mas(self):
+        if self.completo or self.cargando:
+            return
+        self.cargando = True
+        despues = self.siguiente
+        self.ejecutor.ejecutar(self.clave, lambda: self.repositorio.pagina(despues),
+                               self._siguiente, self._fallo)
+
+    def _primera(self, resultado):
+        filas, self.siguiente = resultado
+        self.completo = self.siguiente is None
+        self.cargando = False
+        cambios = self.modelo.reemplazar(filas)
+        if self._al_terminar:
+            self._al_terminar(cambios)
+
+    def _siguiente(self, resultado):
+        filas, self.siguiente = resultado
+        self.completo = self.siguiente is None
+        self.cargando = False
+        cambios = self.modelo.extender(filas)
+        if self._al_terminar:
+            self._al_terminar(cambios)
+
+    def _fallo(self, e):
+        self.cargando = False
+        if self.al_fallar:
+            self.al_fallar(e)
@@ -0,0 +1,130 @@
+"""
+Módulo de resumen de stock.
+Calcula los totales del stock por tipo de sangre con una sola consulta
+GROUP BY TipodeSangre, Estado en el servidor, en lugar de recorrer en Python
+cada fila de reserva. El resultado se guarda hasta la próxima escritura en
+reserva (o hasta que cambia el día, porque cambia qué vence).
+"""
+
+import threading
+import time
+from datetime import date
+from typing import Dict, Optional
+
+from versiones_datos import VERSIONES
+from vencimientos import ESTADOS_VENCIDA
+
+# Volumen de una unidad estándar (ml)
+UNIDAD_ESTANDAR_ML = 450.0
+
+# Días hacia adelante que cuentan como "por vencer"
+DIAS_POR_VENCER = 7
+
+# Segundos que se reutiliza el resumen aunque no haya escrituras propias
+# (otros puestos pueden escribir en la misma base)
+VIGENCIA_CACHE_S = 60
+
+CONSULTA_RESUMEN = '''
+    SELECT TipodeSangre, Estado,
+           SUM(CASE WHEN Vencimiento >= CURDATE() THEN VolumenDisp ELSE 0 END),
+           SUM(CASE WHEN Vencimiento >= CURDATE()
+                     AND Vencimiento < CURDATE() + INTERVAL %s DAY THEN VolumenDisp ELSE 0 END),
+           SUM(CASE WHEN Vencimiento >= CURDATE()
+                     AND Vencimiento < CURDATE() + INTERVAL %s DAY THEN 1 ELSE 0 END),
+           SUM(CASE WHEN Vencimiento < CURDATE() THEN 1 ELSE 0 END),
+           COUNT(*)
+    FROM reserva
+    WHERE VolumenDisp > 0
+    GROUP BY TipodeSangre, Estado
+'''
+
+
+def _resumen_tipo() -> dict:
+    return {"ml": 0.0, "unidades": 0.0, "por_vencer_ml": 0.0, "por_vencer_bolsas": 0, "vencidas": 0}
+
+
+class ResumenStock:
+    """Totales del stock por tipo, cacheados entre escrituras."""
+
+    def __init__(self, db, unidad_ml: float = UNIDAD_ESTANDAR_ML, dias_por_vencer: int = DIAS_POR_VENCER):
+        """
+        Args:
+            db: ProveedorConexiones de la BD
+            unidad_ml: ml de una unidad estándar
+            dias_por_vencer: Ventana de "por vencer" en días
+        """
+        self.db = db
+        self.unidad_ml = unidad_ml
+        self.dias_por_vencer = dias_por_vencer
+        self._cache: Optional[dict] = None
+        self._clave_cache = None
+        self._calculado = 0.0
+        self._lock = threading.Lock()
+
+    def invalidar(self):
+        with self._lock:
+            self._cache = None
+
+    def obtener(self) -> dict:
+        """
+        Devuelve el resumen (de caché si no hubo escrituras en reserva
+        desde el último cálculo y no pasaron VIGENCIA_CACHE_S segundos).
+
+        Returns:
+            Dict con:
+                "por_tipo": {tipo: {"ml", "unidades", "por_vencer_ml", "por_vencer_bolsas", "vencidas"}}
+                "total_ml", "total_unidades", "por_vencer_bolsas", "vencidas"
+        """
+        clave = (VERSIONES.version("reserva"), date.today())
+        with self._lock:
+            if (self._cache is not None and self._clave_cache == clave
+                    and time.monotonic() - self._calculado < VIGENCIA_CACHE_S):
+                return self._cache
+
+        with self.db.cursor() as cursor:
+            cursor.execute(CONSULTA_RESUMEN, (self.dias_por_vencer, self.dias_por_vencer))
+            filas = cursor.fetchall()
+        resumen = self._armar(filas)
+
+        with self._lock:
+            self._cache, self._clave_cache = resumen, clave
+            self._calculado = time.monotonic()
+        return resumen
+
+    def _armar(self, filas) -> dict:
+        """Combina las filas (tipo, estado) en totales por tipo (son como mucho 16 filas)."""
+        por_tipo: Dict[str, dict] = {}
+        for tipo, estado, ml_vigente, ml_por_vencer, bolsas_por_vencer, bolsas_vencidas, bolsas in filas:
+            datos = por_tipo.setdefault(tipo, _resumen_tipo())
+            if estado in ESTADOS_VENCIDA:
+                # Marcadas como vencidas: no cuentan como stock aunque la fecha diga otra cosa
+                datos["vencidas"] += int(bolsas or 0)
+                continue
+            datos["ml"] += float(ml_vigente or 0)
+            datos["por_vencer_ml"] += float(ml_por_vencer or 0)
+            datos["por_vencer_bolsas"] += int(bolsas_por_vencer or 0)
+            datos["vencidas"] += int(bolsas_vencidas or 0)
+
+        for datos in por_tipo.values():
+            datos["unidades"] = datos["ml"] / self.unidad_ml if self.unidad_ml else 0.0
+
+        return {
+            "por_tipo": por_tipo,
+            "total_ml": sum(d["ml"] for d in por_tipo.values()),
+            "total_unidades": sum(d["unidades"] for d in por_tipo.values()),
+            "por_vencer_bolsas": sum(d["por_vencer_bolsas"] for d in por_tipo.values()),
+            "vencidas": sum(d["vencidas"] for d in por_tipo.values()),
+        }
+
+
+_resumenes: Dict[tuple, ResumenStock] = {}
+_resumenes_lock = threading.Lock()
+
+
+def resumen_stock(db, unidad_ml: float = UNIDAD_ESTANDAR_ML) -> ResumenStock:
+    """Devuelve el resumen compartido de la base (el caché sobrevive al cerrar la pantalla)."""
+    with _resumenes_lock:
+        clave = (id(db), unidad_ml)
+        if clave not in _resumenes:
+            _resumenes[clave] = ResumenStock(db, unidad_ml=unidad_ml)
+        return _resumenes[clave]
@@ -0,0 +1,262 @@
+"""
+Servicio HTTP del banco de sangre.
+Expone en JSON las mismas operaciones que usa la aplicación de escritorio
+(compatibilidad_sangre, resumen_stock), para que los sistemas de los hospitales
+carguen y consulten solicitudes sin pasar por la interfaz de Tk.
+
+Las consultas a la BD son bloqueantes: se corren en un pool de hilos del tamaño
+del pool de conexiones con run_in_executor. Los cambios de estado de las
+solicitudes (y el stock que asignan) son una transacción cada uno, con las filas
+bloqueadas en la BD, así que pueden correr en paralelo con otros puestos.
+
+Requiere aiohttp (pip install aiohttp).
+
+Uso:
+    python servicio_http.py [puerto]
+
+Endpoints:
+    GET  /stock                              Resumen por tipo (ml, unidades, por vencer, vencidas)
+    GET  /disponibilidad?tipo=O+&volumen=450 Tipo que cubriría el pedido y volumen obtenible
+    GET  /recomendacion?tipo=O+              Tipos compatibles y cuáles tienen stock
+    POST /solicitudes                        {"id_hospital", "tipo", "volumen"} -> solicitud Pendiente
+    GET  /solicitudes/{id}                   Estado de una solicitud
+    POST /solicitudes/{id}/aceptar           Descuenta el stock y marca la solicitud Aceptada
+    POST /solicitudes/{id}/despachar         Marca Despachada una solicitud Aceptada
+    POST /solicitudes/{id}/rechazar          Rechaza la solicitud (si estaba Aceptada, devuelve el stock)
+    GET  /metricas                           Métricas de consultas en formato Prometheus (instrumentacion.py)
+"""
+
+import asyncio
+import functools
+import math
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector
+
+from compatibilidad_sangre import GestorCompatibilidadSangre
+from instrumentacion import exposicion_prometheus
+from resumen_stock import resumen_stock
+from solicitudes import ACEPTADA, DESPACHADA, RECHAZADA, TRANSICIONES, GestorSolicitudes
+
+try:
+    from aiohttp import web
+except ImportError:  # el servicio es opcional; la aplicación de escritorio no lo necesita
+    web = None
+
+PUERTO_PREDETERMINADO = 8080
+
+
+class ServicioBanco:
+    """Operaciones del servicio, sin HTTP (las usan los handlers y se pueden probar solas)."""
+
+    def __init__(self, db, hilos: int = None):
+        """
+        Args:
+            db: ProveedorConexiones de la BD (o un proveedor compatible)
+            hilos: Hilos para las consultas (por defecto, el tamaño del pool de conexiones)
+        """
+        self.db = db
+        self.gestor = GestorCompatibilidadSangre(db)
+        self.resumen = resumen_stock(db)
+        self.solicitudes = GestorSolicitudes(self.gestor)
+        self.pool = ThreadPoolExecutor(max_workers=hilos or getattr(db, "tamano", 4),
+                                       thread_name_prefix="servicio")
+
+    async def _en_hilo(self, funcion, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, functools.partial(funcion, *args))
+
+    def cerrar(self):
+        self.pool.shutdown(wait=False)
+
+    async def stock(self) -> dict:
+        resumen = await self._en_hilo(self.resumen.obtener)
+        return {
+            "por_tipo": resumen["por_tipo"],
+            "total_ml": resumen["total_ml"],
+            "total_unidades": resumen["total_unidades"],
+            "por_vencer_bolsas": resumen["por_vencer_bolsas"],
+            "vencidas": resumen["vencidas"],
+        }
+
+    async def disponibilidad(self, tipo: str, volumen: float) -> dict:
+        # Otros puestos pueden haber cambiado el stock: se relee el total por tipo (un GROUP BY)
+        await self._en_hilo(self.gestor.inventario.recargar)
+        tipo_usado, obtenible = self.gestor.buscar_sangre_disponible_recursivo(tipo, volumen)
+        return {
+            "tipo": tipo,
+            "volumen": volumen,
+            "tipo_sugerido": tipo_usado,
+            "volumen_obtenible": obtenible,
+            "cubre": obtenible + 1e-6 >= volumen,
+            "compatibles_en_stock": self.gestor.obtener_compatibles_en_stock(tipo),
+        }
+
+    async def recomendacion(self, tipo: str) -> dict:
+        # Los tipos "en stock" salen del inventario: se relee igual que en disponibilidad
+        await self._en_hilo(self.gestor.inventario.recargar)
+        return {
+            "tipo": tipo,
+            "compatibles": self.gestor.obtener_compatibles(tipo),
+            "compatibles_en_stock": self.gestor.obtener_compatibles_en_stock(tipo),
+            "mensaje": self.gestor.obtener_recomendacion(tipo),
+        }
+
+    def _crear_solicitud(self, id_hospital: int, tipo: str, volumen: float) -> int:
+        with self.db.transaccion() as cursor:
+            cursor.execute('''
+                INSERT INTO solicitud (id_Hospital, VolumenSolic, id_TipodeSangre)
+                SELECT %s, %s, id FROM tipodesangre WHERE TipodeSangre = %s
+            ''', (id_hospital, volumen, tipo))
+            if cursor.rowcount != 1:
+                raise ValueError(f"Tipo de sangre desconocido: {tipo}")
+            return cursor.lastrowid
+
+    async def crear_solicitud(self, id_hospital: int, tipo: str, volumen: float) -> dict:
+        id_solicitud = await self._en_hilo(self._crear_solicitud, id_hospital, tipo, volumen)
+        return {"id": id_solicitud, "estado": "Pendiente"}
+
+    def _leer_solicitud(self, id_solicitud: int):
+        with self.db.cursor() as cursor:
+            cursor.execute('''
+                SELECT s.id, s.id_Hospital, ts.TipodeSangre, s.VolumenSolic, s.Estado
+                FROM solicitud s
+                JOIN tipodesangre ts ON ts.id = s.id_TipodeSangre
+                WHERE s.id = %s
+            ''', (id_solicitud,))
+            return cursor.fetchone()
+
+    async def solicitud(self, id_solicitud: int):
+        fila = await self._en_hilo(self._leer_solicitud, id_solicitud)
+        if fila is None:
+            return None
+        return {"id": fila[0], "id_hospital": fila[1], "tipo": fila[2],
+                "volumen": float(fila[3]), "estado": fila[4]}
+
+    async def cambiar_estado(self, id_solicitud: int, nuevo_estado: str) -> tuple:
+        """
+        Aplica una transición del ciclo de vida (ver solicitudes.py).
+
+        Returns:
+            Tupla (código HTTP, cuerpo)
+        """
+        actual = await self.solicitud(id_solicitud)
+        if actual is None:
+            return 404, {"error": "Solicitud inexistente"}
+        if nuevo_estado not in TRANSICIONES.get(actual["estado"], ()):
+            return 409, {"error": f"La solicitud está {actual['estado']}", "estado": actual["estado"]}
+        # cambiar_estado vuelve a verificar el estado con la fila bloqueada: si otro
+        # puesto la cambió en el medio, falla sin tocar el stock
+        exito, mensaje = await self._en_hilo(self.solicitudes.cambiar_estado, id_solicitud, nuevo_estado)
+        if not exito:
+            return 409, {"error": mensaje, "estado": actual["estado"]}
+        return 200, {"id": id_solicitud, "estado": nuevo_estado, "mensaje": mensaje}
+
+    async def aceptar(self, id_solicitud: int) -> tuple:
+        return await self.cambiar_estado(id_solicitud, ACEPTADA)
+
+
+# ------------------------------------------------------------------ HTTP
+
+def _parametro_volumen(valor) -> float:
+    volumen = float(valor)
+    if not math.isfinite(volumen) or volumen <= 0:
+        raise ValueError("El volumen debe ser un número positivo.")
+    return volumen
+
+
+def crear_app(db):
+    """
+    Arma la aplicación aiohttp sobre un proveedor de conexiones.
+
+    Args:
+        db: ProveedorConexiones (o un proveedor compatible, por ejemplo para pruebas)
+    """
+    if web is None:
+        raise RuntimeError("El servicio HTTP requiere aiohttp (pip install aiohttp).")
+
+    rutas = web.RouteTableDef()
+
+    def error(estado, mensaje):
+        return web.json_response({"error": mensaje}, status=estado)
+
+    @web.middleware
+    async def errores(request, handler):
+        try:
+            return await handler(request)
+        except web.HTTPException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
+            return error(400, f"Pedido inválido: {e}")
+        except mysql.connector.Error as e:
+            return error(503, f"Error de base de datos: {e}")
+
+    @rutas.get("/stock")
+    async def stock(request):
+        return web.json_response(await request.app["servicio"].stock())
+
+    @rutas.get("/disponibilidad")
+    async def disponibilidad(request):
+        tipo = request.query["tipo"]
+        volumen = _parametro_volumen(request.query["volumen"])
+        return web.json_response(await request.app["servicio"].disponibilidad(tipo, volumen))
+
+    @rutas.get("/recomendacion")
+    async def recomendacion(request):
+        return web.json_response(await request.app["servicio"].recomendacion(request.query["tipo"]))
+
+    @rutas.post("/solicitudes")
+    async def crear_solicitud(request):
+        datos = await request.json()
+        creada = await request.app["servicio"].crear_solicitud(
+            int(datos["id_hospital"]), str(datos["tipo"]), _parametro_volumen(datos["volumen"]))
+        return web.json_response(creada, status=201)
+
+    @rutas.get("/solicitudes/{id}")
+    async def ver_solicitud(request):
+        solicitud = await request.app["servicio"].solicitud(int(request.match_info["id"]))
+        if solicitud is None:
+            return error(404, "Solicitud inexistente")
+        return web.json_response(solicitud)
+
+    acciones = {"aceptar": ACEPTADA, "despachar": DESPACHADA, "rechazar": RECHAZADA}
+
+    @rutas.post("/solicitudes/{id}/{accion:aceptar|despachar|rechazar}")
+    async def cambiar_estado(request):
+        estado, cuerpo = await request.app["servicio"].cambiar_estado(
+            int(request.match_info["id"]), acciones[request.match_info["accion"]])
+        return web.json_response(cuerpo, status=estado)
+
+    @rutas.get("/metricas")
+    async def metricas(request):
+        return web.Response(body=exposicion_prometheus().encode("utf-8"),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    async def al_iniciar(app):
+        # ServicioBanco carga catálogos e inventario de la BD: no se bloquea el loop mientras tanto
+        app["servicio"] = await asyncio.get_running_loop().run_in_executor(None, ServicioBanco, db)
+
+    async def al_cerrar(app):
+        app["servicio"].cerrar()
+
+    app = web.Application(middlewares=[errores])
+    app.add_routes(rutas)
+    app.on_startup.append(al_iniciar)
+    app.on_cleanup.append(al_cerrar)
+    return app
+
+
+if __name__ == "__main__":
+    from conexion import crear_proveedor
+
+    if web is None:
+        print("❌ El servicio HTTP requiere aiohttp (pip install aiohttp).")
+        sys.exit(1)
+    puerto = int(sys.argv[1]) if len(sys.argv) > 1 else PUERTO_PREDETERMINADO
+    try:
+        db = crear_proveedor()
+    except (mysql.connector.Error, ValueError) as e:
+        print(f"❌ No se pudo conectar a la base de datos: {e}")
+        sys.exit(1)
+    web.run_app(crear_app(db), port=puerto)
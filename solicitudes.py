@@ -0,0 +1,208 @@
+"""
+Módulo del ciclo de vida de las solicitudes de transfusión.
+
+    Pendiente ──> Aceptada ──> Despachada
+        │  ^          │
+        │  └──────────┤  (liberar: se devuelve el stock asignado)
+        v             v
+    Rechazada <───────┘
+
+Cada cambio de estado es una única transacción con un solo commit: la
+solicitud se bloquea con SELECT ... FOR UPDATE, se verifica que la transición
+sea válida y, al aceptar, el stock se descuenta y se registra en la tabla
+asignacion (qué reservas y cuánto volumen cubrieron la solicitud) junto con el
+nuevo estado. Si algo falla, no queda nada a medias.
+"""
+
+import mysql.connector
+from typing import List, Tuple
+
+from compatibilidad_sangre import StockInsuficiente
+from versiones_datos import registrar_escritura
+
+PENDIENTE = "Pendiente"
+ACEPTADA = "Aceptada"
+DESPACHADA = "Despachada"
+RECHAZADA = "Rechazada"
+
+ESTADOS = (PENDIENTE, ACEPTADA, DESPACHADA, RECHAZADA)
+
+# Estado actual -> estados a los que puede pasar
+TRANSICIONES = {
+    PENDIENTE: (ACEPTADA, RECHAZADA),
+    ACEPTADA: (DESPACHADA, PENDIENTE, RECHAZADA),
+    RECHAZADA: (PENDIENTE,),
+    DESPACHADA: (),
+}
+
+
+class TransicionInvalida(Exception):
+    """La solicitud no existe, no puede pasar al estado pedido o su stock asignado no se puede devolver."""
+
+
+def transiciones_desde(estado: str) -> List[str]:
+    """Estados que se pueden elegir para una solicitud en `estado` (incluido el mismo)."""
+    return [estado] + list(TRANSICIONES.get(estado, ()))
+
+
+class GestorSolicitudes:
+    """Cambia el estado de las solicitudes asignando o devolviendo stock en la misma transacción."""
+
+    def __init__(self, gestor):
+        """
+        Args:
+            gestor: GestorCompatibilidadSangre (aporta conexiones, compatibilidades e inventario)
+        """
+        self.gestor = gestor
+        self.db = gestor.db
+
+    def _bloquear(self, cursor, id_solicitud: int, nuevo_estado: str) -> tuple:
+        """Bloquea la solicitud y verifica la transición; devuelve (estado, tipo, volumen)."""
+        cursor.execute('''
+            SELECT s.Estado, ts.TipodeSangre, s.VolumenSolic
+            FROM solicitud s
+            JOIN tipodesangre ts ON ts.id = s.id_TipodeSangre
+            WHERE s.id = %s
+            FOR UPDATE
+        ''', (id_solicitud,))
+        fila = cursor.fetchone()
+        if fila is None:
+            raise TransicionInvalida(f"La solicitud {id_solicitud} no existe.")
+        estado = fila[0] or PENDIENTE
+        if nuevo_estado not in TRANSICIONES.get(estado, ()):
+            raise TransicionInvalida(f"Una solicitud {estado} no puede pasar a {nuevo_estado}.")
+        return estado, fila[1], float(fila[2])
+
+    def _liberar(self, cursor, id_solicitud: int) -> float:
+        """
+        Devuelve a la reserva el volumen asignado a la solicitud; retorna el total devuelto.
+
+        Raises:
+            TransicionInvalida: si alguna reserva asignada ya no existe (se revierte todo)
+        """
+        cursor.execute('''
+            SELECT id_Reserva, Volumen FROM asignacion
+            WHERE id_Solicitud = %s
+            ORDER BY id_Reserva
+            FOR UPDATE
+        ''', (id_solicitud,))
+        asignadas = cursor.fetchall()
+        if asignadas:
+            cursor.executemany('UPDATE reserva SET VolumenDisp = VolumenDisp + %s WHERE ID = %s',
+                               [(volumen, id_res) for id_res, volumen in asignadas])
+            if cursor.rowcount != len(asignadas):
+                raise TransicionInvalida(
+                    f"Faltan reservas asignadas a la solicitud {id_solicitud}: no se puede devolver su volumen.")
+            cursor.execute('DELETE FROM asignacion WHERE id_Solicitud = %s', (id_solicitud,))
+        return sum(float(volumen) for _, volumen in asignadas)
+
+    def cambiar_estado(self, id_solicitud: int, nuevo_estado: str) -> Tuple[bool, str]:
+        """
+        Pasa una solicitud a otro estado en una única transacción.
+
+        - A Aceptada: descuenta el stock compatible y registra las asignaciones.
+        - De Aceptada a Pendiente o Rechazada: devuelve a la reserva lo asignado.
+        - A Despachada o Rechazada (desde Pendiente): solo cambia el estado.
+
+        Args:
+            id_solicitud: ID de la solicitud
+            nuevo_estado: Uno de ESTADOS
+
+        Returns:
+            Tupla (éxito, mensaje)
+        """
+        tomas = []
+        devuelto = 0.0
+        try:
+            with self.db.transaccion() as cursor:
+                estado, tipo, volumen = self._bloquear(cursor, id_solicitud, nuevo_estado)
+
+                if nuevo_estado == ACEPTADA:
+                    tomas = self.gestor.consumir_reservas(cursor, tipo, volumen)
+                    cursor.executemany('''
+                        INSERT INTO asignacion (id_Solicitud, id_Reserva, Volumen)
+                        VALUES (%s, %s, %s)
+                    ''', [(id_solicitud, id_res, tomado) for id_res, tomado, _ in tomas])
+                elif estado == ACEPTADA and nuevo_estado != DESPACHADA:
+                    devuelto = self._liberar(cursor, id_solicitud)
+
+                cursor.execute('UPDATE solicitud SET Estado = %s WHERE id = %s', (nuevo_estado, id_solicitud))
+        except TransicionInvalida as e:
+            return (False, str(e))
+        except StockInsuficiente as e:
+            # transaccion() revirtió todo: la solicitud sigue como estaba
+            return (False, f"Stock insuficiente. Faltan {e.faltante:.2f} ml para cubrir {volumen} ml.")
+        except mysql.connector.Error as e:
+            return (False, f"Error al cambiar el estado de la solicitud: {str(e)}")
+
+        if tomas:
+            for _, tomado, tipo_usado in tomas:
+                self.gestor.inventario.restar(tipo_usado, tomado)
+            registrar_escritura("solicitud", "reserva")
+            usados = ", ".join(sorted({t for _, _, t in tomas}))
+            return (True, f"Solicitud aceptada: {volumen:.0f} ml de {len(tomas)} reserva(s) ({usados}).")
+        if devuelto:
+            # Lo devuelto puede haber vencido mientras estaba asignado: se relee el total
+            self.gestor.inventario.recargar()
+            registrar_escritura("solicitud", "reserva")
+            return (True, f"Solicitud {nuevo_estado.lower()}: se devolvieron {devuelto:.0f} ml a la reserva.")
+        registrar_escritura("solicitud")
+        return (True, f"Solicitud {nuevo_estado.lower()}.")
+
+    def borrar(self, id_solicitud: int) -> Tuple[bool, str]:
+        """
+        Borra una solicitud en una única transacción.
+
+        Si estaba Aceptada, primero devuelve a la reserva el volumen asignado. Una
+        solicitud Despachada no se borra: su sangre ya salió y las asignaciones son
+        el registro de qué reservas la cubrieron.
+
+        Returns:
+            Tupla (éxito, mensaje)
+        """
+        devuelto = 0.0
+        try:
+            with self.db.transaccion() as cursor:
+                cursor.execute('SELECT Estado FROM solicitud WHERE id = %s FOR UPDATE', (id_solicitud,))
+                fila = cursor.fetchone()
+                if fila is None:
+                    raise TransicionInvalida(f"La solicitud {id_solicitud} no existe.")
+                estado = fila[0] or PENDIENTE
+                if estado == DESPACHADA:
+                    raise TransicionInvalida(f"La solicitud {id_solicitud} ya fue despachada; no se puede borrar.")
+                if estado == ACEPTADA:
+                    devuelto = self._liberar(cursor, id_solicitud)
+                cursor.execute('DELETE FROM asignacion WHERE id_Solicitud = %s', (id_solicitud,))
+                cursor.execute('DELETE FROM solicitud WHERE id = %s', (id_solicitud,))
+        except TransicionInvalida as e:
+            return (False, str(e))
+        except mysql.connector.Error as e:
+            return (False, f"No se pudo borrar la solicitud: {str(e)}")
+
+        if devuelto:
+            self.gestor.inventario.recargar()
+            registrar_escritura("solicitud", "reserva")
+            return (True, f"Solicitud borrada: se devolvieron {devuelto:.0f} ml a la reserva.")
+        registrar_escritura("solicitud")
+        return (True, "Solicitud borrada.")
+
+    def aceptar(self, id_solicitud: int) -> Tuple[bool, str]:
+        return self.cambiar_estado(id_solicitud, ACEPTADA)
+
+    def rechazar(self, id_solicitud: int) -> Tuple[bool, str]:
+        return self.cambiar_estado(id_solicitud, RECHAZADA)
+
+    def despachar(self, id_solicitud: int) -> Tuple[bool, str]:
+        return self.cambiar_estado(id_solicitud, DESPACHADA)
+
+    def asignaciones(self, id_solicitud: int) -> List[tuple]:
+        """Reservas que cubren una solicitud: lista de (id_reserva, volumen, tipo, vencimiento)."""
+        with self.db.cursor() as cursor:
+            cursor.execute('''
+                SELECT a.id_Reserva, a.Volumen, r.TipodeSangre, r.Vencimiento
+                FROM asignacion a
+                JOIN reserva r ON r.ID = a.id_Reserva
+                WHERE a.id_Solicitud = %s
+                ORDER BY r.Vencimiento, a.id_Reserva
+            ''', (id_solicitud,))
+            return cursor.fetchall()
@@ -3,14 +3,33 @@ from tkinter import messagebox, ttk
 from PIL import Image, ImageTk
 import mysql.connector
 from compatibilidad_sangre import GestorCompatibilidadSangre
+from asignacion_lotes import AsignadorLotes
+from solicitudes import GestorSolicitudes, PENDIENTE, transiciones_desde
+from optimizador_asignacion import planificar_optimo
+from cache_catalogos import tipos_sangre as catalogo_tipos_sangre, id_tipo_sangre
+from ejecutor_consultas import obtener_ejecutor
+from tabla_virtual import TablaVirtual
+from modelo_filas import ModeloFilas
+from repositorios import ListadoPaginado, repositorio_solicitudes
+from versiones_datos import registrar_escritura
+from exportacion import VentanaExportacion
+from gestor_pantallas import volver_inicio
 
 
 class VerSolicitud:
-    def __init__(self, parent, conn):
+    def __init__(self, parent, db):
         self.parent = parent
-        self.conn = conn
+        self.db = db
         self.stock_data = []  # Inicializar lista de datos para evitar errores
-        self.gestor_compat = GestorCompatibilidadSangre(conn)  # Inicializar gestor de compatibilidades
+        self.gestor_compat = GestorCompatibilidadSangre(db)  # Inicializar gestor de compatibilidades
+        self.asignador = AsignadorLotes(self.gestor_compat)
+        self.solicitudes = GestorSolicitudes(self.gestor_compat)
+        self.ejecutor = obtener_ejecutor(parent)
+        # Solicitudes por ID; las escrituras de esta pantalla lo parchean sin recargar
+        self.modelo = ModeloFilas()
+        self.modelo.suscribir(lambda cambios: self.mostrar_solicitudes())
+        self.listado = ListadoPaginado(repositorio_solicitudes(db), self.modelo, self.ejecutor,
+                                       "VerSolicitud.cargar", self._error_cargar)
 
         # Título
         tk.Label(self.parent, text="Solicitudes de Transfusión", font=("Arial", 16), bg="white").pack(pady=10)
@@ -18,48 +37,52 @@ class VerSolicitud:
         # Botón para agregar nueva solicitud
         tk.Button(self.parent, text="➕ Agregar Solicitud", bg="#4CAF50", fg="white", command=self.agregar_solicitud).pack(pady=5)
 
-        # Cargar solicitudes
-        self.cargar_solicitud()
+        # Indicador de carga mientras la consulta corre en segundo plano
+        self.cargando_label = tk.Label(self.parent, text="", font=("Arial", 9, "italic"), bg="white", fg="#888")
+        self.cargando_label.pack()
 
         # Columnas para la tabla
         columnas = ("ID Solicitud", "Hospital", "Dirección", "Teléfono", "Volumen Solicitado", "Estado", "Tipo de Sangre")
-        self.tabla_solicitudes = ttk.Treeview(self.parent, columns=columnas, show="headings", height=15)
-
-        for col in columnas:
-            self.tabla_solicitudes.heading(col, text=col)
-            self.tabla_solicitudes.column(col, width=120)
-
+        self.tabla_solicitudes = TablaVirtual(
+            self.parent, columnas, alto=15,
+            anchos={col: 120 for col in columnas},
+            orden={"Volumen Solicitado": lambda fila: float(fila[4] or 0)},
+            al_pedir_mas=self.listado.pedir_mas,
+        )
         self.tabla_solicitudes.pack(pady=10)
 
-        # Insertar los datos de las solicitudes en la tabla
-        self.mostrar_solicitudes()
+        # Cargar solicitudes (se muestran en la tabla cuando llegan)
+        self.cargar_solicitud()
 
         # Botones
         button_frame = tk.Frame(parent, bg="white")
         button_frame.pack(pady=20)
 
         tk.Button(button_frame, text="Editar Solicitud", bg="#a37676", fg="white", command=self.editar_solicitud).pack(side="left", padx=10)
+        tk.Button(button_frame, text="✔ Aceptar pendientes viables", bg="#4CAF50", fg="white", command=self.aceptar_pendientes).pack(side="left", padx=10)
+        tk.Button(button_frame, text="📤 Exportar", bg="#a37676", fg="white",
+                  command=lambda: VentanaExportacion(self.parent, self.db, "solicitudes")).pack(side="left", padx=10)
         tk.Button(self.parent, text="Cancelar", bg="#f8f8f8", command=self.limpiar).pack(side="top", padx=5)
 
     def cargar_solicitud(self):
-        """Carga las solicitudes desde la base de datos y las almacena en self.stock_data."""
-        try:
-            with self.conn.cursor() as cursor:
-                cursor.execute('''
-                    SELECT s.id, h.Nombre, h.direccion, h.telefono, s.VolumenSolic, s.Estado, ts.TipodeSangre
-                    FROM hospital h
-                    JOIN solicitud s ON h.id = s.id_Hospital
-                    JOIN tipodesangre ts ON ts.id = s.id_TipodeSangre;
-                ''')
-                self.stock_data = cursor.fetchall()
-        except mysql.connector.Error as e:
-            messagebox.showerror("Error", f"No se pudo cargar las solicitudes: {e}")
-            self.stock_data = []
+        """Carga la primera página de solicitudes en segundo plano; las siguientes llegan al hacer scroll."""
+        def al_terminar(cambios):
+            self.cargando_label.config(text="")
+            # Solo se redibuja si el diff con lo cargado tiene cambios (o cambió si quedan páginas)
+            if not any(cambios.values()):
+                self.mostrar_solicitudes()
+
+        self.cargando_label.config(text="⏳ Cargando solicitudes...")
+        self.listado.recargar(al_terminar)
+
+    def _error_cargar(self, e):
+        self.cargando_label.config(text="")
+        messagebox.showerror("Error", f"No se pudo cargar las solicitudes: {e}")
 
     def cargar_hospitales(self):
         """Devuelve una lista de cadenas 'id - Nombre' de hospitales existentes."""
         try:
-            with self.conn.cursor() as cursor:
+            with self.db.cursor() as cursor:
                 cursor.execute("SELECT id, Nombre FROM hospital ORDER BY Nombre ASC")
                 rows = cursor.fetchall()
                 return [f"{r[0]} - {r[1]}" for r in rows]
@@ -68,19 +91,14 @@ class VerSolicitud:
 
     def cargar_tipos_sangre(self):
         try:
-            with self.conn.cursor() as cursor:
-                cursor.execute("SELECT TipodeSangre FROM tipodesangre ORDER BY TipodeSangre ASC")
-                return [row[0] for row in cursor.fetchall()]
+            return catalogo_tipos_sangre(self.db, ordenados=True)
         except mysql.connector.Error:
             return []
 
     def mostrar_solicitudes(self):
         """Muestra las solicitudes en la tabla."""
-        for item in self.tabla_solicitudes.get_children():
-            self.tabla_solicitudes.delete(item)
-
-        for solicitud in self.stock_data:
-            self.tabla_solicitudes.insert("", "end", values=solicitud)
+        self.stock_data = self.modelo.filas()
+        self.tabla_solicitudes.cargar(self.stock_data, completa=self.listado.completo)
 
     def agregar_solicitud(self):
         """Abre una ventana para agregar una nueva solicitud de transfusión."""
@@ -150,25 +168,32 @@ class VerSolicitud:
                 return
 
             try:
-                with self.conn.cursor() as cursor:
-                    # Obtener id del tipo de sangre
-                    cursor.execute("SELECT id FROM tipodesangre WHERE TipodeSangre = %s", (tipo_sangre,))
-                    tipo_row = cursor.fetchone()
-                    if not tipo_row:
-                        messagebox.showerror("Error", f"Tipo de sangre '{tipo_sangre}' no encontrado.")
-                        return
-                    id_tipo = tipo_row[0]
+                # Obtener id del tipo de sangre
+                id_tipo = id_tipo_sangre(self.db, tipo_sangre)
+                if id_tipo is None:
+                    messagebox.showerror("Error", f"Tipo de sangre '{tipo_sangre}' no encontrado.")
+                    return
 
-                    # Si se creó un nuevo hospital, insertarlo y usar el id autogenerado
-                    if sel_hosp == "Nuevo hospital...":
-                        nombre = entry_nuevo_nombre.get().strip()
-                        direccion = entry_nuevo_dir.get().strip() or None
-                        telefono = entry_nuevo_tel.get().strip() or None
+                nuevo_hospital = sel_hosp == "Nuevo hospital..."
+                if nuevo_hospital:
+                    nombre = entry_nuevo_nombre.get().strip()
+                    direccion = entry_nuevo_dir.get().strip() or None
+                    telefono = entry_nuevo_tel.get().strip() or None
 
-                        if not nombre:
-                            messagebox.showerror("Error", "El nombre del nuevo hospital es obligatorio.")
-                            return
+                    if not nombre:
+                        messagebox.showerror("Error", "El nombre del nuevo hospital es obligatorio.")
+                        return
+                else:
+                    # Extraer id desde "id - Nombre"
+                    try:
+                        id_hosp = int(sel_hosp.split(" - ")[0])
+                    except Exception:
+                        messagebox.showerror("Error", "ID de hospital inválido.")
+                        return
 
+                with self.db.transaccion() as cursor:
+                    # Si se creó un nuevo hospital, insertarlo y usar el id autogenerado
+                    if nuevo_hospital:
                         cursor.execute('''
                             INSERT INTO hospital (Nombre, direccion, telefono)
                             VALUES (%s, %s, %s)
@@ -176,114 +201,123 @@ class VerSolicitud:
                         # Obtener id autogenerado
                         nuevo_id = cursor.lastrowid
                         id_hosp = nuevo_id
-                    else:
-                        # Extraer id desde "id - Nombre"
-                        try:
-                            id_hosp = int(sel_hosp.split(" - ")[0])
-                        except Exception:
-                            messagebox.showerror("Error", "ID de hospital inválido.")
-                            return
 
                     # Insertar la solicitud referenciando al hospital
                     cursor.execute('''
                         INSERT INTO solicitud (id_Hospital, VolumenSolic, id_TipodeSangre)
                         VALUES (%s, %s, %s)
                     ''', (id_hosp, volumen_float, id_tipo))
-                    self.conn.commit()
+                    id_solicitud = cursor.lastrowid
+
+                    if nuevo_hospital:
+                        hospital = (nombre, direccion, telefono)
+                    else:
+                        cursor.execute("SELECT Nombre, direccion, telefono FROM hospital WHERE id = %s", (id_hosp,))
+                        hospital = cursor.fetchone()
+                registrar_escritura("solicitud")
 
                 messagebox.showinfo("Éxito", f"Solicitud agregada correctamente.\n(Volumen: {volumen_float} ml)")
                 ventana_nueva.destroy()
-                # Refrescar datos y vista
-                self.cargar_solicitud()
-                self.mostrar_solicitudes()
+                # Agregar la fila a la vista sin recargar todas las solicitudes
+                self.modelo.actualizar((id_solicitud, *hospital, volumen_float, "Pendiente", tipo_sangre))
             except mysql.connector.Error as e:
                 messagebox.showerror("Error de BD", f"No se pudo agregar la solicitud.\nDetalles: {str(e)}")
 
         tk.Button(ventana_nueva, text="Guardar", bg="#4CAF50", fg="white", command=guardar).pack(pady=12)
 
     def editar_solicitud(self):
-        """Permite editar una solicitud seleccionada de la tabla y, si es aceptada, descuenta la reserva."""
-        seleccion = self.tabla_solicitudes.selection()
+        """Permite cambiar el estado de una solicitud; al aceptarla se descuenta la reserva."""
+        seleccion = self.tabla_solicitudes.filas_seleccionadas()
         if not seleccion:
             messagebox.showwarning("Advertencia", "Seleccione una solicitud para editar.")
             return
 
-        item = seleccion[0]
-        valores = self.tabla_solicitudes.item(item, "values")
+        valores = seleccion[0]
         id_solicitud = valores[0]  # ID de la solicitud (ahora es el correcto)
-        volumen_solicitado = valores[4]  # Volumen solicitado
-        tipo_sangre = valores[6]  # Tipo de sangre
 
         ventana_editar = tk.Toplevel(self.parent)
         ventana_editar.title("Editar Solicitud")
         ventana_editar.geometry("400x300")
 
         tk.Label(ventana_editar, text="Estado:", font=("Arial", 10)).pack(anchor="w", padx=10, pady=(8,2))
-        estados = ["Pendiente", "Aceptada", "Rechazada"]
+        estado_actual = valores[5] or PENDIENTE
+        # Solo se ofrecen las transiciones válidas desde el estado actual
+        estados = transiciones_desde(estado_actual)
         entrada_estado = ttk.Combobox(ventana_editar, values=estados, state="readonly")
-        try:
-            entrada_estado.set(valores[5])
-        except Exception:
-            entrada_estado.set("Pendiente")
+        entrada_estado.set(estado_actual)
         entrada_estado.pack(fill="x", padx=10)
 
         def guardar_cambios():
             nuevo_estado = entrada_estado.get().strip()
-
-            try:
-                with self.conn.cursor() as cursor:
-                    # Actualizar el estado de la solicitud
-                    cursor.execute('''
-                        UPDATE solicitud SET Estado = %s WHERE ID = %s
-                    ''', (nuevo_estado, id_solicitud))
-                    self.conn.commit()
-
-                    # Si el estado es "Aceptada", descontar del stock de sangre con compatibilidad
-                    if nuevo_estado == "Aceptada":
-                        volumen_float = float(volumen_solicitado)
-                        exito, mensaje = self.gestor_compat.descontar_stock_con_compatibilidad(
-                            tipo_sangre, volumen_float
-                        )
-
-                        if exito:
-                            messagebox.showinfo("Éxito", f"Solicitud aceptada.\n{mensaje}")
-                        else:
-                            messagebox.showwarning("Advertencia", f"No se pudo descontar el stock:\n{mensaje}")
-                            # Revertir el cambio de estado ya que no hay stock disponible
-                            cursor.execute('''
-                                UPDATE solicitud SET Estado = %s WHERE ID = %s
-                            ''', ("Pendiente", id_solicitud))
-                            self.conn.commit()
-                            return
-
+            if nuevo_estado == estado_actual:
                 ventana_editar.destroy()
-                self.cargar_solicitud()
-                self.mostrar_solicitudes()
+                return
 
-            except mysql.connector.Error as e:
-                messagebox.showerror("Error", f"No se pudo actualizar la solicitud: {e}")
+            # Estado, stock y asignaciones cambian juntos en una sola transacción
+            exito, mensaje = self.solicitudes.cambiar_estado(id_solicitud, nuevo_estado)
+            if not exito:
+                messagebox.showwarning("Advertencia", f"No se pudo actualizar la solicitud:\n{mensaje}")
+                return
+
+            messagebox.showinfo("Éxito", mensaje)
+            ventana_editar.destroy()
+            self.modelo.modificar(valores[0], {5: nuevo_estado})
 
         tk.Button(ventana_editar, text="Guardar", command=guardar_cambios, bg="#a37676", fg="white").pack(pady=10)
 
+    def aceptar_pendientes(self):
+        """Acepta de una vez todas las solicitudes pendientes que se pueden cubrir con el stock."""
+        # Las pendientes se leen de la BD: la tabla puede tener solo algunas páginas cargadas
+        try:
+            with self.db.cursor() as cursor:
+                cursor.execute('''
+                    SELECT s.id, ts.TipodeSangre, s.VolumenSolic
+                    FROM solicitud s
+                    JOIN tipodesangre ts ON ts.id = s.id_TipodeSangre
+                    WHERE s.Estado = 'Pendiente'
+                    ORDER BY s.id
+                ''')
+                pendientes = [(id_sol, tipo, float(vol)) for id_sol, tipo, vol in cursor.fetchall()]
+        except mysql.connector.Error as e:
+            messagebox.showerror("Error", f"No se pudieron leer las solicitudes pendientes: {e}")
+            return
+        if not pendientes:
+            messagebox.showinfo("Información", "No hay solicitudes pendientes.")
+            return
+
+        if not messagebox.askyesno("Confirmación",
+                                   f"¿Aceptar todas las solicitudes pendientes con stock disponible? ({len(pendientes)} pendientes)"):
+            return
+
+        # Se resuelven todas juntas para no gastar O- ni dejar vencer unidades de tipos escasos
+        aceptadas, _, mensaje = self.asignador.asignar(pendientes, planificador=planificar_optimo)
+        self.modelo.modificar_varios(aceptadas, {5: "Aceptada"})
+        if aceptadas:
+            messagebox.showinfo("Éxito", mensaje)
+        else:
+            messagebox.showwarning("Advertencia", mensaje)
+
     def borrar_solicitud(self):
         """Permite borrar una solicitud seleccionada de la tabla."""
-        seleccion = self.tabla_solicitudes.selection()
+        seleccion = self.tabla_solicitudes.filas_seleccionadas()
         if seleccion:
-            for item in seleccion:
-                valores = self.tabla_solicitudes.item(item, "values")
+            for valores in seleccion:
                 id_solicitud = valores[0]
 
-                try:
-                    with self.conn.cursor() as cursor:
-                        cursor.execute("SET FOREIGN_KEY_CHECKS=0")
-                        cursor.execute('DELETE FROM solicitud WHERE ID = %s', (id_solicitud,))
-                        cursor.execute("SET FOREIGN_KEY_CHECKS=1")
-                        self.conn.commit()
-                    self.tabla_solicitudes.delete(item)
-                except mysql.connector.Error as e:
-                    messagebox.showerror("Error", f"No se pudo borrar la solicitud: {e}")
+                # Si estaba Aceptada, devuelve el stock en la misma transacción (ver GestorSolicitudes.borrar)
+                exito, mensaje = self.solicitudes.borrar(id_solicitud)
+                if exito:
+                    self.modelo.quitar(id_solicitud)
+                else:
+                    messagebox.showerror("Error", mensaje)
+
+    def refrescar(self):
+        """Al volver a la pantalla: recarga las solicitudes (solo se redibuja si cambiaron)."""
+        self.cargar_solicitud()
 
     def limpiar(self):
         """Limpia la pantalla."""
+        if volver_inicio(self.parent):
+            return
         for widget in self.parent.winfo_children():
             widget.destroy()
@@ -0,0 +1,90 @@
+"""
+Módulo de tabla de compatibilidades compilada.
+Representa las compatibilidades 8x8 como máscaras de bits por tipo de sangre,
+para responder "¿es compatible?" y "¿qué tipos sirven?" en O(1).
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+from inventario_sangre import TIPOS_SANGRE, INDICE_TIPO
+
+
+def mascara(tipos: Iterable[str]) -> int:
+    """Convierte una colección de tipos en una máscara de bits (bit i = TIPOS_SANGRE[i])."""
+    m = 0
+    for tipo in tipos:
+        indice = INDICE_TIPO.get(tipo)
+        if indice is not None:
+            m |= 1 << indice
+    return m
+
+
+def tipos_de_mascara(m: int) -> Tuple[str, ...]:
+    """Convierte una máscara de bits en la tupla de tipos (en el orden de TIPOS_SANGRE)."""
+    return tuple(tipo for i, tipo in enumerate(TIPOS_SANGRE) if m >> i & 1)
+
+
+class TablaCompatibilidad:
+    """Compatibilidades precompiladas: máscara de donantes por receptor y de receptores por donante."""
+
+    def __init__(self, compatibilidades: Dict[str, List[str]]):
+        """
+        Compila la tabla una sola vez.
+
+        Args:
+            compatibilidades: Dict receptor -> lista de tipos donables en orden de preferencia
+                (de la tabla compatibilidad o COMPATIBILIDADES_ESTANDAR)
+        """
+        n = len(TIPOS_SANGRE)
+        self.donantes = [0] * n      # donantes[receptor] = máscara de tipos que puede recibir
+        self.receptores = [0] * n    # receptores[donante] = máscara de tipos a los que puede donar
+        self.preferencias = {}       # receptor -> tupla de donables en orden de preferencia
+
+        for receptor, donables in compatibilidades.items():
+            self.preferencias[receptor] = tuple(donables)
+            r = INDICE_TIPO.get(receptor)
+            if r is None:
+                continue
+            for donante in donables:
+                d = INDICE_TIPO.get(donante)
+                if d is None:
+                    continue
+                self.donantes[r] |= 1 << d
+                self.receptores[d] |= 1 << r
+
+    def es_compatible(self, receptor: str, donante: str) -> bool:
+        """Indica si un receptor puede recibir sangre del tipo donante."""
+        r = INDICE_TIPO.get(receptor)
+        d = INDICE_TIPO.get(donante)
+        if r is None or d is None:
+            return receptor == donante
+        return bool(self.donantes[r] >> d & 1)
+
+    def donantes_de(self, receptor: str) -> Tuple[str, ...]:
+        """Tipos que puede recibir un receptor, en orden de preferencia."""
+        return self.preferencias.get(receptor, (receptor,))
+
+    def receptores_de(self, donante: str) -> Tuple[str, ...]:
+        """Todos los receptores a los que puede servir un tipo donante."""
+        d = INDICE_TIPO.get(donante)
+        return tipos_de_mascara(self.receptores[d]) if d is not None else (donante,)
+
+    def donantes_en_stock(self, receptor: str, mascara_stock: int) -> Tuple[str, ...]:
+        """
+        Tipos donables para un receptor que además tienen stock.
+
+        Args:
+            receptor: Tipo del paciente
+            mascara_stock: Máscara de tipos con stock (ver InventarioSangre.mascara_en_stock)
+
+        Returns:
+            Tupla de tipos en orden de preferencia
+        """
+        r = INDICE_TIPO.get(receptor)
+        if r is None:
+            return ()
+        disponibles = self.donantes[r] & mascara_stock
+        if not disponibles:
+            return ()
+        return tuple(t for t in self.donantes_de(receptor)
+                     if t in INDICE_TIPO and disponibles >> INDICE_TIPO[t] & 1)
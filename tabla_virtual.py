@@ -0,0 +1,277 @@
+"""
+Módulo de tabla virtual.
+Un Treeview que solo tiene insertadas las filas visibles (más un pequeño margen):
+al desplazarse se reescriben los valores de esas mismas filas en lugar de tener
+un ítem de Tcl por cada registro. El orden y la selección se guardan por clave
+de fila, así no dependen de qué filas están dibujadas en cada momento.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Dict, Iterable, Optional
+
+# Filas extra dibujadas debajo de las visibles (y margen para pedir más filas)
+BUFFER_FILAS = 5
+
+# Alto de fila si el estilo no define uno
+ALTO_FILA_PREDETERMINADO = 20
+
+# Modificadores de evento que agregan a la selección en lugar de reemplazarla
+_SHIFT = 0x0001
+_CONTROL = 0x0004
+
+
+class TablaVirtual(tk.Frame):
+    """Tabla con scroll virtual sobre una lista de filas en memoria o paginada."""
+
+    def __init__(
+        self,
+        parent,
+        columnas: Iterable[str],
+        anchos: Optional[Dict[str, int]] = None,
+        alto: int = 15,
+        clave: Optional[Callable] = None,
+        formatear: Optional[Callable] = None,
+        orden: Optional[Dict[str, Callable]] = None,
+        al_pedir_mas: Optional[Callable] = None,
+        al_ordenar: Optional[Callable] = None,
+        buffer: int = BUFFER_FILAS,
+        bg: str = "white",
+    ):
+        """
+        Args:
+            parent: Widget contenedor
+            columnas: Encabezados de las columnas
+            anchos: Ancho por columna (100 si no se indica)
+            alto: Filas visibles iniciales (luego se ajusta al tamaño del widget)
+            clave: Función fila -> clave única (por defecto, la primera columna)
+            formatear: Función fila -> valores a mostrar (por defecto, la fila tal cual)
+            orden: Función de orden por columna (por defecto, el valor mostrado)
+            al_pedir_mas: Se llama cuando el scroll se acerca al final de una fuente
+                incompleta; quien la recibe debe llamar luego a agregar_filas()
+            al_ordenar: Si se indica, ordenar(columna) la llama con (columna, descendente)
+                en lugar de ordenar en memoria (para fuentes ordenadas en el servidor)
+            buffer: Filas de margen
+        """
+        super().__init__(parent, bg=bg)
+        self.columnas = tuple(columnas)
+        self.clave = clave or (lambda fila: fila[0])
+        self.formatear = formatear or tuple
+        self.orden = orden or {}
+        self.al_pedir_mas = al_pedir_mas
+        self.al_ordenar = al_ordenar
+        self.buffer = buffer
+
+        self.filas = []
+        self.completa = True
+        self.inicio = 0
+        self.orden_actual = None   # (columna, descendente)
+        self._seleccion = set()    # claves de las filas seleccionadas
+        self._foco = None          # índice (en self.filas) de la fila con el foco
+        self._pidiendo = False
+        self._slots = []           # iids del Treeview, en orden de pantalla
+        self._mostrados = {}       # iid -> valores escritos (para no reescribir los iguales)
+        self._seleccion_dibujada = ()
+        self._visibles = alto
+
+        self.tree = ttk.Treeview(self, columns=self.columnas, show="headings", height=alto)
+        self.scroll = tk.Scrollbar(self, orient="vertical", command=self._yview)
+        self.scroll.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill=tk.BOTH, expand=True)
+
+        anchos = anchos or {}
+        for col in self.columnas:
+            self.tree.heading(col, text=col, command=lambda c=col: self.ordenar(c))
+            self.tree.column(col, width=anchos.get(col, 100))
+
+        self.tree.bind("<Configure>", self._al_redimensionar)
+        self.tree.bind("<<TreeviewSelect>>", self._sincronizar_seleccion)
+        self.tree.bind("<ButtonPress-1>", self._al_click)
+        self.tree.bind("<MouseWheel>", lambda e: self._desplazar(-3 if e.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda e: self._desplazar(-3))
+        self.tree.bind("<Button-5>", lambda e: self._desplazar(3))
+        self.tree.bind("<Up>", lambda e: self._mover_foco(-1))
+        self.tree.bind("<Down>", lambda e: self._mover_foco(1))
+        self.tree.bind("<Prior>", lambda e: self._mover_foco(-self._visibles))
+        self.tree.bind("<Next>", lambda e: self._mover_foco(self._visibles))
+
+    # ------------------------------------------------------------------ datos
+
+    def cargar(self, filas: Iterable, completa: bool = True):
+        """
+        Reemplaza las filas de la tabla.
+
+        Args:
+            filas: Filas crudas (se muestran con formatear())
+            completa: False si la fuente tiene más páginas (se pedirán con al_pedir_mas)
+        """
+        self.filas = list(filas)
+        self.completa = completa
+        self._pidiendo = False
+        if self.orden_actual and self.al_ordenar is None:
+            self._ordenar_en_memoria(*self.orden_actual)
+        claves = {self.clave(f) for f in self.filas}
+        self._seleccion &= claves
+        if self._foco is not None and self._foco >= len(self.filas):
+            self._foco = None
+        self._dibujar()
+
+    def agregar_filas(self, filas: Iterable, completa: bool = True):
+        """Agrega la página siguiente de una fuente paginada."""
+        self.filas.extend(filas)
+        self.completa = completa
+        self._pidiendo = False
+        if self.orden_actual and self.al_ordenar is None:
+            self._ordenar_en_memoria(*self.orden_actual)
+        self._dibujar()
+
+    def filas_seleccionadas(self):
+        """Filas crudas seleccionadas, en el orden en que se muestran."""
+        if not self._seleccion:
+            return []
+        return [f for f in self.filas if self.clave(f) in self._seleccion]
+
+    def claves_seleccionadas(self):
+        return [self.clave(f) for f in self.filas_seleccionadas()]
+
+    def seleccionar(self, claves: Iterable):
+        """Reemplaza la selección por las filas con esas claves."""
+        self._seleccion = set(claves)
+        self._dibujar()
+
+    # ------------------------------------------------------------------ orden
+
+    def ordenar(self, columna: str, descendente: Optional[bool] = None):
+        """Ordena por una columna; un segundo click en la misma invierte el orden."""
+        if descendente is None:
+            descendente = bool(self.orden_actual and self.orden_actual[0] == columna
+                               and not self.orden_actual[1])
+        self.orden_actual = (columna, descendente)
+        for col in self.columnas:
+            flecha = (" ▼" if descendente else " ▲") if col == columna else ""
+            self.tree.heading(col, text=col + flecha)
+        if self.al_ordenar is not None:
+            self.al_ordenar(columna, descendente)
+            return
+        self._ordenar_en_memoria(columna, descendente)
+        self.inicio = 0
+        self._dibujar()
+
+    def _ordenar_en_memoria(self, columna, descendente):
+        indice = self.columnas.index(columna)
+        funcion = self.orden.get(columna) or (lambda fila: self.formatear(fila)[indice])
+
+        def clave_orden(fila):
+            valor = funcion(fila)
+            return (valor is None, valor)
+
+        try:
+            self.filas.sort(key=clave_orden, reverse=descendente)
+        except TypeError:
+            # Columnas con tipos mezclados: ordenar como texto
+            self.filas.sort(key=lambda f: str(funcion(f)), reverse=descendente)
+
+    # ------------------------------------------------------------------ dibujo
+
+    def _dibujar(self):
+        """Reescribe las filas visibles (y el margen) a partir de self.inicio."""
+        total = len(self.filas)
+        self.inicio = max(0, min(self.inicio, total - self._visibles))
+        cantidad = max(0, min(self._visibles + self.buffer, total - self.inicio))
+
+        while len(self._slots) < cantidad:
+            self._slots.append(self.tree.insert("", "end"))
+        while len(self._slots) > cantidad:
+            iid = self._slots.pop()
+            self._mostrados.pop(iid, None)
+            self.tree.delete(iid)
+
+        # Solo se escriben en el Treeview las filas cuyo contenido cambió
+        seleccion_visible = []
+        for i, iid in enumerate(self._slots):
+            fila = self.filas[self.inicio + i]
+            valores = tuple(self.formatear(fila))
+            if self._mostrados.get(iid) != valores:
+                self.tree.item(iid, values=valores)
+                self._mostrados[iid] = valores
+            if self.clave(fila) in self._seleccion:
+                seleccion_visible.append(iid)
+        if tuple(seleccion_visible) != self._seleccion_dibujada:
+            self.tree.selection_set(seleccion_visible)
+            self._seleccion_dibujada = tuple(seleccion_visible)
+        if self._foco is not None and 0 <= self._foco - self.inicio < len(self._slots):
+            self.tree.focus(self._slots[self._foco - self.inicio])
+        # Las filas de margen quedan debajo del área visible: el Treeview no se desplaza solo
+        self.tree.yview_moveto(0)
+
+        if total > self._visibles:
+            self.scroll.set(self.inicio / total, min(1.0, (self.inicio + self._visibles) / total))
+        else:
+            self.scroll.set(0.0, 1.0)
+
+        # Pedir la página siguiente antes de llegar al final
+        if (not self.completa and self.al_pedir_mas is not None and not self._pidiendo
+                and self.inicio + self._visibles + self.buffer >= total):
+            self._pidiendo = True
+            self.al_pedir_mas()
+
+    def _al_redimensionar(self, event):
+        try:
+            alto_fila = int(ttk.Style().lookup("Treeview", "rowheight") or ALTO_FILA_PREDETERMINADO)
+        except (tk.TclError, ValueError):
+            alto_fila = ALTO_FILA_PREDETERMINADO
+        # Se descuenta una fila para el encabezado
+        visibles = max(1, event.height // alto_fila - 1)
+        if visibles != self._visibles:
+            self._visibles = visibles
+            self._dibujar()
+
+    # ------------------------------------------------------------------ eventos
+
+    def _yview(self, *args):
+        """Comando de la barra de scroll: traduce su posición a self.inicio."""
+        if args[0] == "moveto":
+            self.inicio = int(float(args[1]) * len(self.filas))
+        elif args[0] == "scroll":
+            paso = self._visibles if args[2] == "pages" else 1
+            self.inicio += int(args[1]) * paso
+        self._dibujar()
+
+    def _desplazar(self, filas):
+        self.inicio += filas
+        self._dibujar()
+        return "break"
+
+    def _al_click(self, event):
+        iid = self.tree.identify_row(event.y)
+        if iid not in self._slots:
+            return  # encabezado o zona vacía
+        self._foco = self.inicio + self._slots.index(iid)
+        if not event.state & (_SHIFT | _CONTROL):
+            # Un click simple reemplaza la selección, también la que no está en pantalla
+            self._seleccion.clear()
+
+    def _sincronizar_seleccion(self, event=None):
+        """Pasa la selección del Treeview (filas visibles) al set de claves."""
+        seleccionados = set(self.tree.selection())
+        self._seleccion_dibujada = tuple(iid for iid in self._slots if iid in seleccionados)
+        for i, iid in enumerate(self._slots):
+            clave = self.clave(self.filas[self.inicio + i])
+            if iid in seleccionados:
+                self._seleccion.add(clave)
+            else:
+                self._seleccion.discard(clave)
+
+    def _mover_foco(self, delta):
+        """Mueve la fila seleccionada con el teclado, desplazando la ventana si hace falta."""
+        if not self.filas:
+            return "break"
+        foco = 0 if self._foco is None else self._foco + delta
+        self._foco = max(0, min(foco, len(self.filas) - 1))
+        self._seleccion = {self.clave(self.filas[self._foco])}
+        if self._foco < self.inicio:
+            self.inicio = self._foco
+        elif self._foco >= self.inicio + self._visibles:
+            self.inicio = self._foco - self._visibles + 1
+        self._dibujar()
+        return "break"
@@ -0,0 +1,105 @@
+"""
+Pruebas de los endpoints de servicio_http sobre una BD SQLite en memoria.
+
+Uso:
+    python -m unittest test_servicio_http
+"""
+
+import unittest
+from datetime import date, timedelta
+
+from conexion_sqlite import ProveedorSQLite
+
+try:
+    from aiohttp.test_utils import TestClient, TestServer
+except ImportError:  # el servicio es opcional: sin aiohttp no hay nada que probar
+    TestClient = None
+
+if TestClient is not None:
+    from servicio_http import crear_app
+
+
+@unittest.skipIf(TestClient is None, "requiere aiohttp")
+class PruebasServicioHttp(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.db = ProveedorSQLite(":memory:")
+        vencimiento = date.today() + timedelta(days=20)
+        with self.db.transaccion() as cursor:
+            cursor.execute("INSERT INTO hospital (Nombre, direccion, telefono) VALUES ('Central', '-', '-')")
+            self.id_hospital = cursor.lastrowid
+            cursor.executemany('''
+                INSERT INTO reserva (VolumenDisp, FechaExtraccion, Vencimiento, TipodeSangre, Estado)
+                VALUES (%s, %s, %s, %s, 'No vencida')
+            ''', [(450, date.today(), vencimiento, "O-"), (900, date.today(), vencimiento, "A+")])
+        self.cliente = TestClient(TestServer(crear_app(self.db)))
+        await self.cliente.start_server()
+
+    async def asyncTearDown(self):
+        await self.cliente.close()
+
+    async def _json(self, metodo, ruta, estado=200, **opciones):
+        respuesta = await self.cliente.request(metodo, ruta, **opciones)
+        self.assertEqual(respuesta.status, estado, await respuesta.text())
+        return await respuesta.json()
+
+    async def test_stock(self):
+        stock = await self._json("GET", "/stock")
+        self.assertAlmostEqual(stock["total_ml"], 1350)
+        self.assertAlmostEqual(stock["por_tipo"]["A+"]["ml"], 900)
+
+    async def test_disponibilidad(self):
+        cubierta = await self._json("GET", "/disponibilidad", params={"tipo": "A+", "volumen": "1200"})
+        self.assertTrue(cubierta["cubre"])
+        faltante = await self._json("GET", "/disponibilidad", params={"tipo": "O-", "volumen": "1200"})
+        self.assertFalse(faltante["cubre"])
+
+    async def test_volumen_no_finito(self):
+        for volumen in ("nan", "inf", "-5"):
+            await self._json("GET", "/disponibilidad", 400, params={"tipo": "A+", "volumen": volumen})
+        await self._json("POST", "/solicitudes", 400,
+                         json={"id_hospital": self.id_hospital, "tipo": "A+", "volumen": "NaN"})
+
+    async def test_recomendacion_ve_el_stock_de_otros_puestos(self):
+        antes = await self._json("GET", "/recomendacion", params={"tipo": "AB+"})
+        self.assertNotIn("B+", antes["compatibles_en_stock"])
+        with self.db.transaccion() as cursor:
+            cursor.execute('''
+                INSERT INTO reserva (VolumenDisp, FechaExtraccion, Vencimiento, TipodeSangre, Estado)
+                VALUES (450, %s, %s, 'B+', 'No vencida')
+            ''', (date.today(), date.today() + timedelta(days=20)))
+        despues = await self._json("GET", "/recomendacion", params={"tipo": "AB+"})
+        self.assertIn("B+", despues["compatibles_en_stock"])
+
+    async def test_ciclo_de_una_solicitud(self):
+        creada = await self._json("POST", "/solicitudes", 201,
+                                  json={"id_hospital": self.id_hospital, "tipo": "A+", "volumen": 450})
+        ruta = f"/solicitudes/{creada['id']}"
+        self.assertEqual((await self._json("GET", ruta))["estado"], "Pendiente")
+
+        await self._json("POST", ruta + "/aceptar")
+        stock = await self._json("GET", "/stock")
+        self.assertAlmostEqual(stock["total_ml"], 900)
+        # Una solicitud aceptada no se vuelve a aceptar
+        await self._json("POST", ruta + "/aceptar", 409)
+
+        await self._json("POST", ruta + "/despachar")
+        self.assertEqual((await self._json("GET", ruta))["estado"], "Despachada")
+        await self._json("POST", ruta + "/rechazar", 409)
+
+    async def test_solicitud_inexistente(self):
+        await self._json("GET", "/solicitudes/999", 404)
+        await self._json("POST", "/solicitudes/999/aceptar", 404)
+
+    async def test_tipo_desconocido(self):
+        await self._json("POST", "/solicitudes", 400,
+                         json={"id_hospital": self.id_hospital, "tipo": "X+", "volumen": 450})
+
+    async def test_metricas(self):
+        respuesta = await self.cliente.get("/metricas")
+        self.assertEqual(respuesta.status, 200)
+        self.assertTrue(respuesta.headers["Content-Type"].startswith("text/plain"))
+
+
+if __name__ == "__main__":
+    unittest.main()
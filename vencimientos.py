@@ -0,0 +1,138 @@
+"""
+Módulo de vencimientos.
+Marca como 'Vencida' toda la reserva cuya fecha de vencimiento ya pasó, con un
+único UPDATE por rango sobre Vencimiento (usa el índice idx_reserva_vencimiento_id),
+al iniciar la aplicación y luego periódicamente. Las consultas de stock excluyen
+lo vencido con condicion_vigente(), aunque el barrido todavía no haya corrido.
+"""
+
+from datetime import date
+from typing import Callable, Optional
+
+from ejecutor_consultas import obtener_ejecutor
+from registro import obtener_logger
+from versiones_datos import registrar_escritura
+
+# Valor de Estado que pone el barrido
+ESTADO_VENCIDA = "Vencida"
+
+# Valores de Estado que marcan una reserva como vencida
+# (la tabla usa 'Vencida'; algunas cargas viejas usan el código 'V')
+ESTADOS_VENCIDA = ("Vencida", "V")
+
+# Cada cuánto se repite el barrido (ms)
+INTERVALO_BARRIDO_MS = 60 * 60 * 1000
+
+
+def condicion_vigente(alias: str = "") -> str:
+    """
+    Condición SQL de reserva utilizable: no venció por fecha ni está marcada como vencida.
+
+    Args:
+        alias: Alias de la tabla reserva en la consulta (ej: "r")
+    """
+    p = f"{alias}." if alias else ""
+    estados = ", ".join(f"'{e}'" for e in ESTADOS_VENCIDA)
+    return f"{p}Vencimiento >= CURDATE() AND ({p}Estado IS NULL OR {p}Estado NOT IN ({estados}))"
+
+
+# Reservas vencidas por fecha que todavía no están marcadas (las bolsas ya
+# consumidas quedan con VolumenDisp = 0 y no se descartan)
+_CONDICION_A_MARCAR = "Vencimiento < CURDATE() AND VolumenDisp > 0 AND (Estado IS NULL OR Estado <> %s)"
+
+
+def marcar_vencidas(db) -> dict:
+    """
+    Marca como vencidas, en una sola transacción, las reservas con Vencimiento pasado.
+
+    Args:
+        db: ProveedorConexiones de la BD
+
+    Returns:
+        Informe: {"fecha": date, "bolsas": int, "ml": float, "por_tipo": {tipo: (bolsas, ml)}}
+    """
+    por_tipo = {}
+    bolsas = 0
+    with db.transaccion() as cursor:
+        # Lo que se va a marcar, agrupado por tipo, para el informe
+        cursor.execute(f'''
+            SELECT TipodeSangre, COUNT(*), SUM(VolumenDisp) FROM reserva
+            WHERE {_CONDICION_A_MARCAR}
+            GROUP BY TipodeSangre
+        ''', (ESTADO_VENCIDA,))
+        for tipo, cantidad, ml in cursor.fetchall():
+            por_tipo[tipo] = (int(cantidad), float(ml or 0))
+
+        if por_tipo:
+            cursor.execute(f"UPDATE reserva SET Estado = %s WHERE {_CONDICION_A_MARCAR}",
+                           (ESTADO_VENCIDA, ESTADO_VENCIDA))
+            bolsas = cursor.rowcount
+
+    if bolsas:
+        registrar_escritura("reserva")
+    return {
+        "fecha": date.today(),
+        "bolsas": bolsas,
+        "ml": sum(ml for _, ml in por_tipo.values()),
+        "por_tipo": por_tipo,
+    }
+
+
+def texto_informe(informe: dict) -> str:
+    """Texto legible de un informe de marcar_vencidas()."""
+    if not informe["bolsas"]:
+        return "No hay reservas nuevas vencidas."
+    partes = [f"{tipo}: {cantidad} ({ml:.0f} ml)" for tipo, (cantidad, ml) in sorted(informe["por_tipo"].items())]
+    return (f"Se marcaron {informe['bolsas']} reservas como vencidas "
+            f"({informe['ml']:.0f} ml en total):\n" + "\n".join(partes))
+
+
+class BarridoVencimientos:
+    """Ejecuta marcar_vencidas() en segundo plano al iniciar y cada INTERVALO_BARRIDO_MS."""
+
+    def __init__(self, widget, db, intervalo_ms: int = INTERVALO_BARRIDO_MS,
+                 al_informar: Optional[Callable] = None):
+        """
+        Args:
+            widget: Widget de Tk que programa los barridos (normalmente la raíz)
+            db: ProveedorConexiones de la BD
+            intervalo_ms: Tiempo entre barridos
+            al_informar: Callback con el informe cuando se marcó alguna reserva, en el hilo de Tk
+        """
+        self.widget = widget
+        self.db = db
+        self.intervalo_ms = intervalo_ms
+        self.al_informar = al_informar
+        self.ultimo_informe = None
+        self._id_after = None
+
+    def iniciar(self):
+        """Hace un barrido ahora y programa los siguientes."""
+        self.detener()
+        self._barrer()
+
+    def detener(self):
+        if self._id_after is not None:
+            self.widget.after_cancel(self._id_after)
+            self._id_after = None
+
+    def _barrer(self):
+        self._id_after = None
+        obtener_ejecutor(self.widget).ejecutar(
+            "BarridoVencimientos.barrer", lambda: marcar_vencidas(self.db),
+            self._terminado, self._fallo,
+        )
+
+    def _programar(self):
+        self._id_after = self.widget.after(self.intervalo_ms, self._barrer)
+
+    def _terminado(self, informe):
+        self.ultimo_informe = informe
+        if informe["bolsas"] and self.al_informar:
+            self.al_informar(informe)
+        self._programar()
+
+    def _fallo(self, e):
+        # Se reintenta en el próximo intervalo
+        obtener_logger("vencimientos").error("Error al marcar reservas vencidas", exc_info=e)
+        self._programar()
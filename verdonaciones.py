@@ -1,15 +1,36 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
-from PIL import Image, ImageTk
+from recursos import mostrar_logo
+from gestor_pantallas import volver_inicio
 import mysql.connector
+from ejecutor_consultas import obtener_ejecutor
+from tabla_virtual import TablaVirtual
+from modelo_filas import ModeloFilas
+from repositorios import LIMITE_IDS, ListadoPaginado, repositorio_donaciones
+from versiones_datos import registrar_escritura
+from registro import obtener_logger
+from exportacion import VentanaExportacion
+from busqueda import (Debouncer, BuscadorIncremental, CacheResultados, buscar_en_servidor, indice_donantes,
+                      refrescar_indice)
 
 
 class VerDonaciones:
     STANDARD_UNIT_ML = 450.0  # Una unidad estándar = 450 ml
     
-    def __init__(self, parent, conn):
+    def __init__(self, parent, db):
         self.parent = parent
-        self.conn = conn
+        self.db = db
+        self.ejecutor = obtener_ejecutor(parent)
+        # Donaciones por ID de reserva, leídas por páginas (las más recientes primero);
+        # la edición parchea el modelo sin recargar
+        self.repositorio = repositorio_donaciones(db)
+        self.modelo = ModeloFilas(clave=lambda fila: fila[7])
+        self.modelo.suscribir(lambda cambios: self._mostrar_listado())
+        self.listado = ListadoPaginado(self.repositorio, self.modelo, self.ejecutor, "VerDonaciones.listar",
+                                       lambda e: self._error("Error al cargar donaciones", e))
+        self.buscador = None    # se crea cuando el índice de donantes está listo
+        self.buscando = False   # True mientras la tabla muestra una búsqueda y no el listado
+        self.resultados = CacheResultados(lambda fila: fila[0])
 
         # Mapeo de estados (legible <-> valor en BD)
         self.ESTADOS_MAP = {
@@ -28,7 +49,9 @@ class VerDonaciones:
         tk.Label(frame_busqueda, text="Buscar por DNI o Nombre:", font=("Arial", 10), bg="white").grid(row=0, column=0, padx=5, pady=5)
         self.entry_busqueda = tk.Entry(frame_busqueda, width=30, font=("Arial", 10))
         self.entry_busqueda.grid(row=0, column=1, padx=5, pady=5)
-        self.entry_busqueda.bind("<KeyRelease>", lambda e: self.buscar_donaciones())  # Búsqueda en tiempo real
+        # Búsqueda en tiempo real, pero recién cuando se deja de teclear
+        self.debounce = Debouncer(self.entry_busqueda, self.buscar_donaciones)
+        self.entry_busqueda.bind("<KeyRelease>", lambda e: self.debounce.llamar())
 
         tk.Button(
             frame_busqueda,
@@ -43,38 +66,28 @@ class VerDonaciones:
             text="📋 Ver Todos",
             bg="#6c95b0",
             fg="white",
-            command=self.cargar_todas_donaciones,
+            command=self.ver_todas,
             font=("Arial", 10)
         ).grid(row=0, column=3, padx=5, pady=5)
 
+        # Indicador de carga mientras la consulta corre en segundo plano
+        self.cargando_label = tk.Label(frame_busqueda, text="", font=("Arial", 9, "italic"), bg="white", fg="#888")
+        self.cargando_label.grid(row=1, column=0, columnspan=4)
+
         # Marco para la tabla con scrollbar
         table_frame = tk.Frame(parent, bg="white")
         table_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(5, 15))
 
+        # Tabla virtual: solo se dibujan las filas visibles; la clave es el ID de la reserva
         columnas = ("ID", "Donante", "DNI", "Fecha", "Volumen (ml)", "Unidades", "Estado")
-        self.tree = ttk.Treeview(table_frame, columns=columnas, show="headings", height=15)
-        vsb = tk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=vsb.set)
-        vsb.pack(side="right", fill="y")
-        self.tree.pack(side="left", fill=tk.BOTH, expand=True)
-
-        # Configurar encabezados y anchos
-        for col in columnas:
-            self.tree.heading(col, text=col)
-            if col == "ID":
-                self.tree.column(col, width=50, anchor="center")
-            elif col == "Donante":
-                self.tree.column(col, width=120, anchor="w")
-            elif col == "DNI":
-                self.tree.column(col, width=80, anchor="center")
-            elif col == "Fecha":
-                self.tree.column(col, width=100, anchor="center")
-            elif col == "Volumen (ml)":
-                self.tree.column(col, width=90, anchor="center")
-            elif col == "Unidades":
-                self.tree.column(col, width=80, anchor="center")
-            else:
-                self.tree.column(col, width=100, anchor="center")
+        self.tree = TablaVirtual(
+            table_frame, columnas, alto=15,
+            anchos={"ID": 50, "Donante": 120, "DNI": 80, "Fecha": 100, "Volumen (ml)": 90, "Unidades": 80},
+            clave=lambda fila: fila[7],
+            formatear=self._formatear_fila,
+            al_pedir_mas=self._pedir_mas,
+        )
+        self.tree.pack(fill=tk.BOTH, expand=True)
 
         # Botones
         frame_botones = tk.Frame(parent, bg="#f8f8f8")
@@ -89,20 +102,40 @@ class VerDonaciones:
             font=("Arial", 10)
         ).pack(side="left", padx=5)
 
+        tk.Button(
+            frame_botones,
+            text="📤 Exportar",
+            bg="#a37676",
+            fg="white",
+            command=lambda: VentanaExportacion(self.parent, self.db, "donaciones"),
+            font=("Arial", 10)
+        ).pack(side="left", padx=5)
+
         tk.Button(self.parent, text="Cancelar", bg="#f8f8f8", command=self.limpiar, font=("Arial", 10)).pack(side="top", padx=5)
 
         # Doble clic para editar
         def _on_double_click(event):
             try:
-                if self.tree.selection():
+                if self.tree.filas_seleccionadas():
                     self.editar_donacion()
             except Exception:
                 pass
 
-        self.tree.bind("<Double-1>", _on_double_click)
+        self.tree.tree.bind("<Double-1>", _on_double_click)
         
-        # Cargar todas las donaciones al inicio
+        # Cargar todas las donaciones al inicio y preparar el índice de búsqueda
         self.cargar_todas_donaciones()
+        self.ejecutor.ejecutar(
+            "VerDonaciones.indice",
+            lambda: indice_donantes(self.db),
+            self._indice_listo,
+            lambda e: obtener_logger("verdonaciones").error("No se pudo crear el índice de búsqueda", exc_info=e)
+        )
+
+    def _indice_listo(self, indice):
+        self.buscador = BuscadorIncremental(indice)
+        if self.entry_busqueda.get().strip():
+            self.buscar_donaciones()
 
 
 
@@ -110,105 +143,125 @@ class VerDonaciones:
         """Busca donaciones por DNI o Nombre del donante"""
         busqueda = self.entry_busqueda.get().strip()
         
-        try:
-            cursor = self.conn.cursor()
-            
-            if not busqueda:
-                # Si el campo está vacío, cargar todas
-                self.cargar_todas_donaciones()
+        if not busqueda:
+            # Si el campo está vacío, volver al listado
+            self.ejecutor.cancelar("VerDonaciones.buscar")
+            self.buscando = False
+            self._mostrar_listado()
+            return
+        self.buscando = True
+
+        ids = self.buscador.buscar(busqueda) if self.buscador is not None else None
+        if ids:
+            # El índice en memoria da los donantes; sus donaciones se filtran del resultado
+            # anterior o se traen por id_Donante (columna indexada por la clave foránea)
+            filas = self.resultados.filtrar(ids)
+            if filas is not None:
+                self.ejecutor.cancelar("VerDonaciones.buscar")
+                self.mostrar_resultados(filas)
                 return
-            
-            # Buscar por DNI o Nombre (LIKE para búsqueda parcial)
-            query = """
-                SELECT r.id_Donante, d.nombre, d.apellido, d.dni, 
-                       r.FechaExtraccion, r.VolumenDisp, r.Estado
-                FROM reserva r
-                LEFT JOIN donante d ON r.id_Donante = d.id
-                WHERE (d.dni LIKE %s OR CONCAT(d.nombre, ' ', d.apellido) LIKE %s)
-                ORDER BY d.nombre, d.apellido, r.FechaExtraccion DESC
-            """
-            
-            param = f"%{busqueda}%"
-            cursor.execute(query, (param, param))
-            resultados = cursor.fetchall()
-            self.mostrar_resultados(resultados)
-            
-        except mysql.connector.Error as e:
-            messagebox.showerror("Error", f"Error al buscar: {str(e)}")
-        finally:
-            cursor.close()
+
+            def al_recibir(filas):
+                self.resultados.guardar(ids, filas, len(ids) <= LIMITE_IDS)
+                self.mostrar_resultados(filas)
+                if len(ids) > LIMITE_IDS:
+                    self.cargando_label.config(
+                        text=f"Se muestran donaciones de {LIMITE_IDS} de {len(ids)} donantes; refine la búsqueda.")
+
+            self._buscar(lambda: self.repositorio.por_ids("r.id_Donante", ids), al_recibir)
+            return
+
+        # Búsqueda en frío (o sin coincidencias en el índice, que puede no tener lo cargado en
+        # otro puesto): prefijo de DNI o FULLTEXT de nombre en el servidor
+        query = """
+            SELECT r.id_Donante, d.nombre, d.apellido, d.dni, 
+                   r.FechaExtraccion, r.VolumenDisp, r.Estado, r.ID
+            FROM reserva r
+            JOIN donante d ON r.id_Donante = d.id
+            WHERE {condicion}
+            ORDER BY r.ID DESC
+            LIMIT %d
+        """ % LIMITE_IDS
+        self._buscar(lambda: buscar_en_servidor(self.db, query, busqueda), self.mostrar_resultados)
+
+    def ver_todas(self):
+        """Limpia la búsqueda y recarga el listado de donaciones"""
+        self.entry_busqueda.delete(0, tk.END)
+        self.buscando = False
+        self.cargar_todas_donaciones()
 
     def cargar_todas_donaciones(self):
-        """Carga todas las donaciones disponibles"""
-        try:
-            cursor = self.conn.cursor()
-            query = """
-                SELECT r.id_Donante, d.nombre, d.apellido, d.dni,
-                       r.FechaExtraccion, r.VolumenDisp, r.Estado
-                FROM reserva r
-                LEFT JOIN donante d ON r.id_Donante = d.id
-                ORDER BY d.nombre, d.apellido, r.FechaExtraccion DESC
-            """
-            cursor.execute(query)
-            resultados = cursor.fetchall()
-            self.mostrar_resultados(resultados)
-            
-        except mysql.connector.Error as e:
-            messagebox.showerror("Error", f"Error al cargar donaciones: {str(e)}")
-        finally:
-            cursor.close()
+        """Carga la primera página de donaciones; las siguientes llegan al hacer scroll"""
+        def al_terminar(cambios):
+            self.cargando_label.config(text="")
+            if not any(cambios.values()):
+                self._mostrar_listado()
+
+        self.cargando_label.config(text="⏳ Cargando...")
+        self.listado.recargar(al_terminar)
+
+    def _pedir_mas(self):
+        if not self.buscando:
+            self.listado.pedir_mas()
+
+    def _mostrar_listado(self):
+        """Muestra las páginas del listado ya cargadas (si no hay una búsqueda activa)"""
+        if not self.buscando:
+            self.tree.cargar(self.modelo.filas(), completa=self.listado.completo)
+
+    def _buscar(self, consultar, al_recibir):
+        """Ejecuta la búsqueda en segundo plano y muestra el resultado al llegar.
+
+        Las búsquedas comparten la clave, así el resultado de una tecla
+        anterior se descarta si ya se pidió otra consulta.
+        """
+        def al_terminar(resultados):
+            self.cargando_label.config(text="")
+            if self.buscando:
+                al_recibir(resultados)
+
+        self.cargando_label.config(text="⏳ Buscando...")
+        self.ejecutor.ejecutar("VerDonaciones.buscar", consultar, al_terminar,
+                               lambda e: self._error("Error al buscar", e))
+
+    def _error(self, mensaje, e):
+        self.cargando_label.config(text="")
+        messagebox.showerror("Error", f"{mensaje}: {str(e)}")
 
 
     def mostrar_resultados(self, datos):
-        """Muestra resultados en la tabla, con cálculo de unidades"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        """Muestra resultados en la tabla (el formato se aplica solo a las filas visibles)"""
+        self.tree.cargar(datos)
 
-        for fila in datos:
-            fila_list = list(fila)
-            # fila esperada: (id_Donante, nombre, apellido, dni, FechaExtraccion, VolumenDisp, Estado)
-            
-            # Convertir estado a legible
-            if len(fila_list) >= 7:
-                fila_list[6] = self.ESTADOS_REVERSE.get(fila_list[6], fila_list[6])
-            
-            # Calcular unidades: VolumenDisp / 450
-            volumen_index = 5  # VolumenDisp está en índice 5
-            if len(fila_list) > volumen_index and fila_list[volumen_index]:
-                try:
-                    volumen = float(fila_list[volumen_index])
-                    unidades = round(volumen / self.STANDARD_UNIT_ML, 2)
-                except (ValueError, TypeError):
-                    unidades = 0
-            else:
-                unidades = 0
-            
-            # Armar fila para mostrar: (ID, Donante, DNI, Fecha, Volumen, Unidades, Estado)
-            id_donante = fila_list[0]
-            nombre_completo = f"{fila_list[1]} {fila_list[2]}" if fila_list[1] and fila_list[2] else "Anónimo"
-            dni = fila_list[3] if len(fila_list) > 3 else ""
-            fecha = fila_list[4] if len(fila_list) > 4 else ""
-            volumen = fila_list[5] if len(fila_list) > 5 else ""
-            estado = fila_list[6] if len(fila_list) > 6 else ""
-            
-            valores_mostrar = (id_donante, nombre_completo, dni, fecha, volumen, unidades, estado)
-            self.tree.insert("", "end", values=valores_mostrar)
+    def _formatear_fila(self, fila):
+        """Arma la fila a mostrar, con cálculo de unidades"""
+        # fila: (id_Donante, nombre, apellido, dni, FechaExtraccion, VolumenDisp, Estado, ID reserva)
+        # Calcular unidades: VolumenDisp / 450
+        try:
+            unidades = round(float(fila[5]) / self.STANDARD_UNIT_ML, 2) if fila[5] else 0
+        except (ValueError, TypeError):
+            unidades = 0
+
+        # Armar fila para mostrar: (ID, Donante, DNI, Fecha, Volumen, Unidades, Estado)
+        nombre_completo = f"{fila[1]} {fila[2]}" if fila[1] and fila[2] else "Anónimo"
+        estado = self.ESTADOS_REVERSE.get(fila[6], fila[6])
+        return (fila[0], nombre_completo, fila[3], fila[4], fila[5], unidades, estado)
 
 
     def editar_donacion(self):
-        selected_item = self.tree.selection()
-        if not selected_item:
+        seleccion = self.tree.filas_seleccionadas()
+        if not seleccion:
             messagebox.showerror("Error", "Debe seleccionar un registro para editar.")
             return
 
-        item = self.tree.item(selected_item[0])
-        datos = item["values"]
-        # datos = (ID, Donante, DNI, Fecha, Volumen, Unidades, Estado)
+        datos = seleccion[0]
+        # datos = (id_Donante, nombre, apellido, dni, FechaExtraccion, VolumenDisp, Estado, ID reserva)
         
         id_donante = datos[0]
-        fecha = datos[3]
-        volumen = datos[4]
-        estado = datos[6]
+        id_reserva = datos[7]
+        fecha = datos[4]
+        volumen = datos[5]
+        estado = self.ESTADOS_REVERSE.get(datos[6], datos[6])
 
         ventana_editar = tk.Toplevel(self.parent)
         ventana_editar.title("Editar Donación")
@@ -248,18 +301,21 @@ class VerDonaciones:
 
             try:
                 nuevo_volumen = float(nuevo_volumen)
-                cursor = self.conn.cursor()
-                cursor.execute('''
-                    UPDATE reserva
-                    SET FechaExtraccion = %s, VolumenDisp = %s, Estado = %s
-                    WHERE id_Donante = %s AND FechaExtraccion = %s
-                ''', (nueva_fecha, nuevo_volumen, nuevo_estado_bd, id_donante, fecha))
-                self.conn.commit()
-                cursor.close()
+                with self.db.transaccion() as cursor:
+                    cursor.execute('''
+                        UPDATE reserva
+                        SET FechaExtraccion = %s, VolumenDisp = %s, Estado = %s
+                        WHERE ID = %s
+                    ''', (nueva_fecha, nuevo_volumen, nuevo_estado_bd, id_reserva))
+                registrar_escritura("reserva")
 
                 messagebox.showinfo("Éxito", "Donación actualizada correctamente.")
                 ventana_editar.destroy()
-                self.cargar_todas_donaciones()
+                self.modelo.modificar(id_reserva, {4: nueva_fecha, 5: nuevo_volumen, 6: nuevo_estado_bd})
+                # El resultado de búsqueda guardado tiene la fila vieja
+                self.resultados.invalidar()
+                if self.buscando:
+                    self.buscar_donaciones()
             except ValueError:
                 messagebox.showerror("Error", "El volumen debe ser un número válido.")
             except mysql.connector.Error as e:
@@ -272,14 +328,17 @@ class VerDonaciones:
         for widget in self.parent.winfo_children():
             widget.destroy()
 
+    def refrescar(self):
+        """Al volver a la pantalla: recarga el listado con diff y, si había una búsqueda, la repite."""
+        self.resultados.invalidar()
+        self.cargar_todas_donaciones()
+        # Con el índice revisado (otro puesto pudo agregar o borrar donantes), _indice_listo repite la búsqueda
+        self.ejecutor.ejecutar("VerDonaciones.indice", lambda: refrescar_indice(self.db),
+                               self._indice_listo, lambda e: self.buscar_donaciones())
+
     def limpiar(self):
+        # Dentro del menú la pantalla se oculta y se conserva; suelta, se limpia como siempre
+        if volver_inicio(self.parent):
+            return
         self.cancelar()
-        logo_path = "imagenbanco.jpg"
-        try:
-            image = Image.open(logo_path)
-            logo = ImageTk.PhotoImage(image)
-            logo_label = tk.Label(self.parent, image=logo, bg="white")
-            logo_label.image = logo
-            logo_label.pack(pady=20)
-        except Exception as e:
-            tk.Label(self.parent, text="No se encontró el logo.", font=("Arial", 16), bg="white").pack()
\ No newline at end of file
+        mostrar_logo(self.parent)
\ No newline at end of file
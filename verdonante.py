@@ -1,25 +1,50 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
-from PIL import Image, ImageTk
+from recursos import mostrar_logo
+from gestor_pantallas import volver_inicio
 from tkcalendar import DateEntry
 import mysql.connector
 from datetime import datetime
+from cache_catalogos import tipos_sangre as catalogo_tipos_sangre, id_tipo_sangre
+from ejecutor_consultas import obtener_ejecutor
+from tabla_virtual import TablaVirtual
+from modelo_filas import ModeloFilas
+from repositorios import LIMITE_IDS, ListadoPaginado, repositorio_donantes
+from versiones_datos import registrar_escritura
+from registro import obtener_logger
+from busqueda import (Debouncer, BuscadorIncremental, CacheResultados, INDICE_DONANTES,
+                      buscar_en_servidor, indice_donantes, refrescar_indice)
 
 class VerDonante:
-    def __init__(self, parent, conn):
+    def __init__(self, parent, db):
         self.parent = parent
-        self.conn = conn
+        self.db = db
+        self.ejecutor = obtener_ejecutor(parent)
         self.tabla_donantes = None
+        self.buscador = None   # se crea cuando el índice de donantes está listo
+        self.buscando = False  # True mientras la tabla muestra una búsqueda y no el listado
+        self.resultados = CacheResultados(lambda fila: fila[0])
+
+        # Listado de donantes por páginas de (apellido, nombre, id)
+        self.repositorio = repositorio_donantes(db)
+        self.modelo = ModeloFilas(orden=lambda fila: (fila[2] or "", fila[1] or "", fila[0]))
+        self.modelo.suscribir(lambda cambios: self._mostrar_listado())
+        self.listado = ListadoPaginado(self.repositorio, self.modelo, self.ejecutor, "VerDonante.listar",
+                                       lambda e: self._error("Error al cargar todos los donantes", e))
 
         tk.Label(parent, text="Consulta de Donantes", font=("Arial", 16), bg="white").pack(pady=10)
         
         frame_busqueda = tk.Frame(parent, bg="white")
         frame_busqueda.pack(pady=10)
 
-        tk.Label(frame_busqueda, text="Ingrese el DNI del donante:", bg="white").grid(row=0, column=0, padx=5)
+        tk.Label(frame_busqueda, text="Ingrese el DNI o nombre del donante:", bg="white").grid(row=0, column=0, padx=5)
         self.entrada_dni = tk.Entry(frame_busqueda, width=30)
         self.entrada_dni.grid(row=0, column=1, padx=5)
 
+        # Búsqueda mientras se escribe, recién cuando se deja de teclear
+        self.debounce = Debouncer(self.entrada_dni, lambda: self.realizar_busqueda(self.entrada_dni.get(), avisar=False))
+        self.entrada_dni.bind("<KeyRelease>", lambda e: self.debounce.llamar())
+
         tk.Button(
             frame_busqueda,
             text="🔍 Buscar",
@@ -32,16 +57,15 @@ class VerDonante:
             text="📋 Ver Todos",
             bg="#6c95b0",
             fg="white",
-            command=self.cargar_todos_los_donantes
+            command=self.ver_todos
         ).grid(row=0, column=3, padx=5)
 
-        columnas = ("ID", "Nombre", "Apellido", "Fecha Nacimiento", "Sexo", "DNI", "Teléfono", "Correo", "Dirección", "Última donación", "Tipo Sangre")
-        self.tabla_donantes = ttk.Treeview(parent, columns=columnas, show="headings", height=15)
-
-        for col in columnas:
-            self.tabla_donantes.heading(col, text=col)
-            self.tabla_donantes.column(col, width=100)
+        # Indicador de carga mientras la consulta corre en segundo plano
+        self.cargando_label = tk.Label(frame_busqueda, text="", font=("Arial", 9, "italic"), bg="white", fg="#888")
+        self.cargando_label.grid(row=1, column=0, columnspan=4)
 
+        columnas = ("ID", "Nombre", "Apellido", "Fecha Nacimiento", "Sexo", "DNI", "Teléfono", "Correo", "Dirección", "Última donación", "Tipo Sangre")
+        self.tabla_donantes = TablaVirtual(parent, columnas, alto=15, al_pedir_mas=self._pedir_mas)
         self.tabla_donantes.pack(pady=20)
 
         button_frame = tk.Frame(parent, bg="white")
@@ -51,68 +75,122 @@ class VerDonante:
         tk.Button(button_frame, text="Eliminar Donante", bg="#f8f8f8", command=self.eliminar_donante).pack(side="left", padx=10)
         tk.Button(self.parent, text="Cancelar", bg="#f8f8f8", command=self.limpiar).pack(side="top", padx=5)
         
-        # Cargar todos los donantes al iniciar la vista
+        # Cargar todos los donantes al iniciar la vista y preparar el índice de búsqueda
         self.cargar_todos_los_donantes()
+        self.ejecutor.ejecutar(
+            "VerDonante.indice",
+            lambda: indice_donantes(self.db),
+            self._indice_listo,
+            lambda e: obtener_logger("verdonante").error("No se pudo crear el índice de búsqueda", exc_info=e)
+        )
 
-    def realizar_busqueda(self, dni):
-        if not dni:
-            # Si el DNI está vacío, simplemente cargamos todos los donantes
-            self.cargar_todos_los_donantes()
+    def _indice_listo(self, indice):
+        self.buscador = BuscadorIncremental(indice)
+
+    def realizar_busqueda(self, texto, avisar=True):
+        """
+        Busca donantes por DNI o nombre.
+
+        Args:
+            texto: DNI (o parte) o nombre y apellido (o parte)
+            avisar: Si es True, informa con un mensaje cuando no hay resultados
+        """
+        texto = texto.strip()
+        mensaje_vacio = "No se encontró un donante con ese DNI o nombre." if avisar else None
+        if not texto:
+            # Si la búsqueda está vacía, volvemos al listado de donantes
+            self.ejecutor.cancelar("VerDonante.buscar")
+            self.buscando = False
+            self._mostrar_listado()
             return
+        self.buscando = True
+
+        ids = self.buscador.buscar(texto) if self.buscador is not None else None
+        if ids:
+            # El índice en memoria da los ids; las filas se filtran del resultado anterior
+            # o se traen por clave primaria
+            filas = self.resultados.filtrar(ids)
+            if filas is not None:
+                self.ejecutor.cancelar("VerDonante.buscar")
+                self._mostrar_busqueda(filas, mensaje_vacio)
+                return
 
-        try:
-            cursor = self.conn.cursor()
-            query = """
-                SELECT d.id, d.nombre, d.apellido, d.fecha_n, d.sexo, d.DNI, d.telefono, d.Correo, 
-                       d.direccion, d.UltimaD, ts.TipodeSangre 
-                FROM donante d 
-                JOIN TipodeSangre ts ON ts.id = d.id_TipodeSangre 
-                WHERE dni = %s
-            """
-            cursor.execute(query, (dni,))
-            resultado = cursor.fetchall()
+            def al_recibir(filas):
+                self.resultados.guardar(ids, filas, len(ids) <= LIMITE_IDS)
+                self._mostrar_busqueda(filas, mensaje_vacio, len(ids))
 
-            for row in self.tabla_donantes.get_children():
-                self.tabla_donantes.delete(row)
+            self._buscar(lambda: self.repositorio.por_ids("d.id", ids), al_recibir)
+            return
 
-            if resultado:
-                for registro in resultado:
-                    self.tabla_donantes.insert("", "end", values=registro)
-            else:
-                messagebox.showinfo("Información", "No se encontró un donante con ese DNI.")
-        except mysql.connector.Error as e:
-            messagebox.showerror("Error", f"Error al conectar con la base de datos: {e}")
+        # Búsqueda en frío (o sin coincidencias en el índice, que puede no tener lo cargado en
+        # otro puesto): prefijo de DNI o FULLTEXT de nombre en el servidor
+        query = (self.repositorio.select + " WHERE {condicion} ORDER BY d.apellido, d.nombre, d.id"
+                 + f" LIMIT {LIMITE_IDS}")
+        self._buscar(lambda: buscar_en_servidor(self.db, query, texto),
+                     lambda filas: self._mostrar_busqueda(filas, mensaje_vacio))
+
+    def ver_todos(self):
+        """Limpia la búsqueda y recarga el listado de donantes."""
+        self.entrada_dni.delete(0, tk.END)
+        self.buscando = False
+        self.cargar_todos_los_donantes()
 
     def cargar_todos_los_donantes(self):
-        """Carga todos los donantes de la base de datos en la tabla."""
-        try:
-            cursor = self.conn.cursor()
-            query = """
-                SELECT d.id, d.nombre, d.apellido, d.fecha_n, d.sexo, d.DNI, d.telefono, d.Correo, 
-                       d.direccion, d.UltimaD, ts.TipodeSangre 
-                FROM donante d 
-                LEFT JOIN TipodeSangre ts ON ts.id = d.id_TipodeSangre 
-                ORDER BY d.apellido, d.nombre
-            """
-            cursor.execute(query)
-            resultado = cursor.fetchall()
-
-            for row in self.tabla_donantes.get_children():
-                self.tabla_donantes.delete(row)
-
-            if resultado:
-                for registro in resultado:
-                    self.tabla_donantes.insert("", "end", values=registro)
-        except mysql.connector.Error as e:
-            messagebox.showerror("Error", f"Error al cargar todos los donantes: {e}")
+        """Carga la primera página de donantes; las siguientes llegan al hacer scroll."""
+        def al_terminar(cambios):
+            self.cargando_label.config(text="")
+            if not any(cambios.values()):
+                self._mostrar_listado()
+
+        self.cargando_label.config(text="⏳ Cargando...")
+        self.listado.recargar(al_terminar)
+
+    def _pedir_mas(self):
+        if not self.buscando:
+            self.listado.pedir_mas()
+
+    def _buscar(self, consultar, al_recibir):
+        """Ejecuta una búsqueda en segundo plano (una búsqueda nueva descarta la anterior)."""
+        def al_terminar(filas):
+            self.cargando_label.config(text="")
+            if self.buscando:
+                al_recibir(filas)
+
+        self.cargando_label.config(text="⏳ Buscando...")
+        self.ejecutor.ejecutar("VerDonante.buscar", consultar, al_terminar,
+                               lambda e: self._error("Error al conectar con la base de datos", e))
+
+    def _error(self, mensaje, e):
+        self.cargando_label.config(text="")
+        messagebox.showerror("Error", f"{mensaje}: {e}")
+
+    def _mostrar_listado(self):
+        """Muestra las páginas del listado ya cargadas (si no hay una búsqueda activa)."""
+        if not self.buscando:
+            self.tabla_donantes.cargar(self.modelo.filas(), completa=self.listado.completo)
+
+    def _mostrar_busqueda(self, filas, mensaje_vacio=None, coincidencias=None):
+        """Llena la tabla con el resultado de una búsqueda."""
+        self.tabla_donantes.cargar(filas)
+        if coincidencias and coincidencias > LIMITE_IDS:
+            self.cargando_label.config(text=f"Se muestran {LIMITE_IDS} de {coincidencias} coincidencias; refine la búsqueda.")
+        if not filas and mensaje_vacio:
+            messagebox.showinfo("Información", mensaje_vacio)
+
+    def _actualizar_busqueda(self):
+        """Después de editar o borrar: el resultado guardado ya no vale."""
+        self.resultados.invalidar()
+        if self.buscando:
+            self.realizar_busqueda(self.entrada_dni.get(), avisar=False)
 
     def editar_donante(self):
-        seleccionado = self.tabla_donantes.selection()
+        seleccionado = self.tabla_donantes.filas_seleccionadas()
         if not seleccionado:
             messagebox.showwarning("Advertencia", "Por favor, seleccione un registro para editar.")
             return
 
-        valores = self.tabla_donantes.item(seleccionado)["values"]
+        valores = ["" if v is None else v for v in seleccionado[0]]
+        id_donante = valores[0]
         entrada_dni = valores[5]
 
         ventana_editar = tk.Toplevel()
@@ -144,9 +222,7 @@ class VerDonante:
 
             elif etiquetas[i] == "Tipo Sangre":
                 try:
-                    cursor = self.conn.cursor()
-                    cursor.execute("SELECT TipodeSangre FROM TipodeSangre")
-                    tipos_sangre = [fila[0] for fila in cursor.fetchall()]
+                    tipos_sangre = catalogo_tipos_sangre(self.db)
                 except:
                     tipos_sangre = ["A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"]
                 entrada = ttk.Combobox(ventana_editar, values=tipos_sangre)
@@ -172,7 +248,7 @@ class VerDonante:
             fg="white",
             font=("Arial", 10, "bold"),
             width=12,
-            command=lambda: self.guardar_cambios(entrada_dni, entradas)
+            command=lambda: self.guardar_cambios(entrada_dni, entradas, id_donante)
         )
         btn_guardar.pack(side="left", padx=10)
 
@@ -189,7 +265,7 @@ class VerDonante:
         btn_cancelar.pack(side="left", padx=10)
 
 
-    def guardar_cambios(self, entrada_dni, entradas):
+    def guardar_cambios(self, entrada_dni, entradas, id_donante=None):
         nuevos_datos = []
         for entrada in entradas:
             if isinstance(entrada, DateEntry):
@@ -205,54 +281,57 @@ class VerDonante:
 
         tipo_sangre_nombre = nuevos_datos[-1]
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT id FROM TipodeSangre WHERE TipodeSangre = %s", (tipo_sangre_nombre,))
-            resultado = cursor.fetchone()
-            if resultado:
-                id_tipo_sangre = resultado[0]
-            else:
+            id_tipo = id_tipo_sangre(self.db, tipo_sangre_nombre)
+            if id_tipo is None:
                 messagebox.showerror("Error", f"No se encontró el tipo de sangre '{tipo_sangre_nombre}' en la base de datos.")
                 return
         except mysql.connector.Error as e:
             messagebox.showerror("Error", f"No se pudo obtener el ID del tipo de sangre: {e}")
             return
 
-        nuevos_datos[-1] = id_tipo_sangre
+        # Fila tal como la muestra el listado, para parchear la tabla sin recargar
+        fila_nueva = (id_donante, *nuevos_datos)
+        nuevos_datos[-1] = id_tipo
 
         try:
-            cursor = self.conn.cursor()
             update_query = """
             UPDATE donante
             SET nombre = %s, apellido = %s, fecha_n = %s, sexo = %s, DNI = %s,
                 telefono = %s, Correo = %s, direccion = %s, UltimaD = %s, id_TipodeSangre = %s
             WHERE DNI = %s
             """
-            cursor.execute(update_query, (*nuevos_datos, entrada_dni))
-            self.conn.commit()
+            with self.db.transaccion() as cursor:
+                cursor.execute(update_query, (*nuevos_datos, entrada_dni))
+            registrar_escritura("donante")
+            if id_donante is not None:
+                INDICE_DONANTES.agregar(id_donante, nuevos_datos[4], nuevos_datos[0], nuevos_datos[1])
+                self.modelo.actualizar(fila_nueva)
             messagebox.showinfo("Éxito", "Datos actualizados correctamente.")            
-            self.realizar_busqueda()
+            self._actualizar_busqueda()
         except mysql.connector.Error as e:
             messagebox.showerror("Error", f"No se pudo actualizar el donante: {e}")
          
     def eliminar_donante(self):
-        seleccionado = self.tabla_donantes.selection()
+        seleccionado = self.tabla_donantes.filas_seleccionadas()
         if not seleccionado:
             messagebox.showwarning("Advertencia", "Por favor, seleccione un registro para eliminar.")
             return
 
-        valores = self.tabla_donantes.item(seleccionado)["values"]
+        valores = seleccionado[0]
         entrada_dni = valores[5]
 
         respuesta = messagebox.askyesno("Confirmación", "¿Estás seguro de que deseas eliminar este registro?")
         if respuesta:
             try:
-                cursor = self.conn.cursor()
-                cursor.execute("SET FOREIGN_KEY_CHECKS=0")
-                cursor.execute("DELETE FROM donante WHERE DNI = %s", (entrada_dni,))
-                cursor.execute("SET FOREIGN_KEY_CHECKS=1")
-                self.conn.commit()
+                with self.db.transaccion() as cursor:
+                    cursor.execute("SET FOREIGN_KEY_CHECKS=0")
+                    cursor.execute("DELETE FROM donante WHERE DNI = %s", (entrada_dni,))
+                    cursor.execute("SET FOREIGN_KEY_CHECKS=1")
+                registrar_escritura("donante")
+                INDICE_DONANTES.quitar_por_dni(entrada_dni)
+                self.modelo.quitar(*[f[0] for f in self.modelo.filas() if str(f[5]) == str(entrada_dni)])
                 messagebox.showinfo("Éxito", "Donante eliminado correctamente.")
-                self.cargar_todos_los_donantes() # Recargar todos tras eliminar
+                self._actualizar_busqueda()
             except mysql.connector.Error as e:
                 messagebox.showerror("Error", f"No se pudo eliminar el donante: {e}")
 
@@ -260,14 +339,20 @@ class VerDonante:
         for widget in self.parent.winfo_children():
             widget.destroy()
 
+    def refrescar(self):
+        """Al volver a la pantalla: recarga el listado con diff y, si había una búsqueda, la repite."""
+        self.cargar_todos_los_donantes()
+        # Primero se revisa el índice (otro puesto pudo agregar o borrar donantes) y después se repite la búsqueda
+        self.ejecutor.ejecutar("VerDonante.indice", lambda: refrescar_indice(self.db),
+                               self._indice_refrescado, lambda e: self._actualizar_busqueda())
+
+    def _indice_refrescado(self, indice):
+        self._indice_listo(indice)
+        self._actualizar_busqueda()
+
     def limpiar(self):
+        # Dentro del menú la pantalla se oculta y se conserva; suelta, se limpia como siempre
+        if volver_inicio(self.parent):
+            return
         self.cancelar()
-        logo_path = "imagenbanco.jpg"
-        try:
-            image = Image.open(logo_path)
-            logo = ImageTk.PhotoImage(image)
-            logo_label = tk.Label(self.parent, image=logo, bg="white")
-            logo_label.image = logo
-            logo_label.pack(pady=20)
-        except Exception:
-            tk.Label(self.parent, text="No se encontró el logo.", font=("Arial", 16), bg="white").pack()
+        mostrar_logo(self.parent)
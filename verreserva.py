@@ -1,9 +1,22 @@
 import tkinter as tk
-from tkinter import messagebox, ttk
-from PIL import Image, ImageTk
+from tkinter import filedialog, messagebox, ttk
+from recursos import mostrar_logo
+from gestor_pantallas import volver_inicio
+import math
 import mysql.connector
 from datetime import datetime
 from compatibilidad_sangre import GestorCompatibilidadSangre
+from cache_catalogos import tipos_sangre as catalogo_tipos_sangre
+from ejecutor_consultas import obtener_ejecutor
+from tabla_virtual import TablaVirtual
+from modelo_filas import ModeloFilas
+from repositorios import ListadoPaginado, repositorio_reserva
+from inventario_sangre import TIPOS_SANGRE
+from resumen_stock import DIAS_POR_VENCER, resumen_stock
+from versiones_datos import VERSIONES, registrar_escritura
+from registro import obtener_logger
+from importacion import escribir_informe, importar_reservas, texto_resultado
+from exportacion import VentanaExportacion
 
 
 class Reserva:
@@ -21,10 +34,23 @@ class Reserva:
     # Inverso: valor en BD -> etiqueta legible para mostrar en UI (idéntico aquí)
     ESTADOS_REVERSE = {v: k for k, v in ESTADOS_MAP.items()}
     
-    def __init__(self, parent, conn):
+    def __init__(self, parent, db):
         self.parent = parent
-        self.conn = conn
-        self.gestor_compat = GestorCompatibilidadSangre(conn)
+        self.db = db
+        # Versión de reserva con la que se cargó el inventario (antes de leerlo: lo leído ya la incluye)
+        self._version_inventario = VERSIONES.version("reserva")
+        self.gestor_compat = GestorCompatibilidadSangre(db)
+        self.ejecutor = obtener_ejecutor(parent)
+        self.stock_data = []
+        # Filas de reserva por ID, en el orden del listado (Vencimiento, ID).
+        # Las escrituras de esta pantalla lo parchean sin volver a leer toda la tabla
+        self.modelo = ModeloFilas(orden=lambda rec: (str(rec[2]), rec[0]))
+        self.modelo.suscribir(self._modelo_cambiado)
+        # El stock se lee por páginas de (Vencimiento, ID); la tabla pide la siguiente al llegar al final
+        self.listado = ListadoPaginado(repositorio_reserva(db), self.modelo, self.ejecutor,
+                                       "Reserva.cargar_stock", self._error_cargar_stock)
+        # Totales por tipo calculados en el servidor (GROUP BY), cacheados entre escrituras
+        self.resumen = resumen_stock(db, unidad_ml=self.STANDARD_UNIT_ML)
 
         # Título principal (más compacto)
         tk.Label(parent, text="Gestión de Reserva de Sangre", font=("Arial", 16, "bold"), bg="white").pack(pady=6)
@@ -163,6 +189,21 @@ class Reserva:
         self.unit_note = tk.Label(stock_frame, text=f"Unidad estándar: {self.STANDARD_UNIT_ML:.0f} ml", font=("Arial", 10, "italic"), bg="white", fg="#555")
         self.unit_note.pack(anchor="w", padx=6, pady=(0,6))
 
+        # Tablero: unidades estándar por tipo, por vencer y vencidas
+        resumen_frame = tk.Frame(stock_frame, bg="white")
+        resumen_frame.pack(fill=tk.X, padx=6, pady=(0, 6))
+        self.summary_labels = {}
+        for i, tipo in enumerate(TIPOS_SANGRE):
+            lbl = tk.Label(resumen_frame, text=f"{tipo}: -", font=("Arial", 10), bg="#f9f9f9", fg="#333",
+                           relief="groove", padx=6, pady=3, anchor="w", justify="left")
+            lbl.grid(row=i // 4, column=i % 4, sticky="ew", padx=2, pady=2)
+            resumen_frame.grid_columnconfigure(i % 4, weight=1)
+            self.summary_labels[tipo] = lbl
+
+        # Indicador de carga mientras la consulta corre en segundo plano
+        self.cargando_label = tk.Label(stock_frame, text="", font=("Arial", 10, "italic"), bg="white", fg="#888")
+        self.cargando_label.pack(anchor="w", padx=6)
+
         columnas = ("ID", "Volumen (ml)", "Vencimiento", "Tipo", "Estado")
         # Aumentar tamaño visual de la tabla: fuente y alto de fila
         style = ttk.Style()
@@ -171,21 +212,16 @@ class Reserva:
             style.configure("Treeview.Heading", font=("Arial", 12, "bold"))
         except Exception:
             pass
-        # Mayor altura inicial para ocupar más espacio al maximizar
-        self.tabla_stock = ttk.Treeview(stock_frame, columns=columnas, show="headings", height=20)
-
-        for col in columnas:
-            self.tabla_stock.heading(col, text=col)
-            if col == "ID":
-                self.tabla_stock.column(col, width=40)
-            elif col == "Volumen (ml)":
-                self.tabla_stock.column(col, width=100)
-            elif col == "Vencimiento":
-                self.tabla_stock.column(col, width=100)
-            elif col == "Tipo":
-                self.tabla_stock.column(col, width=80)
-            else:
-                self.tabla_stock.column(col, width=100)
+        # Mayor altura inicial para ocupar más espacio al maximizar.
+        # La tabla es virtual: solo dibuja las filas visibles aunque haya miles de reservas
+        self.tabla_stock = TablaVirtual(
+            stock_frame, columnas, alto=20,
+            anchos={"ID": 40, "Volumen (ml)": 100, "Vencimiento": 100, "Tipo": 80, "Estado": 100},
+            formatear=self._formatear_fila_stock,
+            al_pedir_mas=self.listado.pedir_mas,
+            orden={"ID": lambda rec: rec[0], "Volumen (ml)": lambda rec: float(rec[1] or 0),
+                   "Vencimiento": lambda rec: rec[2]},
+        )
 
         # Empaquetar expandiendo; la tabla ahora crecerá más al maximizar
         self.tabla_stock.pack(fill=tk.BOTH, expand=True)
@@ -205,12 +241,14 @@ class Reserva:
                  command=self.editar_reserva, padx=15, pady=6).pack(side=tk.LEFT, padx=5)
         tk.Button(table_button_frame, text="🗑️ Eliminar", bg="#dc3545", fg="white", font=("Arial", 10, "bold"),
                  command=self.borrar_reserva, padx=15, pady=6).pack(side=tk.LEFT, padx=5)
+        tk.Button(table_button_frame, text="📥 Importar CSV/Excel", bg="#5bc0de", fg="white", font=("Arial", 10, "bold"),
+                 command=self.importar_archivo, padx=15, pady=6).pack(side=tk.LEFT, padx=5)
+        tk.Button(table_button_frame, text="📤 Exportar", bg="#5bc0de", fg="white", font=("Arial", 10, "bold"),
+                 command=lambda: VentanaExportacion(self.parent, self.db, "reserva"), padx=15, pady=6).pack(side=tk.LEFT, padx=5)
 
     def cargar_tipos_sangre(self):
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT TipodeSangre FROM tipodesangre")
-            return [row[0] for row in cursor.fetchall()]
+            return catalogo_tipos_sangre(self.db)
         except mysql.connector.Error as e:
             messagebox.showerror("Error", f"Error al cargar tipos de sangre: {e}")
             return []
@@ -218,14 +256,14 @@ class Reserva:
     def cargar_donantes_para_combo(self):
         """Carga los donantes para el combobox en formato 'ID - DNI - Nombre'."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                SELECT d.id, d.dni, d.nombre, d.apellido, ts.TipodeSangre
-                FROM donante d
-                LEFT JOIN tipodesangre ts ON d.id_TipodeSangre = ts.id
-                ORDER BY d.apellido, d.nombre
-            ''')
-            self.donantes_data = cursor.fetchall()
+            with self.db.cursor() as cursor:
+                cursor.execute('''
+                    SELECT d.id, d.dni, d.nombre, d.apellido, ts.TipodeSangre
+                    FROM donante d
+                    LEFT JOIN tipodesangre ts ON d.id_TipodeSangre = ts.id
+                    ORDER BY d.apellido, d.nombre
+                ''')
+                self.donantes_data = cursor.fetchall()
             # Formatear para mostrar en el combobox
             return [f"{row[0]} - {row[1]} - {row[2]} {row[3]}" for row in self.donantes_data]
         except mysql.connector.Error as e:
@@ -277,7 +315,7 @@ class Reserva:
             # Convertir volumen a decimal
             try:
                 volumen_decimal = float(datos["Volúmen donado:"])
-                if volumen_decimal <= 0:
+                if not math.isfinite(volumen_decimal) or volumen_decimal <= 0:
                     raise ValueError("El volumen debe ser un número positivo.")
             except ValueError:
                 raise ValueError("El volumen debe ser un número válido (puede incluir decimales).")
@@ -308,7 +346,6 @@ class Reserva:
                     raise ValueError("ID Compatibilidad debe ser un número o estar vacío.")
 
             # Guardar en la base de datos
-            cursor = self.conn.cursor()
             # Mapear el estado legible al valor esperado por la BD
             estado_seleccionado = datos["Estado:"]
             estado_bd = self.ESTADOS_MAP.get(estado_seleccionado, estado_seleccionado)
@@ -316,27 +353,34 @@ class Reserva:
             venc_str = vencimiento.strftime("%Y-%m-%d")
             tipo = datos["Tipo de Sangre:"]
             try:
-                cursor.execute('''
-                    SELECT ID, VolumenDisp FROM reserva
-                    WHERE Vencimiento = %s AND TipodeSangre = %s AND Estado = %s
-                    LIMIT 1
-                ''', (venc_str, tipo, estado_bd))
-                existente = cursor.fetchone()
-                if existente:
-                    # Actualizar sumando el volumen
-                    id_exist = existente[0]
-                    volumen_exist = float(existente[1]) if existente[1] is not None else 0.0
-                    nuevo_vol = volumen_exist + volumen_decimal
-                    cursor.execute('''
-                        UPDATE reserva SET VolumenDisp = %s WHERE ID = %s
-                    ''', (nuevo_vol, id_exist))
-                else:
+                with self.db.transaccion() as cursor:
                     cursor.execute('''
-                        INSERT INTO reserva (VolumenDisp, FechaExtraccion, Vencimiento, TipodeSangre, Estado, id_Donante, id_Compatibilidad)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    ''', (volumen_decimal, fecha_extraccion.strftime("%Y-%m-%d"), venc_str,
-                          tipo, estado_bd, id_donante, id_compat))
-                self.conn.commit()
+                        SELECT ID, VolumenDisp FROM reserva
+                        WHERE Vencimiento = %s AND TipodeSangre = %s AND Estado = %s
+                        LIMIT 1 FOR UPDATE
+                    ''', (venc_str, tipo, estado_bd))
+                    existente = cursor.fetchone()
+                    if existente:
+                        # Actualizar sumando el volumen (la fila queda bloqueada hasta el commit)
+                        id_exist = existente[0]
+                        volumen_exist = float(existente[1]) if existente[1] is not None else 0.0
+                        nuevo_vol = volumen_exist + volumen_decimal
+                        cursor.execute('''
+                            UPDATE reserva SET VolumenDisp = VolumenDisp + %s WHERE ID = %s
+                        ''', (volumen_decimal, id_exist))
+                        fila_nueva = (id_exist, nuevo_vol, vencimiento, tipo, estado_bd)
+                    else:
+                        cursor.execute('''
+                            INSERT INTO reserva (VolumenDisp, FechaExtraccion, Vencimiento, TipodeSangre, Estado, id_Donante, id_Compatibilidad)
+                            VALUES (%s, %s, %s, %s, %s, %s, %s)
+                        ''', (volumen_decimal, fecha_extraccion.strftime("%Y-%m-%d"), venc_str,
+                              tipo, estado_bd, id_donante, id_compat))
+                        fila_nueva = (cursor.lastrowid, volumen_decimal, vencimiento, tipo, estado_bd)
+                # Mantener el inventario en memoria y la tabla al día sin recargar
+                self.gestor_compat.inventario.sumar(tipo, volumen_decimal)
+                registrar_escritura("reserva")
+                self.modelo.actualizar(fila_nueva)
+                self.actualizar_resumen()
             except Exception as e:
                 # Re-raise as mysql error for outer handler
                 raise
@@ -344,9 +388,7 @@ class Reserva:
             # Mostrar el estado en forma legible
             messagebox.showinfo("Éxito", f"✅ Reserva registrada correctamente.\nVolumen: {volumen_decimal} ml\nTipo: {datos['Tipo de Sangre:']}\nEstado: {datos['Estado:']}")
             
-            # Refrescar la tabla y limpiar formulario
-            self.cargar_stock()
-            self.actualizar_tabla()
+            # La tabla ya quedó actualizada con el parche; solo limpiar formulario
             self._limpiar_campos()
             
         except ValueError as e:
@@ -355,33 +397,37 @@ class Reserva:
             messagebox.showerror("Error de base de datos", f"Error: {str(err)}\n\nVerifica que los datos sean válidos.")
 
     def cargar_stock(self):
-        try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-            SELECT r.ID, r.VolumenDisp, r.Vencimiento, r.TipodeSangre, r.Estado
-            FROM reserva r
-            ORDER BY r.Vencimiento ASC;
-            ''')
-            self.stock_data = cursor.fetchall()
-            # actualizar la vista
+        """Pide la primera página del stock en segundo plano; la tabla se actualiza cuando llega."""
+        self.cargando_label.config(text="⏳ Cargando stock...")
+        self.actualizar_resumen()
+        # El modelo calcula el diff y, si algo cambió, avisa a _modelo_cambiado
+        self.listado.recargar(al_terminar=self._stock_cargado)
+
+    def _stock_cargado(self, cambios):
+        self.cargando_label.config(text="")
+        if not any(cambios.values()):
+            # Sin cambios no hay aviso del modelo, pero puede haber cambiado si quedan páginas
             self.actualizar_tabla()
-        except mysql.connector.Error as e:
-            messagebox.showerror("Error", f"No se pudo cargar el stock: {e}")
-            self.stock_data = []
+
+    def _modelo_cambiado(self, cambios):
+        self.stock_data = self.modelo.filas()
+        # actualizar la vista
+        self.actualizar_tabla()
+
+    def _error_cargar_stock(self, e):
+        self.cargando_label.config(text="")
+        messagebox.showerror("Error", f"No se pudo cargar el stock: {e}")
+        self.stock_data = []
 
     def editar_reserva(self):
-        seleccion = self.tabla_stock.selection()
+        seleccion = self.tabla_stock.filas_seleccionadas()
         if not seleccion:
             messagebox.showwarning("Advertencia", "Selecciona una reserva para editar.")
             return
 
-        item = seleccion[0]
-        valores = self.tabla_stock.item(item, "values")
-        id_reserva = valores[0]
-        volumen = valores[1]
-        vencimiento = valores[2]
-        tipo_sangre = valores[3]
-        estado = valores[4]
+        # fila: (ID, VolumenDisp, Vencimiento, TipodeSangre, Estado)
+        id_reserva, volumen, vencimiento, tipo_sangre, estado = seleccion[0]
+        vencimiento = str(vencimiento)
         # Si el estado viene como código corto desde la BD, mostrar la etiqueta legible
         estado_mostrar = self.ESTADOS_REVERSE.get(estado, estado)
 
@@ -422,7 +468,7 @@ class Reserva:
 
             try:
                 volumen_decimal = float(nuevo_volumen)
-                if volumen_decimal <= 0:
+                if not math.isfinite(volumen_decimal) or volumen_decimal <= 0:
                     raise ValueError("El volumen debe ser positivo.")
                 datetime.strptime(nuevo_vencimiento, "%Y-%m-%d")
             except ValueError as e:
@@ -430,17 +476,38 @@ class Reserva:
                 return
 
             try:
-                cursor = self.conn.cursor()
-                cursor.execute('''
-                    UPDATE reserva
-                    SET VolumenDisp = %s, Vencimiento = %s, TipodeSangre = %s, Estado = %s
-                    WHERE ID = %s
-                ''', (volumen_decimal, nuevo_vencimiento, nuevo_tipo_sangre, nuevo_estado_bd, id_reserva))
-                self.conn.commit()
+                with self.db.transaccion() as cursor:
+                    # Bloquear la fila y confirmar que nadie la consumió desde que se abrió la ventana
+                    cursor.execute('''
+                        SELECT VolumenDisp, TipodeSangre FROM reserva WHERE ID = %s FOR UPDATE
+                    ''', (id_reserva,))
+                    actual = cursor.fetchone()
+                    if actual is None:
+                        raise ValueError(f"La reserva ID {id_reserva} ya no existe.")
+                    volumen_actual = float(actual[0] or 0)
+                    if round(volumen_actual, 2) != round(float(volumen or 0), 2):
+                        raise ValueError(f"El volumen de la reserva ID {id_reserva} cambió a "
+                                         f"{volumen_actual:.2f} ml mientras se editaba; vuelve a abrirla.")
+                    cursor.execute('''
+                        UPDATE reserva
+                        SET VolumenDisp = %s, Vencimiento = %s, TipodeSangre = %s, Estado = %s
+                        WHERE ID = %s
+                    ''', (volumen_decimal, nuevo_vencimiento, nuevo_tipo_sangre, nuevo_estado_bd, id_reserva))
+                # Reemplazar en el inventario el volumen anterior por el nuevo
+                self.gestor_compat.inventario.restar(actual[1], volumen_actual)
+                self.gestor_compat.inventario.sumar(nuevo_tipo_sangre, volumen_decimal)
+                registrar_escritura("reserva")
+                self.modelo.modificar(id_reserva, {
+                    1: volumen_decimal,
+                    2: datetime.strptime(nuevo_vencimiento, "%Y-%m-%d").date(),
+                    3: nuevo_tipo_sangre,
+                    4: nuevo_estado_bd,
+                })
+                self.actualizar_resumen()
                 messagebox.showinfo("Éxito", "✅ Reserva actualizada correctamente.")
                 ventana_editar.destroy()
-                self.cargar_stock()
-                self.actualizar_tabla()
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
             except mysql.connector.Error as e:
                 messagebox.showerror("Error", f"No se pudo actualizar: {str(e)}")
 
@@ -448,80 +515,151 @@ class Reserva:
                  command=guardar_cambios, padx=20, pady=8).pack(pady=15)
 
     def borrar_reserva(self):
-        seleccion = self.tabla_stock.selection()
+        seleccion = self.tabla_stock.filas_seleccionadas()
         if not seleccion:
             messagebox.showwarning("Advertencia", "Selecciona una reserva para eliminar.")
             return
 
-        for item in seleccion:
-            valores = self.tabla_stock.item(item, "values")
+        for valores in seleccion:
             id_reserva = valores[0]
 
             respuesta = messagebox.askyesno("Confirmación", 
                 f"¿Estás seguro de que deseas eliminar la reserva ID {id_reserva}?")
             if respuesta:
                 try:
-                    cursor = self.conn.cursor()
-                    cursor.execute("SET FOREIGN_KEY_CHECKS=0")
-                    cursor.execute('DELETE FROM reserva WHERE ID = %s', (id_reserva,))
-                    cursor.execute("SET FOREIGN_KEY_CHECKS=1")
-                    self.conn.commit()
+                    with self.db.transaccion() as cursor:
+                        cursor.execute('SELECT ID FROM reserva WHERE ID = %s FOR UPDATE', (id_reserva,))
+                        cursor.fetchall()
+                        # Las asignaciones son el registro de qué solicitudes cubrió la bolsa:
+                        # borrarla dejaría sin destino el volumen que se devuelva al liberarlas
+                        cursor.execute('SELECT COUNT(*) FROM asignacion WHERE id_Reserva = %s', (id_reserva,))
+                        if cursor.fetchone()[0]:
+                            raise ValueError(f"La reserva ID {id_reserva} está asignada a solicitudes; "
+                                             "no se puede eliminar.")
+                        cursor.execute('DELETE FROM reserva WHERE ID = %s', (id_reserva,))
+                    self.gestor_compat.inventario.restar(valores[3], self._volumen_de_reserva(id_reserva))
+                    registrar_escritura("reserva")
+                    self.modelo.quitar(id_reserva)
+                    self.actualizar_resumen()
                     messagebox.showinfo("Éxito", "✅ Reserva eliminada correctamente.")
-                    self.cargar_stock()
-                    self.actualizar_tabla()
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
                 except mysql.connector.Error as e:
                     messagebox.showerror("Error", f"No se pudo eliminar: {str(e)}")
 
+    def importar_archivo(self):
+        """Importa bolsas desde un CSV o XLSX en segundo plano (ver importacion.py)."""
+        ruta = filedialog.askopenfilename(
+            parent=self.parent, title="Importar reservas",
+            filetypes=[("Planillas", "*.csv *.xlsx"), ("CSV", "*.csv"), ("Excel", "*.xlsx")],
+        )
+        if not ruta:
+            return
+        self.cargando_label.config(text="⏳ Importando reservas...")
+
+        def importar():
+            try:
+                return importar_reservas(self.db, ruta)
+            finally:
+                # El inventario se recarga una vez al final (también si se cortó a la mitad)
+                self.gestor_compat.inventario.recargar()
+
+        self.ejecutor.ejecutar("Reserva.importar", importar, self._importacion_terminada, self._error_importacion)
+
+    def _importacion_terminada(self, resultado):
+        self.cargando_label.config(text="")
+        self.cargar_stock()
+        if not resultado["errores"]:
+            messagebox.showinfo("Importación", "✅ " + texto_resultado(resultado))
+            return
+        if messagebox.askyesno("Importación", texto_resultado(resultado)
+                               + "\n\n¿Guardar el informe de filas con errores?"):
+            ruta = filedialog.asksaveasfilename(parent=self.parent, title="Guardar informe de errores",
+                                                defaultextension=".csv", filetypes=[("CSV", "*.csv")])
+            if ruta:
+                try:
+                    escribir_informe(resultado["errores"], ruta)
+                except OSError as e:
+                    messagebox.showerror("Error", f"No se pudo guardar el informe: {e}")
+
+    def _error_importacion(self, e):
+        self.cargando_label.config(text="")
+        if isinstance(e, ValueError):
+            messagebox.showerror("Archivo inválido", str(e))
+        else:
+            messagebox.showerror("Error de base de datos", f"La importación se interrumpió: {e}")
+            # Las tandas anteriores al error quedaron guardadas
+            self.cargar_stock()
+
+    def _volumen_de_reserva(self, id_reserva):
+        """Devuelve el VolumenDisp cargado en el modelo para una reserva (0 si no está)."""
+        rec = self.modelo.obtener(id_reserva)
+        try:
+            return float(rec[1]) if rec else 0.0
+        except (TypeError, ValueError):
+            return 0.0
+
+    def _formatear_fila_stock(self, rec):
+        """rec: (ID, VolumenDisp, Vencimiento, TipodeSangre, Estado) -> valores a mostrar."""
+        # Mostrar valores con formato legible (convertir código de BD a etiqueta)
+        display_estado = self.ESTADOS_REVERSE.get(rec[4], rec[4])
+        return (rec[0], f"{rec[1]} ml", rec[2], rec[3], display_estado)
+
     def actualizar_tabla(self):
-        """Limpia tabla y la vuelve a llenar desde self.stock_data."""
+        """Vuelve a llenar la tabla desde self.stock_data (las páginas ya cargadas)."""
         try:
             if not hasattr(self, 'tabla_stock'):
                 return
-            for row in self.tabla_stock.get_children():
-                self.tabla_stock.delete(row)
-
-            # Calcular totales por tipo de sangre
-            totales = {}
-            for rec in self.stock_data:
-                # rec: (ID, VolumenDisp, Vencimiento, TipodeSangre, Estado)
-                try:
-                    vol = float(rec[1])
-                except Exception:
-                    vol = 0.0
-                tipo = rec[3]
-                totales[tipo] = totales.get(tipo, 0.0) + vol
-                # Mostrar valores con formato legible (convertir código de BD a etiqueta)
-                display_estado = self.ESTADOS_REVERSE.get(rec[4], rec[4])
-                valores_formato = (rec[0], f"{rec[1]} ml", rec[2], rec[3], display_estado)
-                self.tabla_stock.insert("", "end", values=valores_formato)
-
-            # Mostrar totales
-            if hasattr(self, 'total_label') and totales:
-                partes = [f"{k}: {v} ml" for k, v in totales.items()]
-                self.total_label.config(text="📊 Totales por tipo: " + " | ".join(partes))
-            # Actualizar resumen compacto: mostrar volumen en unidades estándar
-            if hasattr(self, 'summary_labels'):
-                for tipo_label, lbl in self.summary_labels.items():
-                    vol = totales.get(tipo_label, 0.0)
-                    unidades_est = vol / self.STANDARD_UNIT_ML if self.STANDARD_UNIT_ML else 0
-                    lbl.config(text=f"{tipo_label}: {unidades_est:.2f} uds estándar")
-            elif hasattr(self, 'total_label'):
-                self.total_label.config(text="No hay stock registrado.")
-        except Exception as e:
-            print("Error actualizando tabla:", e)
+            self.tabla_stock.cargar(self.stock_data, completa=self.listado.completo)
+        except Exception:
+            obtener_logger("verreserva").exception("Error actualizando tabla")
+
+    def actualizar_resumen(self):
+        """Pide los totales por tipo en segundo plano (de caché si no hubo escrituras)."""
+        self.ejecutor.ejecutar("Reserva.resumen", self.resumen.obtener,
+                               self._mostrar_resumen, self._error_resumen)
+
+    def _mostrar_resumen(self, resumen):
+        por_tipo = resumen["por_tipo"]
+        partes = [f"{tipo}: {datos['ml']:.0f} ml" for tipo, datos in por_tipo.items() if datos["ml"] > 0]
+        if partes:
+            self.total_label.config(text="📊 Totales por tipo: " + " | ".join(partes)
+                                    + f"  —  Total: {resumen['total_unidades']:.2f} uds estándar")
+        else:
+            self.total_label.config(text="No hay stock registrado.")
+
+        for tipo, lbl in self.summary_labels.items():
+            datos = por_tipo.get(tipo)
+            if datos is None:
+                lbl.config(text=f"{tipo}: sin stock", fg="#999")
+                continue
+            texto = f"{tipo}: {datos['unidades']:.2f} uds estándar"
+            if datos["por_vencer_bolsas"]:
+                texto += f"\n⚠ {datos['por_vencer_bolsas']} por vencer ({DIAS_POR_VENCER} días)"
+            if datos["vencidas"]:
+                texto += f"\n✖ {datos['vencidas']} vencidas"
+            lbl.config(text=texto, fg="#d9534f" if datos["ml"] <= 0 else "#333")
+
+    def _error_resumen(self, e):
+        self.total_label.config(text=f"No se pudo calcular el resumen de stock: {e}")
 
     def cancelar(self):
         for widget in self.parent.winfo_children():
             widget.destroy()
 
+    def refrescar(self):
+        """Recarga stock y resumen al volver a la pantalla (solo se redibuja lo que cambió)."""
+        version = VERSIONES.version("reserva")
+        if version != self._version_inventario:
+            # Otras pantallas (solicitudes, vencimientos) movieron stock: las recomendaciones usan el inventario
+            self._version_inventario = version
+            self.ejecutor.ejecutar("Reserva.inventario", self.gestor_compat.inventario.recargar,
+                                   lambda _: None)
+        self.cargar_stock()
+
     def limpiar(self):
+        # Dentro del menú la pantalla se oculta y se conserva; suelta, se limpia como siempre
+        if volver_inicio(self.parent):
+            return
         self.cancelar()
-        logo_path = "imagenbanco.jpg"
-        try:
-            image = Image.open(logo_path)
-            logo = ImageTk.PhotoImage(image)
-            logo_label = tk.Label(self.parent, image=logo, bg="white")
-            logo_label.image = logo
-            logo_label.pack(pady=20)
-        except Exception as e:
-            tk.Label(self.parent, text="No se encontró el logo.", font=("Arial", 16), bg="white").pack()
+        mostrar_logo(self.parent)
@@ -0,0 +1,60 @@
+"""
+Módulo de versiones de datos.
+Cuenta las escrituras hechas por la aplicación en cada tabla. Los cachés que
+dependen de una tabla (resumen de stock, pantallas abiertas) guardan la versión
+con la que se calcularon y se recalculan solo cuando cambió.
+"""
+
+import threading
+from typing import Callable, Dict, List
+
+from registro import obtener_logger
+
+
+class VersionesDatos:
+    """Contador de escrituras por tabla, seguro entre hilos."""
+
+    def __init__(self):
+        self._versiones: Dict[str, int] = {}
+        self._oyentes: List[Callable] = []
+        self._lock = threading.Lock()
+
+    def version(self, tabla: str) -> int:
+        with self._lock:
+            return self._versiones.get(tabla, 0)
+
+    def registrar_escritura(self, *tablas: str):
+        """
+        Marca que se escribió en las tablas (llamar después del commit).
+
+        Args:
+            *tablas: Nombres de tabla (ej: "reserva", "solicitud")
+        """
+        with self._lock:
+            for tabla in tablas:
+                self._versiones[tabla] = self._versiones.get(tabla, 0) + 1
+            oyentes = list(self._oyentes)
+        for oyente in oyentes:
+            try:
+                oyente(tablas)
+            except Exception:
+                obtener_logger("versiones_datos").exception("Error notificando escritura en %s", tablas)
+
+    def suscribir(self, oyente: Callable):
+        """Registra oyente(tablas), llamado después de cada escritura."""
+        with self._lock:
+            self._oyentes.append(oyente)
+
+    def desuscribir(self, oyente: Callable):
+        with self._lock:
+            if oyente in self._oyentes:
+                self._oyentes.remove(oyente)
+
+
+# Contador único del proceso
+VERSIONES = VersionesDatos()
+
+
+def registrar_escritura(*tablas: str):
+    """Atajo de VERSIONES.registrar_escritura()."""
+    VERSIONES.registrar_escritura(*tablas)